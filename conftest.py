@@ -2,9 +2,89 @@
 
 # Core Library modules
 import logging
+import os
+import pickle
 from typing import Any, Dict
 
+# Third party modules
+import numpy as np
+import pytest
+
+# First party modules
+import lidtk.classifiers.char_distribution.char_dist_metric_train_test as cdm
+import lidtk.utils
+
 
 def pytest_configure(config: Dict[Any, Any]) -> None:
     """Flake8 is to verbose. Mute it."""
     logging.getLogger("flake8").setLevel(logging.WARN)
+
+
+@pytest.fixture
+def artifacts_dir(tmpdir, monkeypatch):
+    """Make lidtk write its results store, caches and profiles into tmpdir."""
+    load_cfg = lidtk.utils.load_cfg
+    overrides = {
+        "results_store_path": os.path.join(str(tmpdir), "results.sqlite"),
+        "label_sets_path": os.path.join(str(tmpdir), "label_sets", "{}.json"),
+        "profiles_path": os.path.join(str(tmpdir), "profiles", "{}.json"),
+    }
+
+    def load_test_cfg(yaml_filepath=None):
+        cfg = load_cfg(yaml_filepath)
+        if yaml_filepath is None:
+            cfg.update(overrides)
+        return cfg
+
+    monkeypatch.setattr(lidtk.utils, "load_cfg", load_test_cfg)
+    return str(tmpdir)
+
+
+@pytest.fixture
+def service_classifier():
+    """
+    Get a factory for web service classifiers which talk to a MockService.
+
+    The factory gets the classifier module (e.g. google_mod), the running
+    MockService and config overrides.
+    """
+
+    def get_classifier(module, service, **cfg):
+        classifier = type(module.classifier)(module.filepath)
+        classifier.cfg["api_url"] = f"{service.base_url}{module.mock_api_path}"
+        classifier.cfg["backoff"] = 0.01
+        classifier.cfg.update(cfg)
+        return classifier
+
+    return get_classifier
+
+
+@pytest.fixture
+def char_dist_classifier(tmpdir):
+    """
+    Get a factory for character distribution classifiers with a toy model.
+
+    The model in tmpdir knows the characters 'a', 'b' and 'other' and the
+    languages 'aaa', 'bbb' and 'ccc'. The factory gets the metric.
+    """
+    model_path = os.path.join(str(tmpdir), "char_dist.pickle")
+    with open(model_path, "wb") as handle:
+        pickle.dump(
+            {
+                "language_models": {
+                    "aaa": np.array([0.8, 0.1, 0.1]),
+                    "bbb": np.array([0.1, 0.8, 0.1]),
+                    "ccc": np.array([0.3, 0.3, 0.4]),
+                },
+                "chars": ["a", "b", "other"],
+            },
+            handle,
+        )
+
+    def get_classifier(metric="ido"):
+        classifier = cdm.load_classifier()
+        classifier.cfg = dict(classifier.cfg, model_path=model_path, metric=metric)
+        classifier.metric = cdm.get_metric(metric)
+        return classifier
+
+    return get_classifier
@@ -2,40 +2,51 @@
 
 
 # Core Library modules
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Sequence
 
 
 def manual_error_analysis(
-    errors: Dict[str, Dict[str, List[str]]], author_known_languages: List[str]
+    errors: Dict[str, Dict[str, List[int]]],
+    author_known_languages: List[str],
+    texts: Optional[Sequence[str]] = None,
 ) -> None:
     """
     Print errors for manual analysis.
 
     Parameters
     ----------
-    errors : Dict[str, Dict[str, List[str]]]
-        Has the form 'errors[true][predicted] = [sample 1, sample 2, ...]'
+    errors : Dict[str, Dict[str, List[int]]]
+        Has the form 'errors[true][predicted] = [index 1, index 2, ...]',
+        see lidtk.analysis.evaluation.load_errors
     author_known_languages : List[str]
+    texts : Sequence[str], optional (default: WiLI x_test)
+        The samples the indices refer to; only the printed ones are read
     """
+    if texts is None:
+        # First party modules
+        import lidtk.utils
+        from lidtk.data import wili
+
+        texts = wili.LazyLines(lidtk.utils.load_cfg()["x_test_path"])
     print("# Author knows the (wrongly) predicted langauge")
     conv_err = {}  # type: Dict[Any, Any]
     for true_lang, tmp in errors.items():
-        for pred_lang, samples in tmp.items():
+        for pred_lang, indices in tmp.items():
             if pred_lang not in conv_err:
                 conv_err[pred_lang] = {}
             if true_lang not in conv_err[pred_lang]:
                 conv_err[pred_lang][true_lang] = []
-            conv_err[pred_lang][true_lang] += samples
+            conv_err[pred_lang][true_lang] += indices
 
     for label in author_known_languages:
-        if label not in errors:
+        if label not in conv_err:
             continue
         for true_lang, errors_lang in conv_err[label].items():
             print(
                 f"## True: {true_lang}, Predicted: {label} "
                 f"(count: {len(errors_lang)})"
             )
-            for nb, el in enumerate(errors_lang):
-                print(f"{nb}. {el}")
+            for nb, index in enumerate(errors_lang):
+                print(f"{nb}. {texts[index]}")
             print("")
         print("\n")
@@ -0,0 +1,217 @@
+"""
+Find out how many characters a classifier needs to read.
+
+LIDClassifier.predict_incremental reads a text window by window and stops
+once the prediction is confident enough. The curves of this module show the
+accuracy after each number of read characters and the accuracy and reading
+cost of each confidence threshold, so `early_exit` of a classifier config
+can be chosen on data.
+"""
+
+# Core Library modules
+import csv
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+# Third party modules
+import click
+import numpy as np
+
+# First party modules
+import lidtk.classifiers
+from lidtk import runner
+from lidtk.data import wili
+
+logger = logging.getLogger(__name__)
+
+# The predictions of one text: (language, confidence, n_read) per prefix
+PrefixPredictions = List[Tuple[str, float, int]]
+
+
+def get_prefix_predictions(
+    classifier: lidtk.classifiers.LIDClassifier,
+    texts: List[str],
+    window_size: int,
+    max_chars: Optional[int] = None,
+) -> List[PrefixPredictions]:
+    """
+    Predict the prefixes of each text, see iter_prefix_predictions.
+
+    Parameters
+    ----------
+    classifier : lidtk.classifiers.LIDClassifier
+    texts : List[str]
+    window_size : int
+    max_chars : int, optional (default: the whole texts)
+
+    Returns
+    -------
+    predictions : List[PrefixPredictions]
+    """
+    return [
+        list(classifier.iter_prefix_predictions(text, window_size, max_chars))
+        for text in texts
+    ]
+
+
+def get_accuracy_curve(
+    predictions: List[PrefixPredictions], labels: List[str], window_size: int
+) -> List[Dict[str, Any]]:
+    """
+    Get the accuracy after reading n characters for each window boundary n.
+
+    Texts which are shorter than n count with their prediction for the
+    whole text.
+
+    Parameters
+    ----------
+    predictions : List[PrefixPredictions]
+    labels : List[str]
+        The true language of each text
+    window_size : int
+
+    Returns
+    -------
+    curve : List[Dict[str, Any]]
+        'n_chars', 'accuracy' and 'n_complete', the number of texts which
+        were read completely
+
+    Examples
+    --------
+    >>> predictions = [[("deu", 0.0, 2), ("eng", 1.0, 4)], [("eng", 1.0, 2)]]
+    >>> [el["accuracy"] for el in get_accuracy_curve(predictions, ["eng"] * 2, 2)]
+    [0.5, 1.0]
+    """
+    n_max = max((prefixes[-1][2] for prefixes in predictions), default=0)
+    curve = []
+    for n_chars in lidtk.classifiers.get_prefix_ends(n_max, window_size):
+        n_correct = 0
+        n_complete = 0
+        for prefixes, label in zip(predictions, labels):
+            # The prefixes are sorted by n_read
+            language = prefixes[0][0]
+            for prefix_language, _, n_read in prefixes:
+                if n_read > n_chars:
+                    break
+                language = prefix_language
+            n_correct += language == label
+            n_complete += prefixes[-1][2] <= n_chars
+        curve.append(
+            {
+                "n_chars": n_chars,
+                "accuracy": n_correct / max(len(labels), 1),
+                "n_complete": n_complete,
+            }
+        )
+    return curve
+
+
+def get_operating_points(
+    predictions: List[PrefixPredictions], labels: List[str], min_margins: List[float]
+) -> List[Dict[str, Any]]:
+    """
+    Get accuracy and reading cost of predict_incremental for thresholds.
+
+    Parameters
+    ----------
+    predictions : List[PrefixPredictions]
+    labels : List[str]
+    min_margins : List[float]
+        Candidates for `min_margin` of predict_incremental
+
+    Returns
+    -------
+    points : List[Dict[str, Any]]
+        'min_margin', 'accuracy', 'mean_chars' and 'max_chars'
+
+    Examples
+    --------
+    >>> predictions = [[("deu", 0.1, 2), ("eng", 1.0, 4)], [("eng", 1.0, 2)]]
+    >>> points = get_operating_points(predictions, ["eng"] * 2, [0.05, 0.5])
+    >>> [(el["accuracy"], el["mean_chars"]) for el in points]
+    [(0.5, 2.0), (1.0, 3.0)]
+    """
+    points = []
+    for min_margin in min_margins:
+        n_correct = 0
+        n_reads = []
+        for prefixes, label in zip(predictions, labels):
+            for language, confidence, n_read in prefixes:
+                if confidence >= min_margin:
+                    break
+            n_correct += language == label
+            n_reads.append(n_read)
+        points.append(
+            {
+                "min_margin": min_margin,
+                "accuracy": n_correct / max(len(labels), 1),
+                "mean_chars": float(np.mean(n_reads)) if n_reads else 0.0,
+                "max_chars": max(n_reads, default=0),
+            }
+        )
+    return points
+
+
+def get_sample(n_samples: int) -> Tuple[List[str], List[str]]:
+    """Get WiLI test texts and labels in which all languages take turns."""
+    data = runner.load_test_set()
+    indices = wili.stratified_order(data["y_test"])[:n_samples]
+    return [data["x_test"][i] for i in indices], [data["y_test"][i] for i in indices]
+
+
+def write_csv(filepath: str, rows: List[Dict[str, Any]]) -> None:
+    """Write rows with the same keys to a CSV file."""
+    with open(filepath, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]), delimiter=";")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+###############################################################################
+# CLI                                                                         #
+###############################################################################
+@click.command(name="early-exit")
+@click.argument(
+    "classifier_name", type=click.Choice(lidtk.classifiers.classifier_modules)
+)
+@click.option("--config", "config_filepath", default=None, help="Classifier config")
+@click.option("--window_size", default=50, show_default=True)
+@click.option("--max_chars", default=1000, show_default=True)
+@click.option(
+    "--min_margins",
+    default="0.01,0.02,0.05,0.1,0.2",
+    show_default=True,
+    help="Thresholds to evaluate",
+)
+@click.option("--n_samples", default=2000, show_default=True, help="Sample size")
+@click.option("--output", default=None, help="CSV file for the accuracy curve")
+def main(
+    classifier_name: str,
+    config_filepath: Optional[str],
+    window_size: int,
+    max_chars: int,
+    min_margins: str,
+    n_samples: int,
+    output: Optional[str],
+) -> None:
+    """Show the accuracy of a classifier by the number of read characters."""
+    classifier = lidtk.classifiers.get_classifier(classifier_name, config_filepath)
+    texts, labels = get_sample(n_samples)
+    predictions = get_prefix_predictions(classifier, texts, window_size, max_chars)
+    curve = get_accuracy_curve(predictions, labels, window_size)
+    for el in curve:
+        print(
+            f"{el['n_chars']:>6} chars  {el['accuracy'] * 100:6.2f}%  "
+            f"({el['n_complete']} texts read completely)"
+        )
+    print("")
+    for el in get_operating_points(
+        predictions, labels, [float(el) for el in min_margins.split(",")]
+    ):
+        print(
+            f"min_margin={el['min_margin']:<6} {el['accuracy'] * 100:6.2f}%  "
+            f"{el['mean_chars']:8.1f} chars on average, at most {el['max_chars']}"
+        )
+    if output is not None:
+        write_csv(output, curve)
+        print(f"Stored the curve at {output}")
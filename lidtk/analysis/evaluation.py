@@ -0,0 +1,239 @@
+"""
+Evaluation reports which only keep counts and sample indices.
+
+The confusion matrix is accumulated while a classifier runs and the
+misclassified samples are streamed to a CSV file as indices into the
+dataset. The texts can be read back lazily, see manual_error_analysis.
+"""
+
+# Core Library modules
+import csv
+import os
+from typing import Any, Dict, List, Optional
+
+# Third party modules
+import numpy as np
+
+# First party modules
+from lidtk.data.label_table import LabelTable
+
+
+class EvaluationReport:
+    """
+    Accumulate the confusion matrix and the errors of a classifier.
+
+    Parameters
+    ----------
+    table : LabelTable
+    errors_filepath : str, optional (default: None)
+        Misclassified samples are appended to this CSV file as lines
+        'index;true;predicted' while the evaluation runs
+    state : Dict[str, Any], optional (default: start a new report)
+        Continue at a state returned by get_state
+    """
+
+    def __init__(
+        self,
+        table: LabelTable,
+        errors_filepath: Optional[str] = None,
+        state: Optional[Dict[str, Any]] = None,
+    ):
+        self.table = table
+        # confusion[true_id, predicted_id]
+        self.confusion = np.zeros((len(table), len(table)), dtype=np.int32)
+        self.errors_filepath = errors_filepath
+        self._errors_fp = None
+        if state is not None:
+            self.confusion[:] = state["confusion"]
+        if errors_filepath is not None:
+            if state is None:
+                self._errors_fp = open(errors_filepath, "w")
+                self._errors_fp.write("index;true;predicted\n")
+            else:
+                # Drop the errors which were written after the state
+                self._errors_fp = open(errors_filepath, "r+")
+                self._errors_fp.seek(state["errors_offset"])
+                self._errors_fp.truncate()
+
+    def add(self, index: int, true: str, predicted: str) -> None:
+        """
+        Add the prediction of one sample.
+
+        Parameters
+        ----------
+        index : int
+            Index of the sample in the dataset
+        true : str
+        predicted : str
+            Labels which are not in the table count as UNK in the confusion
+            matrix, but are stored as they are in the errors file
+        """
+        self.confusion[self.table.get_id(true), self.table.get_id(predicted)] += 1
+        if true != predicted and self._errors_fp is not None:
+            self._errors_fp.write(f"{index};{true};{predicted}\n")
+
+    def add_bulk(
+        self, indices: np.ndarray, true_ids: np.ndarray, predicted_ids: np.ndarray
+    ) -> None:
+        """
+        Add the predictions of many samples.
+
+        Parameters
+        ----------
+        indices : np.ndarray
+            Indices of the samples in the dataset
+        true_ids : np.ndarray
+        predicted_ids : np.ndarray
+            Label ids, see lidtk.data.label_table
+        """
+        true_ids = np.asarray(true_ids, dtype=np.int64)
+        predicted_ids = np.asarray(predicted_ids, dtype=np.int64)
+        np.add.at(self.confusion, (true_ids, predicted_ids), 1)
+        if self._errors_fp is not None:
+            wrong = np.flatnonzero(true_ids != predicted_ids)
+            true_labels = self.table.decode(true_ids[wrong])
+            predicted_labels = self.table.decode(predicted_ids[wrong])
+            self._errors_fp.write(
+                "".join(
+                    f"{index};{true};{predicted}\n"
+                    for index, true, predicted in zip(
+                        np.asarray(indices)[wrong], true_labels, predicted_labels
+                    )
+                )
+            )
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Flush the errors file and get the state to resume from.
+
+        Returns
+        -------
+        state : Dict[str, Any]
+            'confusion' and 'errors_offset'
+        """
+        errors_offset = 0
+        if self._errors_fp is not None:
+            self._errors_fp.flush()
+            errors_offset = self._errors_fp.tell()
+        return {"confusion": self.confusion.copy(), "errors_offset": errors_offset}
+
+    def close(self) -> None:
+        """Flush the errors file."""
+        if self._errors_fp is not None:
+            self._errors_fp.close()
+            self._errors_fp = None
+
+    def get_metrics(self) -> Dict[str, np.ndarray]:
+        """
+        Get precision, recall and F1 score of each label.
+
+        Labels which are never predicted (or never true) get a precision
+        (or recall) of 0.
+
+        Returns
+        -------
+        metrics : Dict[str, np.ndarray]
+            'precision', 'recall', 'f1' and 'support' (number of true
+            samples), each indexed by label id
+        """
+        true_positives = np.diag(self.confusion).astype(np.float64)
+        support = self.confusion.sum(axis=1)
+        n_predicted = self.confusion.sum(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            precision = np.where(n_predicted > 0, true_positives / n_predicted, 0.0)
+            recall = np.where(support > 0, true_positives / support, 0.0)
+            summed = precision + recall
+            f1 = np.where(summed > 0, 2 * precision * recall / summed, 0.0)
+        return {"precision": precision, "recall": recall, "f1": f1, "support": support}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Summarize the report.
+
+        Returns
+        -------
+        summary : Dict[str, Any]
+            'n_samples', 'accuracy' and the metrics of each label which is
+            either true or predicted for at least one sample
+        """
+        metrics = self.get_metrics()
+        n_samples = int(self.confusion.sum())
+        n_correct = int(np.trace(self.confusion))
+        used = (metrics["support"] > 0) | (self.confusion.sum(axis=0) > 0)
+        per_label = {
+            self.table.labels[label_id]: {
+                "precision": float(metrics["precision"][label_id]),
+                "recall": float(metrics["recall"][label_id]),
+                "f1": float(metrics["f1"][label_id]),
+                "support": int(metrics["support"][label_id]),
+            }
+            for label_id in np.flatnonzero(used)
+        }
+        return {
+            "n_samples": n_samples,
+            "accuracy": n_correct / n_samples if n_samples > 0 else 0.0,
+            "per_label": per_label,
+        }
+
+    def save_confusion(self, filepath: str) -> None:
+        """Store the confusion matrix as .npy file."""
+        np.save(filepath, self.confusion)
+
+
+def save_checkpoint(filepath: str, **state: Any) -> None:
+    """
+    Store the state of an evaluation run atomically.
+
+    Parameters
+    ----------
+    filepath : str
+        An .npz file; it is replaced only after the new one is complete
+    **state : Any
+        Arrays and scalars
+    """
+    tmp_filepath = filepath + ".tmp.npz"
+    np.savez(tmp_filepath, **state)
+    os.replace(tmp_filepath, filepath)
+
+
+def load_checkpoint(filepath: str) -> Dict[str, Any]:
+    """
+    Load the state of an evaluation run, see save_checkpoint.
+
+    Parameters
+    ----------
+    filepath : str
+
+    Returns
+    -------
+    state : Dict[str, Any]
+        0-dimensional arrays are converted to Python scalars
+    """
+    with np.load(filepath) as checkpoint:
+        return {
+            key: (
+                checkpoint[key].item() if checkpoint[key].ndim == 0 else checkpoint[key]
+            )
+            for key in checkpoint.files
+        }
+
+
+def load_errors(errors_filepath: str) -> Dict[str, Dict[str, List[int]]]:
+    """
+    Read the errors file of an EvaluationReport.
+
+    Parameters
+    ----------
+    errors_filepath : str
+
+    Returns
+    -------
+    errors : Dict[str, Dict[str, List[int]]]
+        Has the form 'errors[true][predicted] = [index 1, index 2, ...]'
+    """
+    errors = {}  # type: Dict[str, Dict[str, List[int]]]
+    with open(errors_filepath) as fp:
+        for row in csv.DictReader(fp, delimiter=";"):
+            by_predicted = errors.setdefault(row["true"], {})
+            by_predicted.setdefault(row["predicted"], []).append(int(row["index"]))
+    return errors
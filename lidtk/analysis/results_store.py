@@ -0,0 +1,438 @@
+"""
+Store the predictions of classifiers in one SQLite database.
+
+Each run of a classifier on a split of a dataset is keyed by the name and
+the configuration hash of the classifier (see lidtk.utils.get_config_hash).
+Predictions are stored as label ids (see lidtk.data.label_table) with
+optional scores and latencies. Queries load whole columns into numpy
+arrays, so comparisons between classifiers are vectorized.
+"""
+
+# Core Library modules
+import datetime
+import itertools
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+
+# Third party modules
+import click
+import numpy as np
+
+# First party modules
+import lidtk.utils
+from lidtk.data import label_table
+
+logger = logging.getLogger(__name__)
+
+schema = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    dataset TEXT NOT NULL,
+    split TEXT NOT NULL,
+    classifier TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    created TEXT NOT NULL,
+    UNIQUE (dataset, split, classifier, config_hash)
+);
+CREATE TABLE IF NOT EXISTS labels (
+    dataset TEXT NOT NULL,
+    split TEXT NOT NULL,
+    sample_index INTEGER NOT NULL,
+    label_id INTEGER NOT NULL,
+    PRIMARY KEY (dataset, split, sample_index)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS predictions (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    sample_index INTEGER NOT NULL,
+    label_id INTEGER NOT NULL,
+    score REAL,
+    latency REAL,
+    PRIMARY KEY (run_id, sample_index)
+) WITHOUT ROWID;
+"""
+
+
+class ResultsStore:
+    """
+    Predictions of classifiers on datasets.
+
+    Parameters
+    ----------
+    filepath : str, optional (default: results_store_path of the config)
+    """
+
+    def __init__(self, filepath: Optional[str] = None):
+        if filepath is None:
+            filepath = lidtk.utils.load_cfg()["results_store_path"]
+        self.filepath = os.path.abspath(os.path.expanduser(filepath))
+        os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+        self.connection = sqlite3.connect(self.filepath)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(schema)
+
+    def close(self) -> None:
+        """Close the database."""
+        self.connection.close()
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def set_labels(
+        self,
+        sample_indices: np.ndarray,
+        label_ids: np.ndarray,
+        dataset: str = "wili",
+        split: str = "test",
+    ) -> None:
+        """
+        Store the true labels of samples.
+
+        Parameters
+        ----------
+        sample_indices : np.ndarray
+        label_ids : np.ndarray
+        dataset : str, optional (default: wili)
+        split : str, optional (default: test)
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO labels VALUES (?, ?, ?, ?)",
+                zip(
+                    itertools.repeat(dataset),
+                    itertools.repeat(split),
+                    np.asarray(sample_indices).tolist(),
+                    np.asarray(label_ids).tolist(),
+                ),
+            )
+
+    def add_run(
+        self,
+        classifier: str,
+        config_hash: str,
+        sample_indices: np.ndarray,
+        label_ids: np.ndarray,
+        scores: Optional[np.ndarray] = None,
+        latencies: Optional[np.ndarray] = None,
+        dataset: str = "wili",
+        split: str = "test",
+    ) -> int:
+        """
+        Store the predictions of a run; a previous run with the same key is
+        replaced.
+
+        Parameters
+        ----------
+        classifier : str
+        config_hash : str
+        sample_indices : np.ndarray
+        label_ids : np.ndarray
+        scores : np.ndarray, optional (default: None)
+        latencies : np.ndarray, optional (default: None)
+            Seconds per sample
+        dataset : str, optional (default: wili)
+        split : str, optional (default: test)
+
+        Returns
+        -------
+        run_id : int
+        """
+        n_samples = len(sample_indices)
+        columns = [
+            np.asarray(sample_indices).tolist(),
+            np.asarray(label_ids).tolist(),
+            [None] * n_samples if scores is None else np.asarray(scores).tolist(),
+            [None] * n_samples if latencies is None else np.asarray(latencies).tolist(),
+        ]
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM runs WHERE dataset = ? AND split = ? "
+                "AND classifier = ? AND config_hash = ?",
+                (dataset, split, classifier, config_hash),
+            )
+            cursor = self.connection.execute(
+                "INSERT INTO runs (dataset, split, classifier, config_hash, created) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    dataset,
+                    split,
+                    classifier,
+                    config_hash,
+                    f"{datetime.datetime.now():%Y-%m-%d %H:%M:%S}",
+                ),
+            )
+            run_id = cursor.lastrowid
+            assert run_id is not None, "for mypy"
+            self.connection.executemany(
+                "INSERT INTO predictions VALUES (?, ?, ?, ?, ?)",
+                zip(itertools.repeat(run_id), *columns),
+            )
+        return run_id
+
+    def get_runs(
+        self, dataset: str = "wili", split: str = "test", latest: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the runs on a split.
+
+        Parameters
+        ----------
+        dataset : str, optional (default: wili)
+        split : str, optional (default: test)
+        latest : bool, optional (default: True)
+            Only the latest run of each classifier
+
+        Returns
+        -------
+        runs : List[Dict[str, Any]]
+            With the keys 'run_id', 'classifier', 'config_hash' and
+            'created', sorted by classifier
+        """
+        rows = self.connection.execute(
+            "SELECT run_id, classifier, config_hash, created FROM runs "
+            "WHERE dataset = ? AND split = ? ORDER BY classifier, run_id",
+            (dataset, split),
+        ).fetchall()
+        runs = [
+            dict(zip(["run_id", "classifier", "config_hash", "created"], row))
+            for row in rows
+        ]
+        if latest:
+            by_classifier = {run["classifier"]: run for run in runs}
+            runs = list(by_classifier.values())
+        return runs
+
+    def find_run(
+        self,
+        classifier: str,
+        config_hash: Optional[str] = None,
+        dataset: str = "wili",
+        split: str = "test",
+    ) -> Optional[int]:
+        """
+        Get the id of a run.
+
+        Parameters
+        ----------
+        classifier : str
+        config_hash : str, optional (default: the latest run)
+        dataset : str, optional (default: wili)
+        split : str, optional (default: test)
+
+        Returns
+        -------
+        run_id : Optional[int]
+            None if there is no such run
+        """
+        query = "SELECT run_id FROM runs WHERE dataset = ? AND split = ? "
+        query += "AND classifier = ?"
+        parameters = [dataset, split, classifier]
+        if config_hash is not None:
+            query += " AND config_hash = ?"
+            parameters.append(config_hash)
+        row = self.connection.execute(
+            query + " ORDER BY run_id DESC LIMIT 1", parameters
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def get_labels(
+        self, dataset: str = "wili", split: str = "test"
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the true labels of a split.
+
+        Returns
+        -------
+        sample_indices, label_ids : Tuple[np.ndarray, np.ndarray]
+            Sorted by sample index
+        """
+        cursor = self.connection.execute(
+            "SELECT sample_index, label_id FROM labels "
+            "WHERE dataset = ? AND split = ? ORDER BY sample_index",
+            (dataset, split),
+        )
+        return _to_columns(cursor, 2)
+
+    def get_predictions(self, run_id: int) -> Dict[str, np.ndarray]:
+        """
+        Get the predictions of a run.
+
+        Parameters
+        ----------
+        run_id : int
+
+        Returns
+        -------
+        predictions : Dict[str, np.ndarray]
+            'sample_indices', 'label_ids', 'scores' and 'latencies' (NaN if
+            not stored), sorted by sample index
+        """
+        cursor = self.connection.execute(
+            "SELECT sample_index, label_id, score, latency FROM predictions "
+            "WHERE run_id = ? ORDER BY sample_index",
+            (run_id,),
+        )
+        rows = np.array(cursor.fetchall(), dtype=np.float64).reshape(-1, 4)
+        return {
+            "sample_indices": rows[:, 0].astype(np.int64),
+            "label_ids": rows[:, 1].astype(label_table.label_dtype),
+            "scores": rows[:, 2],
+            "latencies": rows[:, 3],
+        }
+
+    def get_prediction_matrix(
+        self, run_ids: List[int], dataset: str = "wili", split: str = "test"
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the true labels and the predictions of runs side by side.
+
+        Parameters
+        ----------
+        run_ids : List[int]
+        dataset : str, optional (default: wili)
+        split : str, optional (default: test)
+
+        Returns
+        -------
+        sample_indices, true_ids, predicted_ids : Tuple[np.ndarray, ...]
+            predicted_ids has the shape (len(sample_indices), len(run_ids));
+            -1 where a run has no prediction for a sample
+        """
+        sample_indices, true_ids = self.get_labels(dataset, split)
+        predicted_ids = np.full(
+            (len(sample_indices), len(run_ids)), -1, dtype=label_table.label_dtype
+        )
+        for column, run_id in enumerate(run_ids):
+            predictions = self.get_predictions(run_id)
+            rows = np.searchsorted(sample_indices, predictions["sample_indices"])
+            rows = np.minimum(rows, max(len(sample_indices) - 1, 0))
+            known = sample_indices[rows] == predictions["sample_indices"]
+            predicted_ids[rows[known], column] = predictions["label_ids"][known]
+        return sample_indices, true_ids, predicted_ids
+
+    def get_accuracies(
+        self, run_ids: List[int], dataset: str = "wili", split: str = "test"
+    ) -> np.ndarray:
+        """Get the accuracy of each run on the samples it predicted."""
+        _, true_ids, predicted_ids = self.get_prediction_matrix(run_ids, dataset, split)
+        predicted = predicted_ids >= 0
+        correct = (predicted_ids == true_ids[:, None]) & predicted
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return correct.sum(axis=0) / predicted.sum(axis=0)
+
+    def get_oracle_accuracy(
+        self, run_ids: List[int], dataset: str = "wili", split: str = "test"
+    ) -> float:
+        """
+        Get the share of samples which at least one of the runs gets right.
+
+        This is an upper bound for any ensemble of the classifiers.
+        """
+        _, true_ids, predicted_ids = self.get_prediction_matrix(run_ids, dataset, split)
+        if len(true_ids) == 0:
+            return 0.0
+        return float((predicted_ids == true_ids[:, None]).any(axis=1).mean())
+
+    def get_disagreements(
+        self, run_ids: List[int], dataset: str = "wili", split: str = "test"
+    ) -> np.ndarray:
+        """Get the indices of the samples for which the runs disagree."""
+        sample_indices, _, predicted_ids = self.get_prediction_matrix(
+            run_ids, dataset, split
+        )
+        complete = (predicted_ids >= 0).all(axis=1)
+        disagree = (predicted_ids != predicted_ids[:, :1]).any(axis=1)
+        return sample_indices[complete & disagree]
+
+
+def _to_columns(cursor: sqlite3.Cursor, n_columns: int) -> Tuple[np.ndarray, ...]:
+    """Read integer rows of a query into one array per column."""
+    values = np.fromiter(itertools.chain.from_iterable(cursor), dtype=np.int64)
+    return tuple(values.reshape(-1, n_columns).T.copy())
+
+
+###############################################################################
+# CLI                                                                         #
+###############################################################################
+@click.group(name="results")
+@click.option(
+    "--store",
+    "store_path",
+    default=None,
+    help="SQLite file (default: results_store_path of the config)",
+)
+@click.option("--dataset", default="wili", show_default=True)
+@click.option("--split", default="test", show_default=True)
+@click.pass_context
+def entry_point(
+    ctx: click.Context, store_path: Optional[str], dataset: str, split: str
+) -> None:
+    """Compare the stored predictions of classifiers."""
+    ctx.obj = {"store": ResultsStore(store_path), "dataset": dataset, "split": split}
+
+
+@entry_point.command(name="accuracy")
+@click.pass_context
+def accuracy_cli(ctx: click.Context) -> None:
+    """Print the accuracy of the latest run of each classifier."""
+    store, dataset, split = ctx.obj["store"], ctx.obj["dataset"], ctx.obj["split"]
+    runs = store.get_runs(dataset, split)
+    run_ids = [run["run_id"] for run in runs]
+    accuracies = store.get_accuracies(run_ids, dataset, split)
+    for run, accuracy in zip(runs, accuracies):
+        print(
+            f"{run['classifier']:<20} {run['config_hash']}  {run['created']}  "
+            f"{accuracy * 100:6.2f}%"
+        )
+    if runs:
+        oracle = store.get_oracle_accuracy(run_ids, dataset, split)
+        print(f"{'oracle':<20} {'':16}  {'':19}  {oracle * 100:6.2f}%")
+
+
+@entry_point.command(name="diff")
+@click.argument("classifier_a")
+@click.argument("classifier_b")
+@click.option("--hash_a", default=None, help="Config hash of the first run")
+@click.option("--hash_b", default=None, help="Config hash of the second run")
+@click.pass_context
+def diff_cli(
+    ctx: click.Context,
+    classifier_a: str,
+    classifier_b: str,
+    hash_a: Optional[str],
+    hash_b: Optional[str],
+) -> None:
+    """
+    Print the samples for which two runs predict different labels.
+
+    Use the same classifier with two config hashes to see what changed
+    between two versions.
+    """
+    store, dataset, split = ctx.obj["store"], ctx.obj["dataset"], ctx.obj["split"]
+    run_ids = []
+    for classifier, config_hash in [(classifier_a, hash_a), (classifier_b, hash_b)]:
+        run_id = store.find_run(classifier, config_hash, dataset, split)
+        if run_id is None:
+            raise click.ClickException(f"No run of {classifier} ({config_hash})")
+        run_ids.append(run_id)
+    sample_indices, true_ids, predicted_ids = store.get_prediction_matrix(
+        run_ids, dataset, split
+    )
+    table = label_table.get_label_table()
+    disagreements = np.isin(
+        sample_indices, store.get_disagreements(run_ids, dataset, split)
+    )
+    for index, true_id, (id_a, id_b) in zip(
+        sample_indices[disagreements],
+        true_ids[disagreements],
+        predicted_ids[disagreements],
+    ):
+        print(
+            f"{index}: true {table.labels[true_id]}, "
+            f"{table.labels[id_a]} vs {table.labels[id_b]}"
+        )
+    print(f"{disagreements.sum()} of {len(sample_indices)} samples differ")
@@ -2,43 +2,250 @@
 
 # Core Library modules
 import logging
-from typing import Any, Dict, List
+import os
+import time
+from typing import List, Optional, Tuple
 
 # Third party modules
 import click
 import numpy as np
 
 # First party modules
-from lidtk.data import wili
+import lidtk.utils
+from lidtk import resources
+from lidtk.data import unicode_data, wili
+from lidtk.data.encoded_batch import EncodedBatch
 
 logger = logging.getLogger(__name__)
 
 
+class UnicodeHistograms:
+    """
+    Share of the characters of each language in Unicode blocks and ranges.
+
+    The share of a range for a language is the mean over the paragraphs of
+    the language of the fraction of characters which are in the range.
+
+    Parameters
+    ----------
+    languages : List[str]
+    n_paragraphs : np.ndarray of shape (n_languages,)
+    code_points : np.ndarray of shape (n_code_points,)
+        Sorted code points which occur in the data
+    code_point_weights : np.ndarray of shape (n_languages, n_code_points)
+        Sum over the paragraphs of a language of the fraction of characters
+        of the paragraph which are the code point
+    """
+
+    def __init__(
+        self,
+        languages: List[str],
+        n_paragraphs: np.ndarray,
+        code_points: np.ndarray,
+        code_point_weights: np.ndarray,
+    ):
+        self.languages = languages
+        self.n_paragraphs = n_paragraphs
+        self.code_points = code_points
+        self.code_point_weights = code_point_weights
+        self.cumulative_weights = np.zeros((len(languages), len(code_points) + 1))
+        np.cumsum(code_point_weights, axis=1, out=self.cumulative_weights[:, 1:])
+        _, _, names = unicode_data.get_blocks()
+        self.block_names = names + [unicode_data.NO_BLOCK]
+        block_weights = np.zeros((len(self.block_names), len(languages)))
+        np.add.at(
+            block_weights,
+            unicode_data.get_block_ids(code_points),
+            code_point_weights.T,
+        )
+        # block_matrix[language_index, block_id]
+        self.block_matrix = block_weights.T / np.maximum(n_paragraphs, 1)[:, None]
+
+    def range_shares(self, start: int, end: int) -> np.ndarray:
+        """
+        Get the share of characters in [start, end] for each language.
+
+        Parameters
+        ----------
+        start : int
+            First code point of the range
+        end : int
+            Last code point of the range
+
+        Returns
+        -------
+        shares : np.ndarray of shape (n_languages,)
+        """
+        i = np.searchsorted(self.code_points, start, side="left")
+        j = np.searchsorted(self.code_points, end, side="right")
+        weights = self.cumulative_weights[:, j] - self.cumulative_weights[:, i]
+        return weights / np.maximum(self.n_paragraphs, 1)
+
+    def block_shares(self, block_name: str) -> np.ndarray:
+        """Get the share of characters in a Unicode block for each language."""
+        return self.block_matrix[:, self.block_names.index(block_name)]
+
+    def save(self, filepath: str) -> None:
+        """Store the histograms as a .npz file."""
+        np.savez_compressed(
+            filepath,
+            languages=np.array(self.languages),
+            n_paragraphs=self.n_paragraphs,
+            code_points=self.code_points,
+            code_point_weights=self.code_point_weights,
+            block_names=np.array(self.block_names),
+            block_matrix=self.block_matrix,
+            fingerprint=np.array(wili.get_fingerprint()),
+        )
+
+    @classmethod
+    def load(cls, filepath: str) -> "UnicodeHistograms":
+        """Load histograms which were stored with `save`."""
+        with np.load(filepath) as data:
+            return cls(
+                data["languages"].tolist(),
+                data["n_paragraphs"],
+                data["code_points"],
+                data["code_point_weights"],
+            )
+
+
+def count_shard(
+    args: Tuple[List[str], np.ndarray, int],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Count the code points of a shard of paragraphs.
+
+    Parameters
+    ----------
+    args : Tuple[List[str], np.ndarray, int]
+        The paragraphs, the language index of each paragraph and the number
+        of languages
+
+    Returns
+    -------
+    code_points, code_point_weights, n_paragraphs :
+        Tuple[np.ndarray, np.ndarray, np.ndarray]
+        See UnicodeHistograms
+    """
+    texts, label_ids, n_languages = args
+    batch = EncodedBatch.from_texts(texts)
+    lengths = batch.lengths
+    char_labels = label_ids[batch.row_ids]
+    char_weights = (1.0 / np.maximum(lengths, 1))[batch.row_ids]
+    code_points, inverse = np.unique(batch.code_points, return_inverse=True)
+    weights = np.bincount(
+        char_labels * len(code_points) + inverse.reshape(-1),
+        weights=char_weights,
+        minlength=n_languages * len(code_points),
+    ).reshape(n_languages, len(code_points))
+    n_paragraphs = np.bincount(label_ids[lengths > 0], minlength=n_languages)
+    return code_points, weights, n_paragraphs
+
+
+def compute_histograms(
+    xs: List[str],
+    ys: List[str],
+    n_jobs: Optional[int] = None,
+    shard_size: int = 5000,
+) -> UnicodeHistograms:
+    """
+    Count the Unicode code points of each language in parallel.
+
+    Parameters
+    ----------
+    xs : List[str]
+    ys : List[str]
+    n_jobs : int, optional (default: number of CPUs)
+    shard_size : int, optional (default: 5000)
+        Number of paragraphs per worker task
+
+    Returns
+    -------
+    histograms : UnicodeHistograms
+    """
+    languages = sorted(set(ys))
+    lang2index = {lang: index for index, lang in enumerate(languages)}
+    label_ids = np.array([lang2index[y] for y in ys], dtype=np.int64)
+    shards = [
+        (
+            xs[start : start + shard_size],
+            label_ids[start : start + shard_size],
+            len(languages),
+        )
+        for start in range(0, len(xs), shard_size)
+    ]
+    with resources.get_pool(n_jobs) as pool:
+        counted = pool.map(count_shard, shards)
+    code_points = np.unique(np.concatenate([el[0] for el in counted]))
+    code_point_weights = np.zeros((len(languages), len(code_points)))
+    n_paragraphs = np.zeros(len(languages), dtype=np.int64)
+    for shard_code_points, shard_weights, shard_n_paragraphs in counted:
+        columns = np.searchsorted(code_points, shard_code_points)
+        code_point_weights[:, columns] += shard_weights
+        n_paragraphs += shard_n_paragraphs
+    return UnicodeHistograms(languages, n_paragraphs, code_points, code_point_weights)
+
+
+def get_histograms(
+    n_jobs: Optional[int] = None, rebuild: bool = False
+) -> UnicodeHistograms:
+    """
+    Get the histograms of the WiLI training data.
+
+    They are computed once and then loaded from `unicode_histograms_path`
+    until the dataset changes.
+
+    Parameters
+    ----------
+    n_jobs : int, optional (default: number of CPUs)
+    rebuild : bool, optional (default: False)
+        Count again even if the histograms are cached
+
+    Returns
+    -------
+    histograms : UnicodeHistograms
+    """
+    cfg = lidtk.utils.load_cfg()
+    filepath = cfg["unicode_histograms_path"]
+    if not rebuild and os.path.isfile(filepath):
+        with np.load(filepath) as data:
+            is_current = str(data["fingerprint"]) == wili.get_fingerprint()
+        if is_current:
+            return UnicodeHistograms.load(filepath)
+        logger.info(f"The dataset changed since {filepath} was created")
+    data = wili.load_data()
+    logger.info("Finished loading data")
+    t0 = time.time()
+    histograms = compute_histograms(data["x_train"], data["y_train"], n_jobs=n_jobs)
+    logger.info(f"Counted code points in {time.time() - t0:0.2f}s")
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    histograms.save(filepath)
+    logger.info(f"Stored histograms at {filepath}")
+    return histograms
+
+
 @click.command(name="analyze-unicode-block", help=__doc__)
 @click.option("--start", default=123, show_default=True)
 @click.option("--end", default=456, show_default=True, help="End of Unicode range")
-def main(start: int, end: int) -> None:
+@click.option("--block", help="Name of a Unicode block. Overrides start / end.")
+@click.option("--n_jobs", type=int, help="Number of processes for counting")
+@click.option("--rebuild", is_flag=True, help="Count even if a cache exists")
+def main(
+    start: int, end: int, block: Optional[str], n_jobs: Optional[int], rebuild: bool
+) -> None:
     """Run."""
-    # Read data
-    data = wili.load_data()
-    logger.info("Finished loading data")
-
-    lang_amounts = {}  # type: Dict[str, List[Any]]
-    for paragraph, label in zip(data["x_train"], data["y_train"]):
-        if label not in lang_amounts:
-            lang_amounts[label] = []
-        chars_in_range = 0
-        for char in paragraph:
-            if start <= ord(char) <= end:
-                chars_in_range += 1
-        amount = float(chars_in_range) / len(paragraph)
-        lang_amounts[label].append(amount)
+    histograms = get_histograms(n_jobs=n_jobs, rebuild=rebuild)
 
-    for key in lang_amounts.keys():
-        lang_amounts[key] = np.array(lang_amounts[key]).mean() * 100
+    t0 = time.time()
+    if block is not None:
+        starts, ends, names = unicode_data.get_blocks()
+        start, end = int(starts[names.index(block)]), int(ends[names.index(block)])
+    shares = histograms.range_shares(start, end) * 100
+    logger.info(f"Answered query in {(time.time() - t0) * 1000:0.2f}ms")
 
     print(f"Label    Chars in range [{start} - {end}]")
     print("-" * 80)
-    lang_a = sorted(lang_amounts.items(), key=lambda n: n[1], reverse=True)
+    lang_a = sorted(zip(histograms.languages, shares), key=lambda n: n[1], reverse=True)
     for i, (label, chars_in_range_t) in enumerate(lang_a, start=1):
         print(f"{i:>3}. {label:<10}  {chars_in_range_t:>5.2f}%")
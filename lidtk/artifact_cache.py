@@ -0,0 +1,372 @@
+"""
+A content-addressed cache for training artifacts.
+
+Vectorizers, feature matrices, count tables and models are stored under a
+key which is the hash of the parameters which produced them, the WiLI
+fingerprint (see lidtk.data.wili.get_fingerprint) and the lidtk version.
+Changing any of them gives a new entry instead of reusing a stale one.
+
+Each entry is a directory `<cache>/<kind>/<key>` with the artifact and a
+meta.json. Entries are never modified after they were stored, so several
+processes can share the cache: the time of the last access is the
+modification time of the artifact file. When the cache grows beyond its
+size limit, the least recently used entries are removed.
+"""
+
+# Core Library modules
+import datetime
+import json
+import logging
+import os
+import pickle
+import shutil
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Third party modules
+import click
+import numpy as np
+
+# First party modules
+import lidtk
+import lidtk.utils
+from lidtk.data import wili
+
+logger = logging.getLogger(__name__)
+
+formats = {"pickle": "data.pickle", "npy": "data.npy"}
+
+
+class ArtifactCache:
+    """
+    Store artifacts by the hash of what produced them.
+
+    Parameters
+    ----------
+    root : str, optional (default: artifact_cache_path of the config)
+    max_bytes : int, optional (default: artifact_cache_max_bytes of the config)
+        Entries are evicted after a store until the cache is below this size
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None):
+        cfg = lidtk.utils.load_cfg()
+        if root is None:
+            root = cfg["artifact_cache_path"]
+        if max_bytes is None:
+            max_bytes = cfg["artifact_cache_max_bytes"]
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.max_bytes = max_bytes
+
+    def get_key(
+        self, kind: str, params: Dict[str, Any], use_dataset: bool = True
+    ) -> str:
+        """
+        Get the key of an artifact.
+
+        Parameters
+        ----------
+        kind : str
+            What the artifact is, e.g. 'tfidf_vectorizer'
+        params : Dict[str, Any]
+            JSON-serializable parameters which determine the artifact
+        use_dataset : bool, optional (default: True)
+            The artifact depends on the WiLI files
+
+        Returns
+        -------
+        key : str
+        """
+        fingerprint = wili.get_fingerprint() if use_dataset else None
+        return lidtk.utils.get_config_hash(
+            {
+                "kind": kind,
+                "params": params,
+                "dataset": fingerprint,
+                "version": lidtk.__version__,
+            }
+        )
+
+    def get_or_create(
+        self,
+        kind: str,
+        params: Dict[str, Any],
+        create: Callable[[], Any],
+        fmt: str = "pickle",
+        use_dataset: bool = True,
+        rebuild: bool = False,
+    ) -> Any:
+        """
+        Load an artifact or create and store it.
+
+        Parameters
+        ----------
+        kind : str
+        params : Dict[str, Any]
+            See get_key
+        create : Callable[[], Any]
+            Creates the artifact if it is not cached
+        fmt : str, optional (default: pickle)
+            'pickle' for any object, 'npy' for a numpy array
+        use_dataset : bool, optional (default: True)
+        rebuild : bool, optional (default: False)
+            Create the artifact even if it is cached
+
+        Returns
+        -------
+        artifact : Any
+        """
+        key = self.get_key(kind, params, use_dataset)
+        if not rebuild:
+            artifact = self.load(kind, key)
+            if artifact is not None:
+                logger.info(f"Loaded {kind} {key} from the artifact cache")
+                return artifact
+        t0 = time.time()
+        artifact = create()
+        self.store(kind, key, artifact, fmt, params, time.time() - t0)
+        return artifact
+
+    def load(self, kind: str, key: str) -> Optional[Any]:
+        """
+        Load an artifact and mark it as recently used.
+
+        Returns
+        -------
+        artifact : Optional[Any]
+            None if it is not cached, or if the entry is removed or replaced
+            by another process while it is read
+        """
+        entry_dir = os.path.join(self.root, kind, key)
+        meta_path = os.path.join(entry_dir, "meta.json")
+        if not os.path.isfile(meta_path):
+            return None
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            filepath = os.path.join(entry_dir, formats[meta["format"]])
+            if meta["format"] == "npy":
+                artifact = np.load(filepath)
+            else:
+                with open(filepath, "rb") as handle:
+                    artifact = pickle.load(handle)
+            os.utime(filepath)
+        except (OSError, ValueError, KeyError, EOFError, pickle.UnpicklingError) as e:
+            logger.warning(f"Could not load {kind} {key} from the cache: {e}")
+            return None
+        return artifact
+
+    def store(
+        self,
+        kind: str,
+        key: str,
+        artifact: Any,
+        fmt: str = "pickle",
+        params: Optional[Dict[str, Any]] = None,
+        seconds: Optional[float] = None,
+    ) -> None:
+        """
+        Store an artifact, then evict entries if the cache is too big.
+
+        The entry is written to a temporary directory first and then
+        renamed, so readers never see a partial entry. If another process
+        stores the same key at the same time, one of the (equal) entries
+        is kept.
+
+        Parameters
+        ----------
+        kind : str
+        key : str
+        artifact : Any
+        fmt : str, optional (default: pickle)
+        params : Dict[str, Any], optional (default: None)
+            Stored in meta.json for `lidtk cache list`
+        seconds : float, optional (default: None)
+            How long it took to create the artifact
+        """
+        if fmt not in formats:
+            raise ValueError(f"Unknown format '{fmt}'. Use one of {sorted(formats)}")
+        entry_dir = os.path.join(self.root, kind, key)
+        tmp_dir = f"{entry_dir}.tmp-{os.getpid()}"
+        os.makedirs(tmp_dir, exist_ok=True)
+        filepath = os.path.join(tmp_dir, formats[fmt])
+        if fmt == "npy":
+            np.save(filepath, artifact)
+        else:
+            with open(filepath, "wb") as handle:
+                pickle.dump(artifact, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        meta = {
+            "kind": kind,
+            "key": key,
+            "format": fmt,
+            "params": params,
+            "seconds": seconds,
+            "size": os.path.getsize(filepath),
+            "created": now,
+            "last_access": now,
+        }
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=4)
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # The entry exists: move it aside, as a directory cannot be
+            # replaced by rename while it is not empty
+            old_dir = f"{entry_dir}.tmp-old-{os.getpid()}"
+            try:
+                os.rename(entry_dir, old_dir)
+            except OSError:
+                pass  # another process moved it already
+            try:
+                os.rename(tmp_dir, entry_dir)
+            except OSError:
+                # Another process stored the same key in between
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            shutil.rmtree(old_dir, ignore_errors=True)
+        logger.info(f"Stored {kind} {key} ({meta['size']} bytes) in the artifact cache")
+        self.prune()
+
+    def get_entries(self) -> List[Dict[str, Any]]:
+        """
+        Get the meta data of all entries.
+
+        Returns
+        -------
+        entries : List[Dict[str, Any]]
+            Sorted from least to most recently used; entries which are
+            removed while they are read are skipped
+        """
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for kind in sorted(os.listdir(self.root)):
+            kind_dir = os.path.join(self.root, kind)
+            if not os.path.isdir(kind_dir):
+                continue
+            for key in os.listdir(kind_dir):
+                meta_path = os.path.join(kind_dir, key, "meta.json")
+                if ".tmp-" in key or not os.path.isfile(meta_path):
+                    continue
+                try:
+                    with open(meta_path) as f:
+                        entry = json.load(f)
+                    entry["last_access"] = os.path.getmtime(
+                        os.path.join(kind_dir, key, formats[entry["format"]])
+                    )
+                except (OSError, ValueError, KeyError):
+                    continue
+                entries.append(entry)
+        return sorted(entries, key=lambda entry: entry["last_access"])
+
+    def remove(self, kind: str, key: str) -> None:
+        """Remove an entry."""
+        shutil.rmtree(os.path.join(self.root, kind, key), ignore_errors=True)
+
+    def prune(
+        self, max_bytes: Optional[int] = None, kind: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Remove least recently used entries until the cache fits into max_bytes.
+
+        Parameters
+        ----------
+        max_bytes : int, optional (default: self.max_bytes)
+        kind : str, optional (default: all kinds)
+            Only remove entries of this kind; max_bytes still refers to the
+            whole cache
+
+        Returns
+        -------
+        removed : List[Dict[str, Any]]
+            The meta data of the removed entries
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries = self.get_entries()
+        total = sum(entry["size"] for entry in entries)
+        removed = []
+        for entry in entries:
+            if total <= max_bytes:
+                break
+            if kind is not None and entry["kind"] != kind:
+                continue
+            self.remove(entry["kind"], entry["key"])
+            total -= entry["size"]
+            removed.append(entry)
+        return removed
+
+
+def format_bytes(n_bytes: float) -> str:
+    """
+    Format a size for humans.
+
+    Examples
+    --------
+    >>> format_bytes(123)
+    '123 B'
+    >>> format_bytes(3 * 1024 ** 2)
+    '3.0 MiB'
+    """
+    if n_bytes < 1024:
+        return f"{n_bytes} B"
+    for unit in ["KiB", "MiB", "GiB"]:
+        n_bytes /= 1024
+        if n_bytes < 1024 or unit == "GiB":
+            break
+    return f"{n_bytes:0.1f} {unit}"
+
+
+###############################################################################
+# CLI                                                                         #
+###############################################################################
+@click.group(name="cache")
+@click.option(
+    "--root", default=None, help="Cache directory (default: artifact_cache_path)"
+)
+@click.pass_context
+def entry_point(ctx: click.Context, root: Optional[str]) -> None:
+    """Inspect or prune the artifact cache."""
+    ctx.obj = {"cache": ArtifactCache(root)}
+
+
+@entry_point.command(name="list")
+@click.option("--kind", default=None, help="Only list entries of this kind")
+@click.pass_context
+def list_cli(ctx: click.Context, kind: Optional[str]) -> None:
+    """List the entries from least to most recently used."""
+    cache = ctx.obj["cache"]
+    entries = [entry for entry in cache.get_entries() if kind in [None, entry["kind"]]]
+    for entry in entries:
+        last_access = datetime.datetime.fromtimestamp(entry["last_access"])
+        print(
+            f"{entry['kind']:<24} {entry['key']}  {last_access:%Y-%m-%d %H:%M}  "
+            f"{format_bytes(entry['size']):>10}  {json.dumps(entry['params'])}"
+        )
+    total = sum(entry["size"] for entry in entries)
+    print(
+        f"{len(entries)} entries, {format_bytes(total)} "
+        f"(limit: {format_bytes(cache.max_bytes)})"
+    )
+
+
+@entry_point.command(name="prune")
+@click.option(
+    "--max_mb",
+    type=float,
+    default=None,
+    help="Target size in MiB (default: artifact_cache_max_bytes)",
+)
+@click.option("--kind", default=None, help="Only remove entries of this kind")
+@click.option("--all", "remove_all", is_flag=True, help="Remove every entry")
+@click.pass_context
+def prune_cli(
+    ctx: click.Context, max_mb: Optional[float], kind: Optional[str], remove_all: bool
+) -> None:
+    """Remove least recently used entries."""
+    max_bytes = None if max_mb is None else int(max_mb * 1024**2)
+    if remove_all:
+        max_bytes = 0
+    removed = ctx.obj["cache"].prune(max_bytes, kind)
+    for entry in removed:
+        print(f"Removed {entry['kind']} {entry['key']}")
+    print(f"Freed {format_bytes(sum(entry['size'] for entry in removed))}")
@@ -2,12 +2,14 @@
 
 # Core Library modules
 import datetime
+import importlib
 import json
 import logging
+import multiprocessing
 import os
 import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 # Third party modules
 import click
@@ -15,11 +17,35 @@ import numpy as np
 import progressbar
 
 # First party modules
+import lidtk.pipeline
 import lidtk.utils
-from lidtk.data import wili
+from lidtk import resources
+from lidtk.analysis import evaluation, results_store
+from lidtk.data import label_table, wili
 
 logger = logging.getLogger(__name__)
 
+# Maps the name of a classifier (as in its YAML config) to its module
+classifier_modules = {
+    "cascade": "lidtk.classifiers.cascade",
+    "char-distrib": "lidtk.classifiers.char_distribution.char_dist_metric_train_test",
+    "cld2": "lidtk.classifiers.cld2_mod",
+    "detectlanguage": "lidtk.classifiers.detectlanguage_mod",
+    "google-cloud": "lidtk.classifiers.google_mod",
+    "langdetect": "lidtk.classifiers.langdetect_mod",
+    "langid": "lidtk.classifiers.langid_mod",
+    "script-router": "lidtk.classifiers.script_router",
+    "textcat": "lidtk.classifiers.text_cat",
+    "tfidf_nn": "lidtk.classifiers.tfidf_nn",
+}
+
+
+# Settings for predicting many texts until `lidtk tune` found better ones
+default_profile = {"batch_size": 1000, "n_jobs": 1, "blas_threads": None}
+
+# Settings of predict_incremental; classifiers configure them in `early_exit`
+default_early_exit = {"window_size": 200, "min_margin": float("inf"), "max_chars": 5000}
+
 
 class LIDClassifier(ABC):
     """
@@ -27,13 +53,23 @@ class LIDClassifier(ABC):
 
     Parameters
     ----------
-    cfg : dict
+    cfg_path : str
+    languages : List[str], optional (default: cfg["languages"] or all)
+        ISO 369-3 codes of the only languages which may be predicted.
+        Classifiers which can, skip all other languages entirely; all other
+        predictions become UNK.
     """
 
-    def __init__(self, cfg_path: str):
+    def __init__(self, cfg_path: str, languages: Optional[List[str]] = None):
         """Constructor."""
         cfg_path = os.path.abspath(cfg_path)
         self.cfg = lidtk.utils.load_cfg(cfg_path)
+        if languages is None:
+            languages = self.cfg.get("languages")
+        self.languages = None if languages is None else sorted(languages)
+        self._code2index = None  # type: Optional[Dict[str, int]]
+        self._code_label_ids = None  # type: Optional[np.ndarray]
+        self._profile: Optional[Dict[str, Any]] = None
 
     def map2wili(self, services_code: str) -> str:
         """
@@ -46,8 +82,67 @@ class LIDClassifier(ABC):
         Returns
         -------
         iso_369_3 : str
+            UNK if the code is unknown or not one of `self.languages`
+        """
+        return self.restrict_language(self.cfg["mapping"].get(services_code, "UNK"))
+
+    @property
+    def code2index(self) -> Dict[str, int]:
+        """Get the index of each code of the classifier's mapping."""
+        if self._code2index is None:
+            self._code2index = {
+                code: index for index, code in enumerate(self.cfg["mapping"])
+            }
+        return self._code2index
+
+    @property
+    def code_label_ids(self) -> np.ndarray:
+        """
+        Get the label id of each code in `code2index`, see map2wili.
+
+        The last entry is UNK, so index -1 can be used for unknown codes.
+        """
+        if self._code_label_ids is None:
+            codes = list(self.code2index)
+            self._code_label_ids = label_table.get_label_table().compile_mapping(
+                codes, {code: self.map2wili(code) for code in codes}
+            )
+        return self._code_label_ids
+
+    def map2wili_ids(self, services_codes: List[str]) -> np.ndarray:
+        """
+        Map many codes of the classifier to label ids.
+
+        Parameters
+        ----------
+        services_codes : List[str]
+
+        Returns
+        -------
+        ids : np.ndarray of dtype int16
+            See lidtk.data.label_table
         """
-        return self.cfg["mapping"].get(services_code, "UNK")
+        indices = np.array(
+            [self.code2index.get(code, -1) for code in services_codes], dtype=np.int64
+        )
+        return self.code_label_ids[indices]
+
+    def restrict_language(self, language: str) -> str:
+        """
+        Map languages which are not in `self.languages` to UNK.
+
+        Parameters
+        ----------
+        language : str
+            ISO 369-3 code
+
+        Returns
+        -------
+        language : str
+        """
+        if self.languages is not None and language not in self.languages:
+            return "UNK"
+        return language
 
     @abstractmethod
     def predict(self, text: str) -> str:
@@ -64,6 +159,134 @@ class LIDClassifier(ABC):
             ISO 369-3 code
         """
 
+    def predict_with_confidence(self, text: str) -> Tuple[str, float]:
+        """
+        Predict the language of the given text and how sure the classifier is.
+
+        Classifiers without a notion of confidence are always sure.
+
+        Parameters
+        ----------
+        text : str
+
+        Returns
+        -------
+        language, confidence : Tuple[str, float]
+            ISO 369-3 code and a score where higher means more confident.
+            The scale depends on the classifier.
+        """
+        return self.predict(text), float("inf")
+
+    def predict_bulk_with_confidence(
+        self, texts: List[str]
+    ) -> Tuple[List[str], np.ndarray]:
+        """
+        Predict the language of a list of texts and the confidence of each.
+
+        Parameters
+        ----------
+        texts : List[str]
+
+        Returns
+        -------
+        languages, confidences : Tuple[List[str], np.ndarray]
+        """
+        languages = []
+        confidences = np.zeros(len(texts), dtype=np.float64)
+        for i, text in enumerate(texts):
+            language, confidences[i] = self.predict_with_confidence(text)
+            languages.append(language)
+        return languages, confidences
+
+    def iter_prefix_predictions(
+        self, text: str, window_size: int, max_chars: Optional[int] = None
+    ) -> Iterator[Tuple[str, float, int]]:
+        """
+        Predict the language of ever longer prefixes of a text.
+
+        Classifiers with features which can be updated with the next window
+        override this. By default each prefix is predicted from scratch.
+
+        Parameters
+        ----------
+        text : str
+        window_size : int
+            Characters which are added to the prefix in each step
+        max_chars : int, optional (default: the whole text)
+
+        Yields
+        ------
+        language, confidence, n_read : Tuple[str, float, int]
+            The prediction for the first n_read characters and its
+            confidence as in predict_with_confidence
+        """
+        n_chars = len(text) if max_chars is None else min(len(text), max_chars)
+        for end in get_prefix_ends(n_chars, window_size):
+            language, confidence = self.predict_with_confidence(text[:end])
+            yield language, confidence, end
+
+    def predict_incremental(
+        self,
+        text: str,
+        window_size: Optional[int] = None,
+        min_margin: Optional[float] = None,
+        max_chars: Optional[int] = None,
+    ) -> Tuple[str, int]:
+        """
+        Predict the language of a text from as few characters as needed.
+
+        The text is read in windows until the confidence of the prediction
+        reaches min_margin or max_chars characters were read. The defaults
+        come from `early_exit` of the config, see default_early_exit.
+
+        Parameters
+        ----------
+        text : str
+        window_size : int, optional
+        min_margin : float, optional
+            On the scale of predict_with_confidence
+        max_chars : int, optional
+
+        Returns
+        -------
+        language, n_read : Tuple[str, int]
+        """
+        settings = dict(default_early_exit, **self.cfg.get("early_exit", {}))
+        if window_size is None:
+            window_size = settings["window_size"]
+        if min_margin is None:
+            min_margin = settings["min_margin"]
+        if max_chars is None:
+            max_chars = settings["max_chars"]
+        for language, confidence, n_read in self.iter_prefix_predictions(
+            text, window_size, max_chars
+        ):
+            if confidence >= min_margin:
+                break
+        return language, n_read
+
+    def predict_restricted(self, text: str, languages: List[str]) -> str:
+        """
+        Predict the language of the given text among the given languages.
+
+        Classifiers which score every language override this to only
+        consider `languages`. Otherwise predictions outside of `languages`
+        become UNK.
+
+        Parameters
+        ----------
+        text : str
+        languages : List[str]
+            ISO 369-3 codes
+
+        Returns
+        -------
+        language : str
+            ISO 369-3 code out of languages or UNK
+        """
+        predicted = self.predict(text)
+        return predicted if predicted in languages else "UNK"
+
     def predict_bulk(self, texts: List[str]) -> List[str]:
         """
         Predict the language of a list of texts.
@@ -79,35 +302,262 @@ class LIDClassifier(ABC):
         """
         return [self.predict(text) for text in texts]
 
-    def get_languages(self) -> List[str]:
+    def predict_bulk_ids(self, texts: List[str]) -> np.ndarray:
+        """
+        Predict the language of a list of texts as label ids.
+
+        Parameters
+        ----------
+        texts : List[str]
+
+        Returns
+        -------
+        ids : np.ndarray of dtype int16
+            See lidtk.data.label_table
+        """
+        return label_table.get_label_table().encode(self.predict_bulk(texts))
+
+    def extract_features(self, texts: List[str]) -> Any:
+        """
+        Get the input of predict_features for a batch of texts.
+
+        Classifiers with a separate feature extraction override both, so
+        pipelined evaluation can extract the features of the next batch
+        while the model predicts the current one.
+
+        Parameters
+        ----------
+        texts : List[str]
+
+        Returns
+        -------
+        features : Any
+            By default the texts
+        """
+        return texts
+
+    def predict_features(self, features: Any) -> List[str]:
+        """
+        Predict the languages of the output of extract_features.
+
+        Parameters
+        ----------
+        features : Any
+
+        Returns
+        -------
+        languages : List[str]
+        """
+        return self.predict_bulk(features)
+
+    def get_prediction_stages(self) -> List[Tuple[str, Callable[[Any], Any]]]:
+        """
+        Get the stages of a lidtk.pipeline.Pipeline which predicts batches.
+
+        The pipeline takes lists of texts and yields the predicted languages
+        of each batch with the seconds the model needed. If a batch fails,
+        its texts are predicted one by one; texts which raise get
+        'UNK-exception'.
+
+        Returns
+        -------
+        stages : List[Tuple[str, Callable[[Any], Any]]]
+        """
+
+        def extract(texts: List[str]) -> Tuple[List[str], Any]:
+            try:
+                return texts, self.extract_features(texts)
+            except Exception as e:
+                logger.error({"message": "Exception in extract_features", "error": e})
+                return texts, None
+
+        def infer(batch: Tuple[List[str], Any]) -> Tuple[List[str], float]:
+            texts, features = batch
+            t0 = time.time()
+            if features is not None:
+                try:
+                    return self.predict_features(features), time.time() - t0
+                except Exception as e:
+                    logger.error({"message": "Exception in eval_wili", "error": e})
+            predicted = []
+            for text in texts:
+                try:
+                    predicted.append(self.predict(text))
+                except Exception as e:
+                    logger.error({"message": "Exception in eval_wili", "error": e})
+                    predicted.append("UNK-exception")
+            return predicted, time.time() - t0
+
+        return [("features", extract), ("inference", infer)]
+
+    def get_languages(
+        self,
+        mode: str = "all",
+        batch_size: Optional[int] = None,
+        n_jobs: Optional[int] = None,
+        patience: int = 10,
+        use_cache: bool = True,
+    ) -> List[str]:
         """
         Find which languages are predicted for the WiLI dataset.
 
+        If the results store has a complete WiLI test run of this classifier
+        with the same configuration hash, those predictions are used instead
+        of predicting x_test again. The label set is cached in
+        `label_sets_path` until the configuration or the dataset changes.
+
+        Parameters
+        ----------
+        mode : str, optional (default: all)
+            'all' predicts every paragraph of train and test. 'sample'
+            predicts batches in which the true languages take turns (see
+            wili.stratified_order) and stops once `patience` batches in a row
+            added no new language.
+        batch_size : int, optional (default: see self.profile)
+        n_jobs : int, optional (default: see self.profile)
+            Number of processes which predict batches
+        patience : int, optional (default: 10)
+        use_cache : bool, optional (default: True)
+
         Returns
         -------
         languages : List[str]
             Each str is a ISO 369-3 code
         """
-        languages = set()
-        # Read data
+        if mode not in ["all", "sample"]:
+            raise ValueError(f"Unknown mode '{mode}'. Use 'all' or 'sample'.")
+        if batch_size is None:
+            batch_size = self.profile["batch_size"]
+        if n_jobs is None:
+            n_jobs = self.profile["n_jobs"]
+        cache_filepath = lidtk.utils.load_cfg()["label_sets_path"].format(
+            f"{self.cfg['name']}_{self.get_config_hash()}"
+        )
+        fingerprint = wili.get_fingerprint()
+        cached_mode = None
+        if os.path.isfile(cache_filepath):
+            with open(cache_filepath) as f:
+                cached = json.load(f)
+            if cached["fingerprint"] == fingerprint:
+                cached_mode = cached["mode"]
+            # An exhaustive label set is also valid for sampling
+            if use_cache and cached_mode in ["all", mode]:
+                return cached["languages"]
+
         data = wili.load_data()
         logger.info("Finished loading data")
-        for set_name in ["test", "train"]:
-            x_set_name = f"x_{set_name}"
-            bar = progressbar.ProgressBar(
-                redirect_stdout=True, max_value=len(data[x_set_name])
+        xs = data["x_train"] + data["x_val"] + data["x_test"]
+        indices = np.arange(len(xs))
+        languages = set()
+        stored_languages = self._get_stored_languages(len(data["x_test"]))
+        if stored_languages is not None:
+            languages.update(stored_languages)
+            indices = indices[: len(xs) - len(data["x_test"])]
+            logger.info("Took the predictions of x_test from the results store")
+        if mode == "sample":
+            ys = data["y_train"] + data["y_val"] + data["y_test"]
+            indices = indices[wili.stratified_order([ys[i] for i in indices])]
+        text_batches = (
+            [xs[i] for i in indices[start : start + batch_size]]
+            for start in range(0, len(indices), batch_size)
+        )
+
+        pool = None
+        if n_jobs > 1:
+            pool = resources.get_pool(n_jobs, _init_worker, (self,))
+            predicted_batches = pool.imap(_predict_labels_worker, text_batches)
+        else:
+            predicted_batches = map(self.predict_labels, text_batches)
+        n_predicted = 0
+        n_unchanged = 0
+        bar = progressbar.ProgressBar(redirect_stdout=True, max_value=len(indices))
+        try:
+            for predicted in predicted_batches:
+                n_languages = len(languages)
+                languages.update(predicted)
+                n_predicted += len(predicted)
+                bar.update(n_predicted)
+                n_unchanged = 0 if len(languages) > n_languages else n_unchanged + 1
+                if mode == "sample" and n_unchanged >= patience:
+                    break
+        finally:
+            if pool is not None:
+                pool.terminate()
+        bar.finish()
+        logger.info(f"Predicted {n_predicted} of {len(indices)} paragraphs")
+
+        if mode == "sample" and cached_mode == "all":
+            return sorted(languages)
+        os.makedirs(os.path.dirname(cache_filepath), exist_ok=True)
+        with open(cache_filepath, "w") as f:
+            json.dump(
+                {
+                    "classifier": self.cfg["name"],
+                    "config_hash": self.get_config_hash(),
+                    "fingerprint": fingerprint,
+                    "mode": mode,
+                    "n_predicted": n_predicted,
+                    "languages": sorted(languages),
+                },
+                f,
+                indent=4,
             )
-            for i, el in enumerate(data[x_set_name]):
-                try:
-                    predicted = self.predict(el)
-                except Exception as e:
-                    predicted = "UNK"
-                    logger.error({"message": "Exception in get_languages", "error": e})
-                languages.add(predicted)
-                bar.update(i + 1)
-            bar.finish()
         return sorted(languages)
 
+    def predict_labels(self, texts: List[str]) -> List[str]:
+        """
+        Predict the language of texts; texts which raise get UNK.
+
+        Parameters
+        ----------
+        texts : List[str]
+
+        Returns
+        -------
+        languages : List[str]
+        """
+        try:
+            return self.predict_bulk(texts)
+        except Exception as e:
+            logger.error({"message": "Exception in predict_bulk", "error": e})
+        languages = []
+        for text in texts:
+            try:
+                languages.append(self.predict(text))
+            except Exception as e:
+                languages.append("UNK")
+                logger.error({"message": "Exception in get_languages", "error": e})
+        return languages
+
+    def _get_stored_languages(self, n_test: int) -> Optional[List[str]]:
+        """
+        Get the languages of a complete WiLI test run in the results store.
+
+        Labels which are not in the WiLI label table were stored as UNK.
+
+        Parameters
+        ----------
+        n_test : int
+            Number of samples in x_test
+
+        Returns
+        -------
+        languages : Optional[List[str]]
+            None if there is no run of the current configuration
+        """
+        store_path = lidtk.utils.load_cfg().get("results_store_path")
+        if store_path is None or not os.path.isfile(os.path.expanduser(store_path)):
+            return None
+        with results_store.ResultsStore(store_path) as store:
+            run_id = store.find_run(self.cfg["name"], self.get_config_hash())
+            if run_id is None:
+                return None
+            predictions = store.get_predictions(run_id)
+        if len(predictions["sample_indices"]) != n_test:
+            return None
+        table = label_table.get_label_table()
+        return table.decode(np.unique(predictions["label_ids"])).tolist()
+
     def get_mapping_languages(self) -> List[str]:
         """
         Get the languages supported by th classifier and supported by WiLI.
@@ -117,66 +567,190 @@ class LIDClassifier(ABC):
         languages : List[str]
             Each str is a ISO 369-3 code
         """
-        return sorted(lang for _, lang in self.cfg["mapping"].items())
+        return sorted(
+            lang
+            for _, lang in self.cfg["mapping"].items()
+            if self.languages is None or lang in self.languages
+        )
 
     def eval_wili(
-        self, result_file: str, languages: List[str] = None, eval_unk: bool = False
+        self,
+        result_file: str,
+        languages: List[str] = None,
+        eval_unk: bool = False,
+        resume: bool = False,
+        checkpoint_every: int = 1000,
+        pipelined: bool = False,
+        batch_size: Optional[int] = None,
+        queue_size: int = 4,
     ) -> None:
         """
         Evaluate the classifier on WiLI.
 
+        Predictions are streamed to the result file and misclassified
+        samples to `<result_file>.errors.csv` (as indices into x_test, see
+        lidtk.analysis.manual_error_analysis). The confusion matrix is
+        stored in `<result_file>.confusion.npy`, the summary with
+        precision, recall and F1 of each language in `<result_file>.json`.
+
+        Every `checkpoint_every` samples the state of the run is stored in
+        `<result_file>.checkpoint.npz`, which is removed when the run is
+        complete.
+
+        By default each sample is predicted and written on its own. A
+        pipelined run reads batches, extracts features, predicts and writes
+        in overlapping stages (see get_prediction_stages), and the time per
+        sample is the inference time of its batch divided by its size.
+
         Parameters
         ----------
         result_file : str
-            Path to a file where the results will be stored
+            Path to a file where the results will be stored; .npy files get
+            an int16 array of label ids (see lidtk.data.label_table), all
+            other files a label per line
         languages : List[str], optional (default: All languages)
             Filter languages by this list
         eval_unk : bool, optional (default: False)
+            Also evaluate samples of other languages, which should be
+            predicted as UNK
+        resume : bool, optional (default: False)
+            Continue an interrupted run from its checkpoint
+        checkpoint_every : int, optional (default: 1000)
+        pipelined : bool, optional (default: False)
+        batch_size : int, optional (default: from the profile)
+            Samples per batch of a pipelined run
+        queue_size : int, optional (default: 4)
+            Batches which may wait between two stages of a pipelined run
         """
         # Read data
         data = wili.load_data()
         logger.info("Finished loading data")
-        times = []
-        bar = progressbar.ProgressBar(
-            redirect_stdout=True, max_value=len(data["x_test"])
-        )
+        if languages is None:
+            eval_unk = False
+        samples = []  # type: List[Tuple[int, str]]
+        for i, label_t in enumerate(data["y_test"]):
+            if languages is None or label_t in languages:
+                samples.append((i, label_t))
+            elif eval_unk:
+                samples.append((i, "UNK"))
+        sample_indices = np.array([i for i, _ in samples], dtype=np.int64)
         result_filepath = os.path.abspath(result_file)
+        checkpoint_filepath = result_filepath + ".checkpoint.npz"
+        checkpoint = None  # type: Optional[Dict[str, Any]]
+        if resume and os.path.isfile(checkpoint_filepath):
+            checkpoint = evaluation.load_checkpoint(checkpoint_filepath)
+            if not np.array_equal(checkpoint["sample_indices"], sample_indices):
+                raise ValueError(
+                    f"{checkpoint_filepath} belongs to a run on other samples"
+                )
+            logger.info(f"Resume after {checkpoint['n_done']} of {len(samples)}")
+        elif resume:
+            logger.warning(f"No checkpoint {checkpoint_filepath}; start from scratch")
         logger.info(f"Write results to {result_filepath}")
         results: Dict[str, Any] = {"meta": {}}
-        now = datetime.datetime.now()
-        results["meta"]["experiment_start"] = f"{now:%Y-%m-%d %H:%M:%S}"
-        cl_results = {}  # type: Dict[str, Dict[str, List[Any]]]
-        if languages is None:
-            eval_unk = False
-        with open(result_filepath, "w") as filepointer:
-            for i, (el, label_t) in enumerate(zip(data["x_test"], data["y_test"])):
-                if languages is not None:
-                    if label_t not in languages:
-                        if eval_unk:
-                            print("UNK")
-                        else:
-                            continue
-                    else:
-                        print(label_t)
-                try:
-                    t0 = time.time()
-                    predicted = self.predict(el)
-                    t1 = time.time()
-                    times.append(t1 - t0)
-                    bar.update(i + 1)
-                    if label_t != predicted:
-                        if label_t not in cl_results:
-                            cl_results[label_t] = {}
-                        if predicted not in cl_results[label_t]:
-                            cl_results[label_t][predicted] = []
-                        identifier = f"test_{i}"
-                        cl_results[label_t][predicted].append([identifier, el])
-                except Exception as e:  # catch them all
-                    logger.error({"message": "Exception in eval_wili", "error": e})
-                    predicted = "UNK-exception"
-                filepointer.write(predicted + "\n")
+        if checkpoint is None:
+            n_done = 0
+            times = []  # type: List[float]
+            now = datetime.datetime.now()
+            results["meta"]["experiment_start"] = f"{now:%Y-%m-%d %H:%M:%S}"
+        else:
+            n_done = checkpoint["n_done"]
+            times = checkpoint["times"].tolist()
+            results["meta"]["experiment_start"] = checkpoint["experiment_start"]
+        report = evaluation.EvaluationReport(
+            label_table.get_label_table(),
+            result_filepath + ".errors.csv",
+            state=checkpoint,
+        )
+        writer_state = None  # type: Optional[Dict[str, int]]
+        if checkpoint is not None:
+            writer_state = {"n_written": n_done, "offset": checkpoint["result_offset"]}
+        writer = label_table.ResultWriter(
+            result_filepath, len(samples), state=writer_state
+        )
+        bar = progressbar.ProgressBar(redirect_stdout=True, max_value=len(samples))
+
+        def save_checkpoint(n_checkpoint: int) -> None:
+            report_state = report.get_state()
+            evaluation.save_checkpoint(
+                checkpoint_filepath,
+                n_done=n_checkpoint,
+                sample_indices=sample_indices,
+                times=np.array(times),
+                experiment_start=results["meta"]["experiment_start"],
+                confusion=report_state["confusion"],
+                errors_offset=report_state["errors_offset"],
+                result_offset=writer.get_state()["offset"],
+            )
+
+        with writer:
+            if pipelined:
+                if batch_size is None:
+                    batch_size = self.profile["batch_size"]
+                batches = (
+                    [data["x_test"][i] for i, _ in samples[start : start + batch_size]]
+                    for start in range(n_done, len(samples), batch_size)
+                )
+                table = label_table.get_label_table()
+                progress = {"n_done": n_done}
+
+                def write(batch: Tuple[List[str], float]) -> int:
+                    labels, seconds = batch
+                    n_previous = progress["n_done"]
+                    n_current = n_previous + len(labels)
+                    times.extend([seconds / len(labels)] * len(labels))
+                    writer.extend(labels)
+                    report.add_bulk(
+                        sample_indices[n_previous:n_current],
+                        table.encode(
+                            [label for _, label in samples[n_previous:n_current]]
+                        ),
+                        table.encode(labels),
+                    )
+                    progress["n_done"] = n_current
+                    if (
+                        n_current // checkpoint_every > n_previous // checkpoint_every
+                        and n_current < len(samples)
+                    ):
+                        save_checkpoint(n_current)
+                    return n_current
+
+                pipeline = lidtk.pipeline.Pipeline(
+                    self.get_prediction_stages() + [("writing", write)], queue_size
+                )
+                for n_done in pipeline.run(batches):
+                    bar.update(n_done)
+                utilization = pipeline.get_utilization()
+                busy = ", ".join(
+                    f"{name} {share * 100:.0f}%" for name, share in utilization.items()
+                )
+                logger.info(f"Busy: {busy}")
+                results["meta"]["pipeline"] = {
+                    "batch_size": batch_size,
+                    "queue_size": queue_size,
+                    "utilization": utilization,
+                }
+            else:
+                for nb in range(n_done, len(samples)):
+                    i, label_t = samples[nb]
+                    try:
+                        t0 = time.time()
+                        predicted = self.predict(data["x_test"][i])
+                        t1 = time.time()
+                        times.append(t1 - t0)
+                    except Exception as e:  # catch them all
+                        logger.error({"message": "Exception in eval_wili", "error": e})
+                        predicted = "UNK-exception"
+                    writer.append(predicted)
+                    report.add(i, label_t, predicted)
+                    bar.update(nb + 1)
+                    if (nb + 1) % checkpoint_every == 0 and nb + 1 < len(samples):
+                        save_checkpoint(nb + 1)
+        report.close()
         bar.finish()
-        results["cl_results"] = cl_results
+        report.save_confusion(result_filepath + ".confusion.npy")
+        results.update(report.to_dict())
+        results["errors_file"] = report.errors_filepath
         times_arr = np.array(times)
         print(f"Average time per 10**6 elements: {times_arr.mean() * 10 ** 6:.2f}s")
         results["time_per_10*6"] = times_arr.mean() * 10 ** 6
@@ -185,6 +759,212 @@ class LIDClassifier(ABC):
         results["meta"]["software"] = lidtk.utils.get_software_info()
         with open(logfile, "w", encoding="utf8") as f:
             f.write(json.dumps(results, indent=4, sort_keys=True, ensure_ascii=False))
+        if os.path.isfile(checkpoint_filepath):
+            os.remove(checkpoint_filepath)
+        split = "test"
+        if languages is not None:
+            split = "test-unknown" if eval_unk else "test-known"
+        self.store_results(
+            result_filepath,
+            samples,
+            split,
+            latencies=times_arr if len(times_arr) == len(samples) else None,
+        )
+
+    def reset_after_fork(self) -> None:
+        """
+        Drop the state which a forked worker process cannot use.
+
+        Thread pools and connections of the parent are copied by the fork,
+        but their threads are not, so they would block forever. Classifiers
+        with such state override this; it is created again on first use.
+        """
+
+    def get_config_hash(self) -> str:
+        """Get the hash of the configuration, see lidtk.utils.get_config_hash."""
+        return lidtk.utils.get_config_hash(
+            {"cfg": self.cfg, "languages": self.languages}
+        )
+
+    def get_profile_path(self) -> str:
+        """Get where `lidtk tune` stores the profile of this configuration."""
+        return lidtk.utils.load_cfg()["profiles_path"].format(
+            f"{self.cfg['name']}_{self.get_config_hash()}"
+        )
+
+    @property
+    def profile(self) -> Dict[str, Any]:
+        """
+        Get the settings for predicting many texts, see `lidtk tune`.
+
+        Returns
+        -------
+        profile : Dict[str, Any]
+            'batch_size', 'n_jobs' (worker processes) and 'blas_threads'
+            (None keeps the default). A profile which was tuned on a machine
+            with another number of CPUs is ignored.
+        """
+        if self._profile is None:
+            self._profile = dict(default_profile)
+            profile_path = self.get_profile_path()
+            if os.path.isfile(profile_path):
+                with open(profile_path) as f:
+                    tuned = json.load(f)
+                if tuned["n_cpus"] == resources.get_cpu_budget():
+                    self._profile.update(tuned["settings"])
+                else:
+                    logger.warning(
+                        f"Ignore {profile_path}: it was tuned for "
+                        f"{tuned['n_cpus']} CPUs"
+                    )
+        return self._profile
+
+    def predict_bulk_ids_profiled(
+        self, texts: List[str], profile: Optional[Dict[str, Any]] = None
+    ) -> np.ndarray:
+        """
+        Predict many texts as label ids with the settings of a profile.
+
+        The texts are split into batches of `batch_size` which are
+        predicted by `n_jobs` forked worker processes. Within a worker
+        process, it runs serially.
+
+        Parameters
+        ----------
+        texts : List[str]
+        profile : Dict[str, Any], optional (default: self.profile)
+
+        Returns
+        -------
+        ids : np.ndarray of dtype int16
+        """
+        if profile is None:
+            profile = self.profile
+        batches = list(lidtk.utils.chunks(texts, profile["batch_size"]))
+        n_jobs = profile["n_jobs"]
+        if multiprocessing.current_process().daemon:
+            n_jobs = 1
+        with lidtk.utils.limit_blas_threads(profile["blas_threads"]):
+            if n_jobs > 1 and len(batches) > 1:
+                with resources.get_pool(
+                    n_jobs,
+                    _init_worker,
+                    (self,),
+                    n_threads=profile["blas_threads"],
+                    context=multiprocessing.get_context("fork"),
+                ) as pool:
+                    ids = pool.map(_predict_ids_worker, batches, chunksize=1)
+            else:
+                ids = [self.predict_bulk_ids(batch) for batch in batches]
+        if not ids:
+            return np.zeros(0, dtype=label_table.label_dtype)
+        return np.concatenate(ids).astype(label_table.label_dtype)
+
+    def store_results(
+        self,
+        result_filepath: str,
+        samples: List[Tuple[int, str]],
+        split: str,
+        latencies: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Add the predictions of a WiLI run to the results store.
+
+        Nothing is stored if `results_store_path` is not configured.
+
+        Parameters
+        ----------
+        result_filepath : str
+        samples : List[Tuple[int, str]]
+            Index in x_test and true label of each prediction
+        split : str
+        latencies : np.ndarray, optional (default: None)
+        """
+        store_path = lidtk.utils.load_cfg().get("results_store_path")
+        if store_path is None:
+            return
+        table = label_table.get_label_table()
+        sample_indices = np.array([i for i, _ in samples], dtype=np.int64)
+        with results_store.ResultsStore(store_path) as store:
+            true_ids = table.encode([label for _, label in samples])
+            store.set_labels(sample_indices, true_ids, split=split)
+            store.add_run(
+                self.cfg["name"],
+                self.get_config_hash(),
+                sample_indices,
+                label_table.read_results(result_filepath),
+                latencies=latencies,
+                split=split,
+            )
+        logger.info(f"Added the results to {store_path}")
+
+
+# The classifier of a worker process, see _init_worker
+_worker_classifier: Optional[LIDClassifier] = None
+
+
+def get_prefix_ends(n_chars: int, window_size: int) -> List[int]:
+    """
+    Get the lengths of the prefixes of predict_incremental.
+
+    Examples
+    --------
+    >>> get_prefix_ends(450, 200)
+    [200, 400, 450]
+    >>> get_prefix_ends(0, 200)
+    [0]
+    """
+    return list(range(window_size, n_chars, window_size)) + [n_chars]
+
+
+def _init_worker(classifier: LIDClassifier) -> None:
+    global _worker_classifier
+    classifier.reset_after_fork()
+    _worker_classifier = classifier
+
+
+def _predict_labels_worker(texts: List[str]) -> List[str]:
+    assert _worker_classifier is not None
+    return _worker_classifier.predict_labels(texts)
+
+
+def _predict_ids_worker(texts: List[str]) -> np.ndarray:
+    assert _worker_classifier is not None
+    return _worker_classifier.predict_bulk_ids(texts)
+
+
+def get_classifier(
+    name: str,
+    config_filepath: Optional[str] = None,
+    languages: Optional[List[str]] = None,
+) -> LIDClassifier:
+    """
+    Get a classifier by its name.
+
+    Parameters
+    ----------
+    name : str
+        One of the keys of `classifier_modules`
+    config_filepath : str, optional (default: the default config of the classifier)
+    languages : List[str], optional (default: as configured)
+        Restrict the classifier to those ISO 369-3 codes
+
+    Returns
+    -------
+    classifier : LIDClassifier
+    """
+    if name not in classifier_modules:
+        raise ValueError(
+            f"Unknown classifier '{name}'. Choose one of {sorted(classifier_modules)}"
+        )
+    module = importlib.import_module(classifier_modules[name])
+    if hasattr(module, "load_classifier"):
+        return module.load_classifier(config_filepath, languages)  # type: ignore
+    if config_filepath is None and languages is None:
+        return module.classifier  # type: ignore
+    if config_filepath is None:
+        config_filepath = module.filepath  # type: ignore
+    return type(module.classifier)(config_filepath, languages)  # type: ignore
 
 
 def classifier_cli_factor(classifier: LIDClassifier) -> click.Group:
@@ -200,6 +980,17 @@ def classifier_cli_factor(classifier: LIDClassifier) -> click.Group:
     entry_point : click.Group
     """
 
+    resume_option = click.option(
+        "--resume",
+        is_flag=True,
+        help="Continue an interrupted run from <result_file>.checkpoint.npz",
+    )
+    pipelined_option = click.option(
+        "--pipelined",
+        is_flag=True,
+        help="Read, extract features, predict and write batches concurrently",
+    )
+
     @click.group(name=classifier.cfg["name"])
     def entry_point() -> None:
         """Use this language classifier."""
@@ -217,9 +1008,39 @@ def classifier_cli_factor(classifier: LIDClassifier) -> click.Group:
         print(classifier.predict(text))
 
     @entry_point.command(name="get_languages")
-    def get_languages() -> None:
+    @click.option(
+        "--mode",
+        type=click.Choice(["all", "sample"]),
+        default="all",
+        show_default=True,
+        help="Predict all paragraphs or stop once sampling finds no new language",
+    )
+    @click.option("--batch_size", type=int, help="Default: from the tuned profile")
+    @click.option("--n_jobs", type=int, help="Processes (default: from the profile)")
+    @click.option(
+        "--patience",
+        default=10,
+        show_default=True,
+        help="Batches without a new language until sampling stops",
+    )
+    @click.option("--no_cache", is_flag=True, help="Ignore the cached label set")
+    def get_languages(
+        mode: str,
+        batch_size: Optional[int],
+        n_jobs: Optional[int],
+        patience: int,
+        no_cache: bool,
+    ) -> None:
         """Get all predicted languages of for the WiLI dataset."""
-        print(classifier.get_languages())
+        print(
+            classifier.get_languages(
+                mode=mode,
+                batch_size=batch_size,
+                n_jobs=n_jobs,
+                patience=patience,
+                use_cache=not no_cache,
+            )
+        )
 
     @entry_point.command(name="print_languages")
     @click.option(
@@ -246,11 +1067,13 @@ def classifier_cli_factor(classifier: LIDClassifier) -> click.Group:
     @entry_point.command(name="wili")
     @click.option(
         "--result_file",
-        default=f"{classifier.cfg['name']}_results.txt",
+        default=f"{classifier.cfg['name']}_results.npy",
         show_default=True,
-        help="Where to store the predictions",
+        help="Where to store the predictions (.npy: label ids, .txt: labels)",
     )
-    def eval_wili(result_file: str) -> None:
+    @resume_option
+    @pipelined_option
+    def eval_wili(result_file: str, resume: bool, pipelined: bool) -> None:
         """
         CLI function evaluating the classifier on WiLI.
 
@@ -258,17 +1081,21 @@ def classifier_cli_factor(classifier: LIDClassifier) -> click.Group:
         ----------
         result_file : str
             Path to a file where the results will be stored
+        resume : bool
+        pipelined : bool
         """
-        classifier.eval_wili(result_file)
+        classifier.eval_wili(result_file, resume=resume, pipelined=pipelined)
 
     @entry_point.command(name="wili_k")
     @click.option(
         "--result_file",
-        default=(f"{classifier.cfg['name']}_results_known.txt"),
+        default=(f"{classifier.cfg['name']}_results_known.npy"),
         show_default=True,
-        help="Where to store the predictions",
+        help="Where to store the predictions (.npy: label ids, .txt: labels)",
     )
-    def eval_wili_known(result_file: str) -> None:
+    @resume_option
+    @pipelined_option
+    def eval_wili_known(result_file: str, resume: bool, pipelined: bool) -> None:
         """
         CLI function evaluating the classifier on WiLI.
 
@@ -276,17 +1103,26 @@ def classifier_cli_factor(classifier: LIDClassifier) -> click.Group:
         ----------
         result_file : str
             Path to a file where the results will be stored
+        resume : bool
+        pipelined : bool
         """
-        classifier.eval_wili(result_file, classifier.get_mapping_languages())
+        classifier.eval_wili(
+            result_file,
+            classifier.get_mapping_languages(),
+            resume=resume,
+            pipelined=pipelined,
+        )
 
     @entry_point.command(name="wili_unk")
     @click.option(
         "--result_file",
-        default=(f"{classifier.cfg['name']}_results_unknown.txt"),
+        default=(f"{classifier.cfg['name']}_results_unknown.npy"),
         show_default=True,
-        help="Where to store the predictions",
+        help="Where to store the predictions (.npy: label ids, .txt: labels)",
     )
-    def eval_wili_unknown(result_file: str) -> None:
+    @resume_option
+    @pipelined_option
+    def eval_wili_unknown(result_file: str, resume: bool, pipelined: bool) -> None:
         """
         CLI function evaluating the classifier on WiLI.
 
@@ -294,9 +1130,15 @@ def classifier_cli_factor(classifier: LIDClassifier) -> click.Group:
         ----------
         result_file : str
             Path to a file where the results will be stored
+        resume : bool
+        pipelined : bool
         """
         classifier.eval_wili(
-            result_file, classifier.get_mapping_languages(), eval_unk=True
+            result_file,
+            classifier.get_mapping_languages(),
+            eval_unk=True,
+            resume=resume,
+            pipelined=pipelined,
         )
 
     return entry_point
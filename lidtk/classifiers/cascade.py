@@ -0,0 +1,310 @@
+"""
+Run a cascade of classifiers.
+
+Every text is classified by the first (fast) stage. Only texts for which a
+stage is less confident than its threshold are escalated to the next (slower)
+stage. The last stage always decides.
+"""
+
+# Core Library modules
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Third party modules
+import click
+import numpy as np
+import pkg_resources
+import progressbar
+
+# First party modules
+import lidtk.classifiers
+from lidtk.data import wili
+
+logger = logging.getLogger(__name__)
+
+
+class CascadeClassifier(lidtk.classifiers.LIDClassifier):
+    """
+    LID with a cascade of classifiers.
+
+    The stages are loaded on the first prediction.
+    """
+
+    def __init__(self, cfg_path: str, languages: Optional[List[str]] = None):
+        super().__init__(cfg_path, languages)
+        self._stages = None  # type: Optional[List[Tuple[Any, float]]]
+
+    @property
+    def stages(self) -> List[Tuple[lidtk.classifiers.LIDClassifier, float]]:
+        """Get the (classifier, threshold) of each stage."""
+        if self._stages is None:
+            stages = []
+            for stage_cfg in self.cfg["stages"]:
+                classifier = lidtk.classifiers.get_classifier(
+                    stage_cfg["classifier"],
+                    stage_cfg.get("config_path"),
+                    self.languages,
+                )
+                stages.append((classifier, stage_cfg.get("threshold", 0.0)))
+            self._stages = stages
+        return self._stages
+
+    def reset_after_fork(self) -> None:
+        """Reset the stages which are loaded already."""
+        for classifier, _ in self._stages or []:
+            classifier.reset_after_fork()
+
+    def predict(self, text: str) -> str:
+        """Predicting the language of a text."""
+        return self.predict_with_stage(text)[0]
+
+    def predict_with_confidence(self, text: str) -> Tuple[str, float]:
+        """Predict the language of a text and the confidence of the deciding stage."""
+        language, confidence, _ = self._predict_cascade(text)
+        return language, confidence
+
+    def predict_with_stage(self, text: str) -> Tuple[str, int]:
+        """
+        Predict the language of a text and which stage decided.
+
+        Parameters
+        ----------
+        text : str
+
+        Returns
+        -------
+        language, stage_index : Tuple[str, int]
+        """
+        language, _, stage_index = self._predict_cascade(text)
+        return language, stage_index
+
+    def _predict_cascade(self, text: str) -> Tuple[str, float, int]:
+        last_index = len(self.stages) - 1
+        for stage_index, (classifier, threshold) in enumerate(self.stages):
+            language, confidence = classifier.predict_with_confidence(text)
+            if confidence >= threshold or stage_index == last_index:
+                break
+        return language, confidence, stage_index
+
+    def predict_bulk(self, texts: List[str]) -> List[str]:
+        """Predict the language of a list of texts stage by stage."""
+        return self.predict_bulk_with_stages(texts)["languages"]
+
+    def predict_bulk_with_stages(self, texts: List[str]) -> Dict[str, Any]:
+        """
+        Predict the language of texts; escalate uncertain ones as one batch.
+
+        Parameters
+        ----------
+        texts : List[str]
+
+        Returns
+        -------
+        results : Dict[str, Any]
+            'languages' (List[str]), 'stage' (np.ndarray with the index of
+            the deciding stage per text) and 'stage_times' (np.ndarray with
+            the seconds spent in each stage)
+        """
+        languages = [""] * len(texts)
+        decided_by = np.zeros(len(texts), dtype=np.int64)
+        stage_times = np.zeros(len(self.stages))
+        remaining = np.arange(len(texts))
+        last_index = len(self.stages) - 1
+        for stage_index, (classifier, threshold) in enumerate(self.stages):
+            if len(remaining) == 0:
+                break
+            stage_texts = [texts[i] for i in remaining]
+            t0 = time.time()
+            if stage_index == last_index:
+                stage_languages = classifier.predict_bulk(stage_texts)
+                accepted = np.ones(len(remaining), dtype=bool)
+            else:
+                (
+                    stage_languages,
+                    confidences,
+                ) = classifier.predict_bulk_with_confidence(stage_texts)
+                accepted = confidences >= threshold
+            stage_times[stage_index] = time.time() - t0
+            for text_index, stage_position in zip(
+                remaining[accepted], np.flatnonzero(accepted)
+            ):
+                languages[text_index] = stage_languages[stage_position]
+            decided_by[remaining[accepted]] = stage_index
+            remaining = remaining[~accepted]
+        return {"languages": languages, "stage": decided_by, "stage_times": stage_times}
+
+    def eval_stages(
+        self, xs: List[str], ys: List[str], batch_size: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        Evaluate how much work each stage of the cascade does.
+
+        Parameters
+        ----------
+        xs : List[str]
+            Texts
+        ys : List[str]
+            True languages as ISO 369-3 codes
+        batch_size : int, optional (default: 1000)
+
+        Returns
+        -------
+        report : Dict[str, Any]
+            Overall accuracy / throughput and for each stage how many texts it
+            saw, decided and escalated, its accuracy on the texts it decided and
+            its throughput in texts per second.
+        """
+        n_stages = len(self.stages)
+        seen = np.zeros(n_stages, dtype=np.int64)
+        decided = np.zeros(n_stages, dtype=np.int64)
+        correct = np.zeros(n_stages, dtype=np.int64)
+        stage_times = np.zeros(n_stages)
+        bar = progressbar.ProgressBar(redirect_stdout=True, max_value=len(xs))
+        for start in range(0, len(xs), batch_size):
+            results = self.predict_bulk_with_stages(xs[start : start + batch_size])
+            stage_times += results["stage_times"]
+            for stage_index, language, label_t in zip(
+                results["stage"], results["languages"], ys[start : start + batch_size]
+            ):
+                seen[: stage_index + 1] += 1
+                decided[stage_index] += 1
+                correct[stage_index] += language == label_t
+            bar.update(min(start + batch_size, len(xs)))
+        bar.finish()
+        report = {
+            "n": len(xs),
+            "accuracy": float(correct.sum()) / max(len(xs), 1),
+            "throughput": len(xs) / max(stage_times.sum(), 1e-9),
+            "stages": [],
+        }  # type: Dict[str, Any]
+        for stage_index, (stage_cfg, (_, threshold)) in enumerate(
+            zip(self.cfg["stages"], self.stages)
+        ):
+            report["stages"].append(
+                {
+                    "classifier": stage_cfg["classifier"],
+                    "threshold": threshold,
+                    "seen": int(seen[stage_index]),
+                    "decided": int(decided[stage_index]),
+                    "escalation_rate": (
+                        float(seen[stage_index] - decided[stage_index])
+                        / max(seen[stage_index], 1)
+                    ),
+                    "accuracy": (
+                        float(correct[stage_index]) / max(decided[stage_index], 1)
+                    ),
+                    "throughput": (
+                        seen[stage_index] / max(stage_times[stage_index], 1e-9)
+                    ),
+                }
+            )
+        return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Print the report of CascadeClassifier.eval_stages as a table."""
+    print(
+        "{:<3} {:<14} {:>9} {:>8} {:>8} {:>10} {:>9} {:>12}".format(
+            "#",
+            "classifier",
+            "threshold",
+            "seen",
+            "decided",
+            "escalated",
+            "accuracy",
+            "texts/s",
+        )
+    )
+    print("-" * 80)
+    for i, stage in enumerate(report["stages"]):
+        print(
+            "{:<3} {:<14} {:>9.3f} {:>8} {:>8} {:>9.2f}% {:>8.2f}% {:>12.1f}".format(
+                i,
+                stage["classifier"],
+                stage["threshold"],
+                stage["seen"],
+                stage["decided"],
+                stage["escalation_rate"] * 100,
+                stage["accuracy"] * 100,
+                stage["throughput"],
+            )
+        )
+    print("-" * 80)
+    print(
+        f"Total: {report['accuracy'] * 100:0.2f}% accuracy on {report['n']} texts, "
+        f"{report['throughput']:0.1f} texts/s"
+    )
+
+
+path = "classifiers/config/cascade.yaml"
+filepath = pkg_resources.resource_filename("lidtk", path)
+classifier = CascadeClassifier(filepath)
+
+
+def load_classifier(
+    filepath: Optional[str] = None, languages: Optional[List[str]] = None
+) -> CascadeClassifier:
+    """
+    Load a CascadeClassifier.
+
+    Parameters
+    ----------
+    filepath : str, optional (default: classifiers/config/cascade.yaml)
+    languages : List[str], optional (default: as configured)
+        Restricts all stages to those languages
+
+    Returns
+    -------
+    classifier : CascadeClassifier object
+    """
+    if filepath is None:
+        if languages is None:
+            return classifier
+        filepath = pkg_resources.resource_filename("lidtk", path)
+    return CascadeClassifier(filepath, languages)
+
+
+###############################################################################
+# CLI                                                                         #
+###############################################################################
+entry_point = lidtk.classifiers.classifier_cli_factor(classifier)
+
+
+@entry_point.command(name="stages")
+@click.option(
+    "--config",
+    "config_filepath",
+    type=click.Path(exists=True),
+    help="Path to a YAML configuration file",
+)
+@click.option(
+    "--set_name",
+    default="test",
+    show_default=True,
+    type=click.Choice(["train", "test", "val"]),
+)
+@click.option("--batch_size", default=1000, show_default=True)
+@click.option(
+    "--result_file",
+    default="cascade_stages.json",
+    show_default=True,
+    help="Where to store the report",
+)
+def stages_cli(
+    config_filepath: Optional[str], set_name: str, batch_size: int, result_file: str
+) -> None:
+    """Show escalation rate, accuracy and throughput of each stage on WiLI."""
+    cascade = load_classifier(config_filepath)
+    data = wili.load_data()
+    logger.info("Finished loading data")
+    report = cascade.eval_stages(
+        data[f"x_{set_name}"], data[f"y_{set_name}"], batch_size=batch_size
+    )
+    print_report(report)
+    result_filepath = os.path.abspath(result_file)
+    with open(result_filepath, "w") as f:
+        f.write(json.dumps(report, indent=4, sort_keys=True))
+    logger.info(f"Wrote report to {result_filepath}")
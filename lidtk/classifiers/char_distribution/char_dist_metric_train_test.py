@@ -22,18 +22,33 @@ import pickle
 import random
 import sys
 from collections import Counter, defaultdict
-from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 # Third party modules
 import click
 import numpy as np
+import pkg_resources
+import scipy.sparse
 import scipy.stats
 from scipy.spatial import distance
 
 # First party modules
 import lidtk.classifiers
+from lidtk.artifact_cache import ArtifactCache
+from lidtk.classifiers.char_distribution import segmentation
 from lidtk.classifiers.char_features import FeatureExtractor  # noqa
-from lidtk.data import wili
+from lidtk.data import unicode_data, wili
+from lidtk.data.encoded_batch import EncodedBatch
 
 random.seed(0)
 logging.basicConfig(
@@ -43,6 +58,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Replaces the characters above the unicode cutoff
+cut_off_char = "澳"
+
 
 def ido(x: np.ndarray, y: np.ndarray) -> float:
     """
@@ -68,11 +86,352 @@ def ido(x: np.ndarray, y: np.ndarray) -> float:
     return 1 - np.sum(np.minimum(x, y))
 
 
+metrics = [
+    ido,  # 0
+    distance.braycurtis,  # 1
+    distance.canberra,  # 2
+    distance.chebyshev,  # 3 - l_infty
+    distance.cityblock,  # 4
+    distance.correlation,  # 5
+    distance.cosine,  # 6
+    distance.euclidean,  # 7
+    distance.sqeuclidean,  # 8
+    scipy.stats.entropy,  # 9
+]
+# Metrics which scipy.spatial.distance.cdist computes for many pairs at once
+cdist_metrics = [
+    "braycurtis",
+    "canberra",
+    "chebyshev",
+    "cityblock",
+    "correlation",
+    "cosine",
+    "euclidean",
+    "sqeuclidean",
+]
+# Settings of CharDistributionClassifier.segment; see `segmentation` of the config
+default_segmentation = {"window_size": 100, "step": 20, "switch_penalty": 0.2}
 language_models = None  # type: Optional[Dict[Any, Any]]
 language_models_chars = None  # type: Optional[List[str]]
 comp_metric = ido
 
 
+def get_distance_matrix(
+    model_matrix: np.ndarray, distributions: np.ndarray, metric: Callable
+) -> np.ndarray:
+    """
+    Get the distance of each distribution to each model.
+
+    Parameters
+    ----------
+    model_matrix : np.ndarray of shape (n_models, n_chars)
+    distributions : np.ndarray of shape (n_distributions, n_chars)
+    metric : Callable
+        One of metrics; it is called as metric(model, distribution)
+
+    Returns
+    -------
+    distances : np.ndarray of shape (n_distributions, n_models)
+
+    Examples
+    --------
+    >>> get_distance_matrix(np.array([[0.5, 0.5], [1.0, 0.0]]),
+    ...                     np.array([[0.1, 0.9]]), ido).round(2).tolist()
+    [[0.4, 0.9]]
+    """
+    n_models, n_chars = model_matrix.shape
+    if metric.__name__ in cdist_metrics:
+        return distance.cdist(distributions, model_matrix, metric=metric.__name__)
+    distances = np.zeros((len(distributions), n_models))
+    # Limit the broadcasted (chunk, n_models, n_chars) arrays to ~128 MB
+    chunk_size = max(1, 2 ** 24 // max(n_models * n_chars, 1))
+    for start in range(0, len(distributions), chunk_size):
+        chunk = distributions[start : start + chunk_size, None, :]
+        if metric is ido:
+            overlap = np.minimum(model_matrix[None], chunk).sum(axis=2)
+            distances[start : start + chunk_size] = 1 - overlap
+        elif metric is scipy.stats.entropy:
+            distances[start : start + chunk_size] = scipy.stats.entropy(
+                np.broadcast_to(model_matrix[None], (len(chunk), n_models, n_chars)),
+                np.broadcast_to(chunk, (len(chunk), n_models, n_chars)),
+                axis=2,
+            )
+        else:
+            for i, x_distribution in enumerate(chunk[:, 0], start=start):
+                for j, model_distribution in enumerate(model_matrix):
+                    distances[i, j] = metric(model_distribution, x_distribution)
+    return distances
+
+
+def get_margin(closest: float, runner_up: float) -> float:
+    """
+    Get how much closer the closest language is than the runner-up.
+
+    Distances can be infinite (e.g. the entropy metric if a text lacks a
+    character of the model). If both are infinite, the margin is 0.
+
+    Examples
+    --------
+    >>> get_margin(0.2, 0.5)
+    0.3
+    >>> get_margin(0.2, float("inf")), get_margin(float("inf"), float("inf"))
+    (inf, 0.0)
+    """
+    if np.isinf(closest):
+        return 0.0
+    if np.isinf(runner_up):
+        return float("inf")
+    return float(runner_up - closest)
+
+
+def get_metric(name: str) -> Callable:
+    """
+    Get a metric by its function name.
+
+    Parameters
+    ----------
+    name : str
+
+    Returns
+    -------
+    metric : Callable
+
+    Examples
+    --------
+    >>> get_metric("ido").__name__
+    'ido'
+    """
+    for metric in metrics:
+        if metric.__name__ == name:
+            return metric
+    raise ValueError(
+        f"Unknown metric '{name}'. Choose one of {[m.__name__ for m in metrics]}"
+    )
+
+
+class CharDistributionClassifier(lidtk.classifiers.LIDClassifier):
+    """
+    LID with the character distribution classifier.
+
+    The model is loaded from `model_path` on the first prediction. If the
+    classifier is restricted to some languages, only their models are kept.
+    """
+
+    def __init__(self, cfg_path: str, languages: Optional[List[str]] = None):
+        super().__init__(cfg_path, languages)
+        self.metric = get_metric(self.cfg["metric"])
+        self.language_models = None  # type: Optional[Dict[str, np.ndarray]]
+        self.chars = None  # type: Optional[List[str]]
+        # The models as rows of a matrix, in the order of model_languages
+        self.model_languages = []  # type: List[str]
+        self.model_matrix = np.zeros((0, 0))
+
+    def load(self) -> None:
+        """Load the language models of the configured metric and cutoff."""
+        with open(self.cfg["model_path"], "rb") as handle:
+            data = pickle.load(handle)
+        self.language_models = {
+            lang: model
+            for lang, model in data["language_models"].items()
+            if self.languages is None or lang in self.languages
+        }
+        self.chars = data["chars"]
+        self.model_languages = sorted(self.language_models)
+        self.model_matrix = np.array(
+            [self.language_models[lang] for lang in self.model_languages]
+        ).reshape(len(self.model_languages), len(self.chars))
+
+    def get_distances(
+        self, text: str, languages: Optional[List[str]] = None
+    ) -> List[Tuple[float, str]]:
+        """
+        Get the distance of the text to each language, closest first.
+
+        Parameters
+        ----------
+        text : str
+        languages : List[str], optional (default: all languages)
+            Only compare the text to the models of those languages
+
+        Returns
+        -------
+        distances : List[Tuple[float, str]]
+        """
+        x_distribution = self.extract_features([text])[0]
+        assert self.language_models is not None, "assert for mypy"
+        models = self.language_models
+        if languages is not None:
+            models = {lang: models[lang] for lang in languages if lang in models}
+        distances = predict_param(models, self.metric, x_distribution, best_only=False)
+        return sorted(distances)  # type: ignore
+
+    def extract_features(self, texts: List[str]) -> np.ndarray:
+        """Get the character distribution of each text."""
+        if self.language_models is None:
+            self.load()
+        assert self.chars is not None, "assert for mypy"
+        batch = EncodedBatch.from_texts(texts).replace_above(
+            self.cfg["unicode_cutoff"], cut_off_char
+        )
+        return batch.get_distributions(self.chars).astype(np.float32)
+
+    def predict_features(self, features: np.ndarray) -> List[str]:
+        """Predict the closest language of each character distribution."""
+        assert self.language_models is not None, "assert for mypy"
+        return [
+            predict_param(self.language_models, self.metric, x_distribution)
+            for x_distribution in features
+        ]  # type: ignore
+
+    def get_distance_matrix(self, distributions: np.ndarray) -> np.ndarray:
+        """
+        Get the distance of character distributions to all languages at once.
+
+        Parameters
+        ----------
+        distributions : np.ndarray of shape (n, len(self.chars))
+
+        Returns
+        -------
+        distances : np.ndarray of shape (n, len(self.model_languages))
+        """
+        if self.language_models is None:
+            self.load()
+        return get_distance_matrix(self.model_matrix, distributions, self.metric)
+
+    def iter_prefix_predictions(
+        self, text: str, window_size: int, max_chars: Optional[int] = None
+    ) -> Iterator[Tuple[str, float, int]]:
+        """
+        Predict the language of ever longer prefixes of a text.
+
+        Only the characters of the new window are counted in each step; the
+        confidence is the margin of predict_with_confidence.
+        """
+        if self.language_models is None:
+            self.load()
+        assert self.chars is not None, "assert for mypy"
+        n_chars = len(text) if max_chars is None else min(len(text), max_chars)
+        counts = np.zeros(len(self.chars))
+        start = 0
+        for end in lidtk.classifiers.get_prefix_ends(n_chars, window_size):
+            batch = EncodedBatch.from_texts([text[start:end]]).replace_above(
+                self.cfg["unicode_cutoff"], cut_off_char
+            )
+            counts += np.bincount(
+                batch.get_char_ids(self.chars), minlength=len(self.chars)
+            )
+            start = end
+            distances = self.get_distance_matrix(counts[None] / max(end, 1))[0]
+            order = np.argsort(distances, kind="stable")
+            margin = float("inf")
+            if len(order) > 1:
+                margin = get_margin(distances[order[0]], distances[order[1]])
+            yield self.model_languages[order[0]], margin, end
+
+    def segment(
+        self,
+        text: str,
+        window_size: Optional[int] = None,
+        step: Optional[int] = None,
+        switch_penalty: Optional[float] = None,
+    ) -> segmentation.Spans:
+        """
+        Split a text into spans of different languages.
+
+        The defaults come from `segmentation` of the config, see
+        lidtk.classifiers.char_distribution.segmentation.segment.
+
+        Parameters
+        ----------
+        text : str
+        window_size : int, optional
+            Characters around a block which decide its language
+        step : int, optional
+            Characters per block
+        switch_penalty : float, optional
+            On the scale of the metric; larger values give fewer spans
+
+        Returns
+        -------
+        spans : List[Tuple[int, int, str]]
+            Start, end and language of each span
+        """
+        if self.language_models is None:
+            self.load()
+        assert self.chars is not None, "assert for mypy"
+        settings = dict(default_segmentation, **self.cfg.get("segmentation", {}))
+        if window_size is None:
+            window_size = settings["window_size"]
+        if step is None:
+            step = settings["step"]
+        if switch_penalty is None:
+            switch_penalty = settings["switch_penalty"]
+        batch = EncodedBatch.from_texts([text]).replace_above(
+            self.cfg["unicode_cutoff"], cut_off_char
+        )
+        return segmentation.segment(
+            batch.get_char_ids(self.chars),
+            len(self.chars),
+            self.model_languages,
+            self.get_distance_matrix,
+            window_size,
+            step,
+            switch_penalty,
+        )
+
+    def predict_restricted(self, text: str, languages: List[str]) -> str:
+        """Predict the language of a text among the given languages."""
+        distances = self.get_distances(text, languages)
+        if len(distances) == 0:
+            return "UNK"
+        return distances[0][1]
+
+    def predict(self, text: str) -> str:
+        """Predicting the language of a text."""
+        return self.get_distances(text)[0][1]
+
+    def predict_with_confidence(self, text: str) -> Tuple[str, float]:
+        """
+        Predict the language of a text and the margin to the runner-up.
+
+        The margin is the distance of the second closest language minus the
+        distance of the closest language, see get_margin.
+        """
+        distances = self.get_distances(text)
+        if len(distances) < 2:
+            return distances[0][1], float("inf")
+        return distances[0][1], get_margin(distances[0][0], distances[1][0])
+
+    def get_mapping_languages(self) -> List[str]:
+        """Get the languages which have a character distribution model."""
+        if self.language_models is None:
+            self.load()
+        assert self.language_models is not None, "assert for mypy"
+        return sorted(self.language_models.keys())
+
+
+def load_classifier(
+    filepath: Optional[str] = None, languages: Optional[List[str]] = None
+) -> CharDistributionClassifier:
+    """
+    Load a CharDistributionClassifier.
+
+    Parameters
+    ----------
+    filepath : str, optional (default: classifiers/config/char_distribution.yaml)
+    languages : List[str], optional (default: as configured)
+
+    Returns
+    -------
+    classifier : CharDistributionClassifier object
+    """
+    if filepath is None:
+        filepath = "classifiers/config/char_distribution.yaml"
+        filepath = pkg_resources.resource_filename("lidtk", filepath)
+    return CharDistributionClassifier(filepath, languages)
+
+
 ###############################################################################
 # CLI                                                                         #
 ###############################################################################
@@ -94,6 +453,40 @@ def predict_cli(text: str) -> None:
     print(predict(text))
 
 
+@entry_point.command(name="segment")
+@click.option("--text", default=None, help="Text to split")
+@click.option(
+    "--input",
+    "input_filepath",
+    type=click.Path(exists=True),
+    default=None,
+    help="UTF-8 file to split",
+)
+@click.option("--config", "config_filepath", default=None, help="Classifier config")
+@click.option("--window_size", type=int, default=None)
+@click.option("--step", type=int, default=None)
+@click.option("--switch_penalty", type=float, default=None)
+def segment_cli(
+    text: Optional[str],
+    input_filepath: Optional[str],
+    config_filepath: Optional[str],
+    window_size: Optional[int],
+    step: Optional[int],
+    switch_penalty: Optional[float],
+) -> None:
+    """Split a text into spans of different languages."""
+    if input_filepath is not None:
+        with open(input_filepath, encoding="utf-8") as f:
+            text = f.read()
+    if text is None:
+        raise click.UsageError("Pass --text or --input")
+    classifier = load_classifier(config_filepath)
+    for start, end, language in classifier.segment(
+        text, window_size, step, switch_penalty
+    ):
+        print(f"{start}\t{end}\t{language}\t{text[start:min(end, start + 40)]!r}")
+
+
 @entry_point.command(name="wili")
 @click.option(
     "--result_file",
@@ -141,18 +534,6 @@ def main(coverage: float, metric: int, unicode_cutoff: int, set_name: str = "tra
     set_name : str
         Define on which set to evaluate
     """
-    metrics = [
-        ido,  # 0
-        distance.braycurtis,  # 1
-        distance.canberra,  # 2
-        distance.chebyshev,  # 3 - l_infty
-        distance.cityblock,  # 4
-        distance.correlation,  # 5
-        distance.cosine,  # 6
-        distance.euclidean,  # 7
-        distance.sqeuclidean,  # 8
-        scipy.stats.entropy,  # 9
-    ]
     metric_function = metrics[metric]
 
     # Read data
@@ -189,10 +570,12 @@ def main(coverage: float, metric: int, unicode_cutoff: int, set_name: str = "tra
 def train(
     data: Dict[Any, Any], unicode_cutoff: int, coverage: float, metric: Callable
 ) -> Dict[Any, Any]:
-    """Train a model which is purely based on character distributions."""
-    char_counter_by_lang = defaultdict(Counter)  # type: Dict[str, Counter]
-    for x, y in zip(data["x_train"], data["y_train"]):
-        char_counter_by_lang[y] += Counter(preprocess(x, unicode_cutoff))
+    """
+    Train a model which is purely based on character distributions.
+
+    The character counts of WiLI x_train are cached per unicode_cutoff.
+    """
+    char_counter_by_lang = get_character_counts(data, unicode_cutoff)
 
     common_chars_by_lang = {}
     for key, character_counter in char_counter_by_lang.items():
@@ -216,6 +599,63 @@ def train(
     return results
 
 
+def get_character_counts(
+    data: Dict[Any, Any], unicode_cutoff: int
+) -> Dict[str, Counter]:
+    """Count the characters of WiLI x_train by language; cached per cutoff."""
+    return ArtifactCache().get_or_create(
+        "char_dist_counts",
+        {"unicode_cutoff": unicode_cutoff},
+        lambda: count_characters(data, unicode_cutoff),
+    )
+
+
+def count_characters(
+    data: Dict[Any, Any], unicode_cutoff: int, batch_size: int = 10000
+) -> Dict[str, Counter]:
+    """
+    Count the characters of x_train by language.
+
+    The texts are encoded in batches of batch_size texts, so memory does
+    not grow with the size of x_train.
+    """
+    languages = sorted(set(data["y_train"]))
+    lang2index = {lang: index for index, lang in enumerate(languages)}
+    label_ids = np.array([lang2index[y] for y in data["y_train"]], dtype=np.int64)
+    # counts[lang_index, code_point]
+    counts = scipy.sparse.csr_matrix(
+        (len(languages), unicode_data.n_code_points), dtype=np.int64
+    )
+    for start in range(0, len(data["x_train"]), batch_size):
+        batch = EncodedBatch.from_texts(
+            list(data["x_train"][start : start + batch_size])
+        ).replace_above(unicode_cutoff, cut_off_char)
+        code_points, inverse = np.unique(batch.code_points, return_inverse=True)
+        batch_label_ids = label_ids[start : start + batch_size]
+        batch_counts = np.bincount(
+            batch_label_ids[batch.row_ids] * len(code_points) + inverse.reshape(-1),
+            minlength=len(languages) * len(code_points),
+        ).reshape(len(languages), len(code_points))
+        lang_indices, columns = np.nonzero(batch_counts)
+        counts = counts + scipy.sparse.csr_matrix(
+            (
+                batch_counts[lang_indices, columns],
+                (lang_indices, code_points[columns]),
+            ),
+            shape=counts.shape,
+        )
+    char_counter_by_lang = defaultdict(Counter)  # type: Dict[str, Counter]
+    for lang_index, lang in enumerate(languages):
+        row = counts.getrow(lang_index)
+        char_counter_by_lang[lang] = Counter(
+            {
+                chr(code_point): int(count)
+                for code_point, count in zip(row.indices.tolist(), row.data.tolist())
+            }
+        )
+    return char_counter_by_lang
+
+
 def get_counts_by_lang(
     common_chars: List[str], char_counter_by_lang: Dict[str, Dict[str, int]]
 ) -> Tuple[Dict[Any, Any], List[str]]:
@@ -261,7 +701,7 @@ def get_counts_by_lang(
     return language_models, chars
 
 
-def preprocess(x: str, unicode_cutoff: int, cut_off_char: str = "澳") -> str:
+def preprocess(x: str, unicode_cutoff: int, cut_off_char: str = cut_off_char) -> str:
     """
     Preprocess the string x.
 
@@ -275,13 +715,8 @@ def preprocess(x: str, unicode_cutoff: int, cut_off_char: str = "澳") -> str:
     preprocessed_str : str
         Some characters are replaced by a 'cut off' parameter
     """
-    y = ""
-    for el in x:
-        if unicode_cutoff is not None and ord(el) > unicode_cutoff:
-            y += cut_off_char
-        else:
-            y += el
-    return y
+    batch = EncodedBatch.from_texts([x]).replace_above(unicode_cutoff, cut_off_char)
+    return batch.to_texts()[0]
 
 
 def get_common_characters(
@@ -339,17 +774,7 @@ def get_distribution(x: str, chars: List[str]) -> np.ndarray:
     distribution : np.ndarray
         Has the same length as chars
     """
-    dist = np.zeros(len(chars), dtype=np.float32)
-    other_index = chars.index("other")
-    for el in x:
-        if el in chars:
-            dist[chars.index(el)] += 1
-        else:
-            dist[other_index] += 1
-    # Normalize
-    for i in range(len(dist)):
-        dist[i] /= len(x)
-    return dist
+    return EncodedBatch.from_texts([x]).get_distributions(chars)[0].astype(np.float32)
 
 
 def predict(text: str):
@@ -0,0 +1,191 @@
+"""
+Split a text into spans of different languages.
+
+The text is cut into blocks of `step` characters. Each block is scored
+with the character distribution of the window of about `window_size`
+characters around it. The window counts are differences of prefix sums of
+the block counts, so each window costs O(number of columns) no matter how
+large it is, and all windows of a chunk are scored against all languages
+with one distance matrix. A Viterbi pass then picks the languages of the
+blocks, paying `switch_penalty` for every change of the language. Time and
+memory are linear in the length of the text.
+"""
+
+# Core Library modules
+from typing import Callable, Iterator, List, Tuple
+
+# Third party modules
+import numpy as np
+
+# Spans of the same language: (start, end, language)
+Spans = List[Tuple[int, int, str]]
+
+
+def get_window_distributions(
+    char_ids: np.ndarray,
+    n_columns: int,
+    step: int,
+    half_width: int,
+    chunk_size: int = 1024,
+) -> Iterator[np.ndarray]:
+    """
+    Get the character distribution around each block of a text.
+
+    Parameters
+    ----------
+    char_ids : np.ndarray of shape (n_chars,)
+        The column of each character
+    n_columns : int
+    step : int
+        Characters per block
+    half_width : int
+        Block j is described by the blocks j - half_width to j + half_width
+        (clipped to the text)
+    chunk_size : int, optional (default: 1024)
+        Blocks per yielded array
+
+    Yields
+    ------
+    distributions : np.ndarray of shape (<= chunk_size, n_columns)
+        The distributions of consecutive blocks
+
+    Examples
+    --------
+    >>> char_ids = np.array([0, 0, 1, 1, 1, 1])
+    >>> next(get_window_distributions(char_ids, 2, 2, 0)).tolist()
+    [[1.0, 0.0], [0.0, 1.0], [0.0, 1.0]]
+    >>> next(get_window_distributions(char_ids, 2, 2, 1)).tolist()
+    [[0.5, 0.5], [0.3333333333333333, 0.6666666666666666], [0.0, 1.0]]
+    """
+    n_blocks = -(-len(char_ids) // step)
+    for start in range(0, n_blocks, chunk_size):
+        end = min(start + chunk_size, n_blocks)
+        # Prefix sums of the blocks which the windows of this chunk cover
+        first = max(start - half_width, 0)
+        last = min(end + half_width, n_blocks)
+        block_ids = np.arange(first * step, min(last * step, len(char_ids))) // step
+        block_counts = np.bincount(
+            (block_ids - first) * n_columns + char_ids[first * step : last * step],
+            minlength=(last - first) * n_columns,
+        ).reshape(last - first, n_columns)
+        prefix_sums = np.zeros((last - first + 1, n_columns))
+        np.cumsum(block_counts, axis=0, out=prefix_sums[1:])
+        blocks = np.arange(start, end)
+        lower = np.maximum(blocks - half_width, 0) - first
+        upper = np.minimum(blocks + half_width + 1, n_blocks) - first
+        counts = prefix_sums[upper] - prefix_sums[lower]
+        yield counts / np.maximum(counts.sum(axis=1), 1)[:, None]
+
+
+def get_best_path(costs: Iterator[np.ndarray], switch_penalty: float) -> np.ndarray:
+    """
+    Get the cheapest sequence of states with a penalty for each switch.
+
+    Parameters
+    ----------
+    costs : Iterator[np.ndarray]
+        Arrays of shape (n, n_states); together one row per position
+    switch_penalty : float
+
+    Returns
+    -------
+    path : np.ndarray of shape (n_positions,)
+        The state of each position
+
+    Examples
+    --------
+    >>> costs = np.array([[0, 1], [0.8, 0.2], [0, 1]])
+    >>> get_best_path(iter([costs]), 0.5).tolist()
+    [0, 0, 0]
+    >>> get_best_path(iter([costs]), 0.1).tolist()
+    [0, 1, 0]
+    """
+    total = None
+    # The best previous state of a switch and which states switched, per row
+    switch_from = []  # type: List[int]
+    switched = []  # type: List[np.ndarray]
+    for chunk in costs:
+        for row in chunk:
+            if total is None:
+                total = np.array(row, dtype=np.float64)
+                switch_from.append(-1)
+                switched.append(np.zeros(len(row), dtype=bool))
+                continue
+            best = int(np.argmin(total))
+            switch = total[best] + switch_penalty < total
+            total = np.where(switch, total[best] + switch_penalty, total) + row
+            switch_from.append(best)
+            switched.append(switch)
+    if total is None:
+        return np.zeros(0, dtype=np.int64)
+    path = np.zeros(len(switched), dtype=np.int64)
+    state = int(np.argmin(total))
+    for position in range(len(switched) - 1, -1, -1):
+        path[position] = state
+        if switched[position][state]:
+            state = switch_from[position]
+    return path
+
+
+def get_spans(path: np.ndarray, labels: List[str], step: int, n_chars: int) -> Spans:
+    """
+    Merge consecutive blocks of the same language.
+
+    Examples
+    --------
+    >>> get_spans(np.array([0, 0, 1]), ["deu", "eng"], 10, 25)
+    [(0, 20, 'deu'), (20, 25, 'eng')]
+    """
+    if len(path) == 0:
+        return []
+    changes = np.flatnonzero(np.diff(path)) + 1
+    starts = np.concatenate([[0], changes])
+    ends = np.concatenate([changes, [len(path)]])
+    return [
+        (int(start) * step, min(int(end) * step, n_chars), labels[path[start]])
+        for start, end in zip(starts, ends)
+    ]
+
+
+def segment(
+    char_ids: np.ndarray,
+    n_columns: int,
+    labels: List[str],
+    get_distances: Callable[[np.ndarray], np.ndarray],
+    window_size: int,
+    step: int,
+    switch_penalty: float,
+) -> Spans:
+    """
+    Split a text into spans of different languages.
+
+    Parameters
+    ----------
+    char_ids : np.ndarray of shape (n_chars,)
+        The column of each character of the text
+    n_columns : int
+    labels : List[str]
+        The language of each column of the distance matrices
+    get_distances : Callable[[np.ndarray], np.ndarray]
+        Maps distributions of shape (n, n_columns) to the distance to each
+        language, shape (n, len(labels))
+    window_size : int
+        Characters which describe a block, rounded to whole blocks
+    step : int
+        Characters per block; spans start and end at block boundaries
+    switch_penalty : float
+        Added to the distances of a path for each change of the language
+
+    Returns
+    -------
+    spans : Spans
+    """
+    half_width = max(window_size // step - 1, 0) // 2
+    costs = (
+        get_distances(distributions)
+        for distributions in get_window_distributions(
+            char_ids, n_columns, step, half_width
+        )
+    )
+    path = get_best_path(costs, switch_penalty)
+    return get_spans(path, labels, step, len(char_ids))
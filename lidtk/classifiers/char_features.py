@@ -2,8 +2,6 @@
 
 # Core Library modules
 import logging
-import os
-import pickle
 from collections import Counter, defaultdict
 from typing import Any, Dict, List, Optional, Set
 
@@ -12,7 +10,8 @@ import numpy as np
 import progressbar
 
 # First party modules
-import lidtk.utils
+from lidtk.artifact_cache import ArtifactCache
+from lidtk.data.encoded_batch import EncodedBatch
 
 logger = logging.getLogger(__name__)
 
@@ -90,18 +89,14 @@ class FeatureExtractor:
         distribution : np.ndarray of dtype float
             Frequency of characters
         """
-        dist = np.zeros(len(self.chars), dtype=np.float32)
-        for el in x:
-            if el in self.chars:
-                dist[self.char2index[el]] += 1.0
-            else:
-                dist[self.char2index["other"]] += 1.0
-        # Normalize
-        dist /= dist.sum()
-        return dist
+        batch = EncodedBatch.from_texts([x])
+        return batch.get_distributions(self.chars)[0].astype(np.float32)
 
     def transform_multiple(
-        self, xs, bar: Optional[progressbar.ProgressBar] = None
+        self,
+        xs,
+        bar: Optional[progressbar.ProgressBar] = None,
+        batch_size: int = 10000,
     ) -> np.ndarray:
         """
         TODO.
@@ -110,6 +105,8 @@ class FeatureExtractor:
         ----------
         xs : TODO
         bar : boolean, optional (default: False)
+        batch_size : int, optional (default: 10000)
+            Texts which are encoded at once, see EncodedBatch
 
         Returns
         -------
@@ -121,27 +118,27 @@ class FeatureExtractor:
         dists = np.zeros(target_shape)
         if bar:
             bar = progressbar.ProgressBar(redirect_stdout=True, max_value=len(xs))
-        for i in range(len(xs)):
-            dists[i] = self.transform_single(xs[i])
+        for start in range(0, len(xs), batch_size):
+            batch = EncodedBatch.from_texts(list(xs[start : start + batch_size]))
+            dists[start : start + len(batch)] = batch.get_distributions(self.chars)
             if bar:
-                bar.update(i + 1)
+                bar.update(start + len(batch))
         if bar:
             bar.finish()
         return dists
 
     def get_xs_set(self, data: Dict[Any, Any], set_name: str) -> np.ndarray:
-        """Get featureset."""
-        cfg = lidtk.utils.load_cfg()
-        train_xs_pickle = cfg["train_xs_pickle_path"].format(self.coverage, set_name)
-        if not os.path.exists(train_xs_pickle + ".npy"):
-            logger.info(f"Start creating {len(data[set_name])} x {len(self.chars)}")
-            xs = self.transform_multiple(data[set_name], bar=True)
-            # Serialize the transformed data
-            np.save(train_xs_pickle, xs)
-        else:
-            # Load the transformed data
-            xs = np.load(train_xs_pickle + ".npy")
-        return xs
+        """Get featureset; it is cached for the characters of this extractor."""
+        return ArtifactCache().get_or_create(
+            "char_features_xs",
+            {"coverage": self.coverage, "chars": self.chars, "set_name": set_name},
+            lambda: self._transform_set(data, set_name),
+            fmt="npy",
+        )
+
+    def _transform_set(self, data: Dict[Any, Any], set_name: str) -> np.ndarray:
+        logger.info(f"Start creating {len(data[set_name])} x {len(self.chars)}")
+        return self.transform_multiple(data[set_name], bar=True)
 
     def _get_common_characters(
         self, character_counter: Counter, coverage: float = 1.0
@@ -192,20 +189,13 @@ def get_features(config: Dict[str, Any], data: Dict[Any, Any]) -> Dict[Any, Any]
     features : dict
         'vectorizer' and 'xs'
     """
-    cfg = lidtk.utils.load_cfg()
-    feature_extractor_path = cfg["feature_extractor_path"].format(config["coverage"])
-    if not os.path.isfile(feature_extractor_path):
-        logger.info("Create vectorizer")
-        vectorizer = FeatureExtractor(
+    vectorizer = ArtifactCache().get_or_create(
+        "char_features_extractor",
+        {"coverage": config["coverage"]},
+        lambda: FeatureExtractor(
             data["x_train"], data["y_train"], coverage=config["coverage"]
-        )
-        # Serialize trained vectorizer
-        with open(feature_extractor_path, "wb") as f:
-            pickle.dump(vectorizer, f)
-    else:
-        # Load the trained vectorizer
-        with open(feature_extractor_path, "rb") as handle:
-            vectorizer = pickle.load(handle)
+        ),
+    )
     xs = {}
     for set_name in ["x_val", "x_train", "x_test"]:
         xs[set_name] = vectorizer.get_xs_set(data, set_name)
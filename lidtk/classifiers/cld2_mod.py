@@ -7,16 +7,62 @@ Notes
 * https://pypi.python.org/pypi/cld2-cffi
 """
 
+# Core Library modules
+import concurrent.futures
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
 # Third party modules
 import cld2
+import numpy as np
 import pkg_resources
 
 # First party modules
 import lidtk.classifiers
+import lidtk.utils
+from lidtk import resources
+
+
+def detect_chunk(
+    encoded_texts: List[bytes],
+) -> Tuple[List[str], List[bool], List[int]]:
+    """
+    Run CLD-2 on UTF-8 encoded texts.
+
+    cld2-cffi releases the GIL while CLD-2 runs, so chunks can be processed
+    by several threads in parallel.
+
+    Parameters
+    ----------
+    encoded_texts : List[bytes]
+
+    Returns
+    -------
+    language_codes, is_reliable, percent : Tuple[List[str], List[bool], List[int]]
+        CLD-2 code of the most likely language, if CLD-2 considers the
+        result reliable and the percentage of bytes in that language
+    """
+    language_codes, is_reliable, percent = [], [], []
+    for encoded in encoded_texts:
+        reliable, _, details = cld2.detect(encoded, bestEffort=True)
+        language_codes.append(details[0].language_code)
+        is_reliable.append(reliable)
+        percent.append(details[0].percent)
+    return language_codes, is_reliable, percent
 
 
 class CLD2Classifier(lidtk.classifiers.LIDClassifier):
-    """LID with the CLD-2 classifier."""
+    """
+    LID with the CLD-2 classifier.
+
+    Lists of texts are split into chunks which run on a pool of `n_jobs`
+    threads (or processes with `executor: process`).
+    """
+
+    def __init__(self, cfg_path: str, languages: Optional[List[str]] = None):
+        super().__init__(cfg_path, languages)
+        self._executor = None  # type: Optional[concurrent.futures.Executor]
+        self._labels = None  # type: Optional[np.ndarray]
 
     def predict(self, text: str) -> str:
         """
@@ -29,6 +75,111 @@ class CLD2Classifier(lidtk.classifiers.LIDClassifier):
         is_reliable, text_bytes_found, details = cld2.detect(text, bestEffort=True)
         return self.map2wili(details[0].language_code)
 
+    def predict_with_confidence(self, text: str) -> Tuple[str, float]:
+        """
+        Predict the language of a text and how reliable CLD-2 considers it.
+
+        The confidence is the share of bytes in the most likely language if
+        CLD-2 flags the result as reliable and 0 otherwise.
+
+        Parameters
+        ----------
+        text : str
+        """
+        is_reliable, text_bytes_found, details = cld2.detect(text, bestEffort=True)
+        confidence = details[0].percent / 100.0 if is_reliable else 0.0
+        return self.map2wili(details[0].language_code), confidence
+
+    def predict_bulk(self, texts: List[str]) -> List[str]:
+        """Predict the language of a list of texts in parallel."""
+        return self.detect_bulk(texts)["languages"]
+
+    def predict_bulk_ids(self, texts: List[str]) -> np.ndarray:
+        """Predict the language of a list of texts in parallel as label ids."""
+        return self.detect_bulk(texts)["ids"]
+
+    def predict_bulk_with_confidence(
+        self, texts: List[str]
+    ) -> Tuple[List[str], np.ndarray]:
+        """Predict the languages of texts and the confidence of each."""
+        results = self.detect_bulk(texts)
+        confidences = np.where(results["is_reliable"], results["percent"] / 100.0, 0)
+        return results["languages"], confidences
+
+    def detect_bulk(self, texts: List[str]) -> Dict[str, Any]:
+        """
+        Run CLD-2 on a list of texts in parallel.
+
+        Parameters
+        ----------
+        texts : List[str]
+
+        Returns
+        -------
+        results : Dict[str, Any]
+            'languages' (List[str] of ISO 369-3 codes), 'ids' (np.ndarray
+            of their label ids), 'is_reliable' (np.ndarray of bool) and
+            'percent' (np.ndarray with the percentage of bytes in the
+            predicted language)
+        """
+        encoded = [text.encode("utf8") for text in texts]
+        # Enough chunks to keep every worker busy
+        chunk_size = min(
+            self.cfg.get("chunk_size", 1000),
+            max(1, math.ceil(len(texts) / self.get_n_jobs())),
+        )
+        chunk_results = list(
+            self.executor.map(detect_chunk, lidtk.utils.chunks(encoded, chunk_size))
+        )
+        language_codes = [code for el in chunk_results for code in el[0]]
+        label_indices = np.array(
+            [self.code2index.get(code, -1) for code in language_codes], dtype=np.int64
+        )
+        return {
+            "languages": self.labels[label_indices].tolist(),
+            "ids": self.code_label_ids[label_indices],
+            "is_reliable": np.array(
+                [reliable for el in chunk_results for reliable in el[1]], dtype=bool
+            ),
+            "percent": np.array(
+                [percent for el in chunk_results for percent in el[2]], dtype=float
+            ),
+        }
+
+    @property
+    def labels(self) -> np.ndarray:
+        """Get the ISO 369-3 code of each CLD-2 code; the last one is UNK."""
+        if self._labels is None:
+            self._labels = np.array(
+                [self.map2wili(code) for code in self.code2index] + ["UNK"]
+            )
+        return self._labels
+
+    def get_n_jobs(self) -> int:
+        """Get the number of workers; `n_jobs` or the CPU budget."""
+        n_jobs = self.cfg.get("n_jobs")
+        if n_jobs is None:
+            n_jobs = resources.get_cpu_budget()
+        return n_jobs
+
+    @property
+    def executor(self) -> concurrent.futures.Executor:
+        """Get the pool which runs CLD-2."""
+        if self._executor is None:
+            n_jobs = self.get_n_jobs()
+            if self.cfg.get("executor", "thread") == "process":
+                initializer, initargs = resources.get_worker_initializer(n_jobs)
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    n_jobs, initializer=initializer, initargs=initargs
+                )
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(n_jobs)
+        return self._executor
+
+    def reset_after_fork(self) -> None:
+        """Drop the pool of the parent process."""
+        self._executor = None
+
 
 path = "classifiers/config/cld2.yaml"
 filepath = pkg_resources.resource_filename("lidtk", path)
@@ -0,0 +1,252 @@
+"""
+Run classification with the detectlanguage.com web service.
+
+Notes
+-----
+* Create an API key at https://detectlanguage.com and export it as
+  DETECTLANGUAGE_API_KEY (see `api_key_env` in detectlanguage.yaml).
+* See https://detectlanguage.com/documentation
+"""
+
+# Core Library modules
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+# Third party modules
+import click
+import numpy as np
+import pkg_resources
+
+# First party modules
+import lidtk.classifiers
+from lidtk.classifiers import http_mock
+from lidtk.classifiers.http_service import HTTPServiceClient
+
+logger = logging.getLogger(__name__)
+
+
+def get_batches(
+    texts: List[str], batch_size: int, max_batch_bytes: int
+) -> List[List[str]]:
+    """
+    Split texts into consecutive batches which respect the request limits.
+
+    A text which is longer than max_batch_bytes on its own gets its own
+    batch.
+
+    Parameters
+    ----------
+    texts : List[str]
+    batch_size : int
+        Maximum number of texts per batch
+    max_batch_bytes : int
+        Maximum number of UTF-8 bytes per batch
+
+    Returns
+    -------
+    batches : List[List[str]]
+
+    Examples
+    --------
+    >>> get_batches(["a", "bb", "ccc", "d"], batch_size=3, max_batch_bytes=4)
+    [['a', 'bb'], ['ccc', 'd']]
+    """
+    batches = []  # type: List[List[str]]
+    batch = []  # type: List[str]
+    batch_bytes = 0
+    for text in texts:
+        n_bytes = len(text.encode("utf8"))
+        if batch and (
+            len(batch) == batch_size or batch_bytes + n_bytes > max_batch_bytes
+        ):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(text)
+        batch_bytes += n_bytes
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class DetectLanguageClassifier(lidtk.classifiers.LIDClassifier):
+    """
+    LID with the detectlanguage.com web service.
+
+    Lists of texts are sent in batches which respect `batch_size` and
+    `max_batch_bytes`. At most `max_in_flight` requests run at the same
+    time and at most `requests_per_second` are started.
+    """
+
+    def __init__(self, cfg_path: str, languages: Optional[List[str]] = None):
+        super().__init__(cfg_path, languages)
+        self._client = None  # type: Optional[HTTPServiceClient]
+
+    @property
+    def client(self) -> HTTPServiceClient:
+        """Get the client of the detectlanguage API."""
+        if self._client is None:
+            api_key = os.environ.get(self.cfg["api_key_env"], "")
+            self._client = HTTPServiceClient(
+                self.cfg["api_url"],
+                headers={"Authorization": f"Bearer {api_key}"},
+                timeout=self.cfg["timeout"],
+                max_retries=self.cfg["max_retries"],
+                backoff=self.cfg["backoff"],
+                max_in_flight=self.cfg["max_in_flight"],
+                requests_per_second=self.cfg["requests_per_second"],
+            )
+        return self._client
+
+    def reset_after_fork(self) -> None:
+        """Drop the thread pool and connections of the parent process."""
+        if self._client is not None:
+            self._client.reset_after_fork()
+
+    def detect_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Detect the languages of texts with a single request.
+
+        Parameters
+        ----------
+        texts : List[str]
+
+        Returns
+        -------
+        detections : List[Dict[str, Any]]
+            The most likely detection of each text with the keys 'language'
+            (detectlanguage's code), 'confidence' and 'isReliable'. The
+            language is None if the service did not detect any.
+        """
+        response = self.client.request("POST", "detect", {"q": texts})
+        return [
+            el[0] if el else {"language": None, "confidence": 0.0}
+            for el in response["data"]["detections"]
+        ]
+
+    def predict(self, text: str) -> str:
+        """
+        Predicting the language of a text.
+
+        Parameters
+        ----------
+        text : str
+        """
+        return self.predict_bulk([text])[0]
+
+    def predict_bulk(self, texts: List[str]) -> List[str]:
+        """Predict the language of a list of texts with concurrent requests."""
+        return self.predict_bulk_with_confidence(texts)[0]
+
+    def predict_bulk_with_confidence(
+        self, texts: List[str]
+    ) -> Tuple[List[str], np.ndarray]:
+        """
+        Predict the languages of texts and the service's confidence of each.
+
+        The confidence of detectlanguage is not bounded; higher is better.
+        """
+        batches = get_batches(
+            texts, self.cfg["batch_size"], self.cfg["max_batch_bytes"]
+        )
+        detections = [
+            detection
+            for batch_detections in self.client.map(self.detect_batch, batches)
+            for detection in batch_detections
+        ]
+        languages = [self.map2wili(el["language"]) for el in detections]
+        confidences = np.array([el["confidence"] for el in detections], dtype=float)
+        return languages, confidences
+
+    def get_supported_languages(self) -> List[Dict[str, str]]:
+        """Get the code and name of the languages detectlanguage supports."""
+        return self.client.request("GET", "languages")
+
+
+mock_api_path = "/0.2"
+# detectlanguage's code for the dominant script of a text, see get_mock_routes
+mock_script_languages = {
+    "Arabic": "ar",
+    "Armenian": "hy",
+    "Cyrillic": "ru",
+    "Georgian": "ka",
+    "Greek": "el",
+    "Han": "zh",
+    "Hangul": "ko",
+    "Hebrew": "iw",
+    "Latin": "en",
+    "Thai": "th",
+}
+
+
+def get_mock_routes(
+    batch_size: int = 100, max_batch_bytes: int = 65536
+) -> Dict[Tuple[str, str], Any]:
+    """
+    Get the routes of a local stand-in for the detectlanguage API.
+
+    The stand-in detects the language by the dominant script of a text and
+    rejects requests above the batch limits, like the service does.
+
+    Parameters
+    ----------
+    batch_size : int, optional (default: 100)
+    max_batch_bytes : int, optional (default: 65536)
+
+    Returns
+    -------
+    routes : Dict[Tuple[str, str], Any]
+        See lidtk.classifiers.http_mock.MockService
+    """
+
+    def check_batch(texts: List[str]) -> Optional[Tuple[int, Any]]:
+        n_bytes = sum(len(text.encode("utf8")) for text in texts)
+        if len(texts) > batch_size or (len(texts) > 1 and n_bytes > max_batch_bytes):
+            return 413, {"error": {"code": 413, "message": "Batch too large"}}
+        return None
+
+    return http_mock.get_script_routes(
+        mock_api_path,
+        mock_script_languages,
+        lambda code: (
+            []
+            if code is None
+            else [{"language": code, "isReliable": True, "confidence": 10.0}]
+        ),
+        lambda languages: languages,
+        unknown="xxx",
+        check_batch=check_batch,
+    )
+
+
+path = "classifiers/config/detectlanguage.yaml"
+filepath = pkg_resources.resource_filename("lidtk", path)
+classifier = DetectLanguageClassifier(filepath)
+
+
+###############################################################################
+# CLI                                                                         #
+###############################################################################
+entry_point = lidtk.classifiers.classifier_cli_factor(classifier)
+
+
+@entry_point.command(name="list-languages")
+def list_languages() -> None:
+    """List all available languages."""
+    for language in classifier.get_supported_languages():
+        print("{name} ({code})".format(**language))
+
+
+@entry_point.command(name="mock-server")
+@click.option("--port", default=8081, show_default=True)
+@click.option("--latency", default=0.0, show_default=True, help="Seconds per request")
+def mock_server(port: int, latency: float) -> None:
+    """
+    Run a local stand-in for the detectlanguage API.
+
+    Set `api_url` to http://127.0.0.1:PORT/0.2 to use it.
+    """
+    routes = get_mock_routes(
+        classifier.cfg["batch_size"], classifier.cfg["max_batch_bytes"]
+    )
+    http_mock.serve(routes, mock_api_path, latency, port)
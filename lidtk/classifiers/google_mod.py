@@ -3,19 +3,78 @@ Run classification with Google Cloud.
 
 Notes
 -----
-* Install Google Cloud SDK first: https://cloud.google.com/sdk/downloads?hl=de
+* Uses the REST API of Google Cloud Translation (v2). Create an API key and
+  export it as GOOGLE_API_KEY (see `api_key_env` in google-cloud.yaml).
 * See https://cloud.google.com/translate/docs/detecting-language
 """
 
+# Core Library modules
+import logging
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
 # Third party modules
+import click
+import numpy as np
 import pkg_resources
 
 # First party modules
 import lidtk.classifiers
+import lidtk.utils
+from lidtk.classifiers import http_mock
+from lidtk.classifiers.http_service import HTTPServiceClient
+
+logger = logging.getLogger(__name__)
 
 
 class GCClassifier(lidtk.classifiers.LIDClassifier):
-    """LID with the Google Cloud classifier."""
+    """
+    LID with the Google Cloud classifier.
+
+    The HTTP client is created once. Lists of texts are sent in requests
+    of up to `batch_size` texts, with at most `max_in_flight` requests at
+    the same time.
+    """
+
+    def __init__(self, cfg_path: str, languages: Optional[List[str]] = None):
+        super().__init__(cfg_path, languages)
+        self._client = None  # type: Optional[HTTPServiceClient]
+
+    @property
+    def client(self) -> HTTPServiceClient:
+        """Get the client of the Translation API."""
+        if self._client is None:
+            self._client = HTTPServiceClient(
+                self.cfg["api_url"],
+                params={"key": os.environ.get(self.cfg["api_key_env"], "")},
+                timeout=self.cfg["timeout"],
+                max_retries=self.cfg["max_retries"],
+                backoff=self.cfg["backoff"],
+                max_in_flight=self.cfg["max_in_flight"],
+            )
+        return self._client
+
+    def reset_after_fork(self) -> None:
+        """Drop the thread pool and connections of the parent process."""
+        if self._client is not None:
+            self._client.reset_after_fork()
+
+    def detect_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Detect the languages of texts with a single request.
+
+        Parameters
+        ----------
+        texts : List[str]
+
+        Returns
+        -------
+        detections : List[Dict[str, Any]]
+            The most likely detection of each text with the keys 'language'
+            (Google's code), 'confidence' and 'isReliable'
+        """
+        response = self.client.request("POST", "detect", {"q": texts})
+        return [el[0] for el in response["data"]["detections"]]
 
     def predict(self, text: str) -> str:
         """
@@ -25,12 +84,73 @@ class GCClassifier(lidtk.classifiers.LIDClassifier):
         ----------
         text : str
         """
-        # Third party modules
-        from google.cloud import translate
-
-        translate_client = translate.Client()
-        result = translate_client.detect_language(text)
-        return result["language"]
+        return self.predict_bulk([text])[0]
+
+    def predict_bulk(self, texts: List[str]) -> List[str]:
+        """Predict the language of a list of texts with concurrent requests."""
+        return self.predict_bulk_with_confidence(texts)[0]
+
+    def predict_bulk_with_confidence(
+        self, texts: List[str]
+    ) -> Tuple[List[str], np.ndarray]:
+        """Predict the languages of texts and Google's confidence of each."""
+        batches = lidtk.utils.chunks(texts, self.cfg["batch_size"])
+        detections = [
+            detection
+            for batch_detections in self.client.map(self.detect_batch, batches)
+            for detection in batch_detections
+        ]
+        languages = [self.map2wili(el["language"]) for el in detections]
+        confidences = np.array([el.get("confidence", 0.0) for el in detections])
+        return languages, confidences
+
+    def get_supported_languages(self) -> List[Dict[str, str]]:
+        """Get the code and English name of the languages Google supports."""
+        response = self.client.request("GET", "languages", params={"target": "en"})
+        return response["data"]["languages"]
+
+
+mock_api_path = "/language/translate/v2"
+# Google's code for the dominant script of a text, see get_mock_routes
+mock_script_languages = {
+    "Arabic": "ar",
+    "Cyrillic": "ru",
+    "Greek": "el",
+    "Han": "zh",
+    "Hangul": "ko",
+    "Hebrew": "iw",
+    "Latin": "en",
+    "Thai": "th",
+}
+
+
+def get_mock_routes() -> Dict[Tuple[str, str], Any]:
+    """
+    Get the routes of a local stand-in for the Translation API.
+
+    The stand-in detects the language by the dominant script of a text,
+    which is enough for tests and for benchmarking the client.
+
+    Returns
+    -------
+    routes : Dict[Tuple[str, str], Any]
+        See lidtk.classifiers.http_mock.MockService
+    """
+    return http_mock.get_script_routes(
+        mock_api_path,
+        mock_script_languages,
+        lambda code: [
+            {"language": code or "und", "confidence": 1.0, "isReliable": False}
+        ],
+        lambda languages: {
+            "data": {
+                "languages": [
+                    {"language": el["code"], "name": el["name"]} for el in languages
+                ]
+            }
+        },
+        unknown="und",
+    )
 
 
 path = "classifiers/config/google-cloud.yaml"
@@ -47,12 +167,17 @@ entry_point = lidtk.classifiers.classifier_cli_factor(classifier)
 @entry_point.command(name="list-languages")
 def list_languages() -> None:
     """List all available languages."""
-    # Third party modules
-    from google.cloud import translate
+    for language in classifier.get_supported_languages():
+        print("{name} ({language})".format(**language))
 
-    translate_client = translate.Client()
 
-    results = translate_client.get_languages()
+@entry_point.command(name="mock-server")
+@click.option("--port", default=8080, show_default=True)
+@click.option("--latency", default=0.0, show_default=True, help="Seconds per request")
+def mock_server(port: int, latency: float) -> None:
+    """
+    Run a local stand-in for the Translation API.
 
-    for language in results:
-        print("{name} ({language})".format(**language))
+    Set `api_url` to http://127.0.0.1:PORT/language/translate/v2 to use it.
+    """
+    http_mock.serve(get_mock_routes(), mock_api_path, latency, port)
@@ -0,0 +1,254 @@
+"""
+A local stand-in for language identification web services.
+
+It serves JSON routes from a background thread, so web service classifiers
+can be tested and benchmarked without network access.
+"""
+
+# Core Library modules
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# First party modules
+from lidtk.data import unicode_data
+
+# A route gets the decoded JSON body (or the query parameters of a GET
+# request) and returns the status code and the JSON response
+Route = Callable[[Any], Tuple[int, Any]]
+
+
+def get_dominant_scripts(texts: List[str]) -> List[Optional[str]]:
+    """
+    Get the most common script of each text.
+
+    Stand-in services use it to "detect" languages, which is enough for
+    tests and for benchmarking clients.
+
+    Parameters
+    ----------
+    texts : List[str]
+
+    Returns
+    -------
+    scripts : List[Optional[str]]
+        None for texts without letters of a script, e.g. digits only
+
+    Examples
+    --------
+    >>> get_dominant_scripts(["Hello", "Привет", "123"])
+    ['Latin', 'Cyrillic', None]
+    """
+    scripts = unicode_data.get_scripts()
+    counts = unicode_data.get_script_counts(texts)
+    counts[:, [scripts.index(name) for name in unicode_data.NEUTRAL_SCRIPTS]] = 0
+    return [
+        scripts[int(text_counts.argmax())] if text_counts.sum() > 0 else None
+        for text_counts in counts
+    ]
+
+
+def get_script_routes(
+    api_path: str,
+    script_languages: Dict[str, str],
+    format_detection: Callable[[Optional[str]], Any],
+    format_languages: Callable[[List[Dict[str, str]]], Any],
+    unknown: Optional[str] = None,
+    check_batch: Optional[Callable[[List[str]], Optional[Tuple[int, Any]]]] = None,
+) -> Dict[Tuple[str, str], Route]:
+    """
+    Get the detect and languages routes of a stand-in service.
+
+    The stand-in detects the language of a text by its dominant script, see
+    get_dominant_scripts. Services differ only in the format of their
+    responses.
+
+    Parameters
+    ----------
+    api_path : str
+        The routes are POST {api_path}/detect and GET {api_path}/languages
+    script_languages : Dict[str, str]
+        The service's code for the dominant script of a text
+    format_detection : Callable[[Optional[str]], Any]
+        Gets the code of the language of a text (None if the text has no
+        dominant script) and returns the service's detections of the text
+    format_languages : Callable[[List[Dict[str, str]]], Any]
+        Gets the 'code' and 'name' of the languages and returns the
+        response of the languages route
+    unknown : str, optional (default: None)
+        The code for scripts which are not in script_languages
+    check_batch : Callable, optional (default: accept all batches)
+        Gets the texts of a detect request and returns the status code and
+        response of a rejection, or None to accept them
+
+    Returns
+    -------
+    routes : Dict[Tuple[str, str], Route]
+
+    Examples
+    --------
+    >>> routes = get_script_routes(
+    ...     "/v1", {"Latin": "en"}, lambda code: code, lambda langs: langs
+    ... )
+    >>> routes[("POST", "/v1/detect")]({"q": ["Hello", "Привет", "1"]})
+    (200, {'data': {'detections': ['en', None, None]}})
+    """
+
+    def detect(payload: Dict[str, Any]) -> Tuple[int, Any]:
+        texts = payload["q"] if isinstance(payload["q"], list) else [payload["q"]]
+        if check_batch is not None:
+            rejection = check_batch(texts)
+            if rejection is not None:
+                return rejection
+        detections = [
+            format_detection(
+                None if script is None else script_languages.get(script, unknown)
+            )
+            for script in get_dominant_scripts(texts)
+        ]
+        return 200, {"data": {"detections": detections}}
+
+    def languages(params: Dict[str, str]) -> Tuple[int, Any]:
+        return 200, format_languages(
+            [
+                {"code": code, "name": script}
+                for script, code in sorted(script_languages.items())
+            ]
+        )
+
+    return {
+        ("POST", f"{api_path}/detect"): detect,
+        ("GET", f"{api_path}/languages"): languages,
+    }
+
+
+def serve(
+    routes: Dict[Tuple[str, str], Route], api_path: str, latency: float, port: int
+) -> None:
+    """Run a MockService until Ctrl+C is pressed."""
+    with MockService(routes, latency=latency, port=port) as service:
+        print(f"Serving at {service.base_url}{api_path} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+class MockService:
+    """
+    Local HTTP server with JSON routes.
+
+    Parameters
+    ----------
+    routes : Dict[Tuple[str, str], Route]
+        Maps (method, path) to a route, e.g. ("POST", "/v2/detect")
+    latency : float, optional (default: 0)
+        Seconds each request takes
+    fail_first : int, optional (default: 0)
+        Answer that many requests with HTTP 503 first, to test retries
+    port : int, optional (default: 0)
+        0 picks a free port
+
+    Examples
+    --------
+    >>> routes = {("GET", "/ping"): lambda params: (200, {"pong": True})}
+    >>> with MockService(routes) as service:
+    ...     service.base_url.startswith("http://127.0.0.1:")
+    True
+    """
+
+    def __init__(
+        self,
+        routes: Dict[Tuple[str, str], Route],
+        latency: float = 0.0,
+        fail_first: int = 0,
+        port: int = 0,
+    ):
+        self.routes = routes
+        self.latency = latency
+        self.fail_first = fail_first
+        self.n_requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Get the URL of the server."""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockService":
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the server."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "MockService":
+        return self.start()
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+    def handle(self, method: str, raw_path: str, body: bytes) -> Tuple[int, Any]:
+        """Answer a request."""
+        with self._lock:
+            self.n_requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            should_fail = self.n_requests <= self.fail_first
+        try:
+            time.sleep(self.latency)
+            if should_fail:
+                return 503, {"error": "unavailable"}
+            url = urllib.parse.urlsplit(raw_path)
+            route = self.routes.get((method, url.path))
+            if route is None:
+                return 404, {"error": f"no route for {method} {url.path}"}
+            if method == "GET":
+                return route(dict(urllib.parse.parse_qsl(url.query)))
+            return route(json.loads(body.decode("utf8")) if body else None)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _make_handler(self) -> type:
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep connections alive
+
+            def _answer(self, method: str) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                status, response = service.handle(
+                    method, self.path, self.rfile.read(length)
+                )
+                data = json.dumps(response).encode("utf8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                self._answer("GET")
+
+            def do_POST(self) -> None:
+                self._answer("POST")
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
@@ -0,0 +1,216 @@
+"""
+A small JSON-over-HTTP client for language identification web services.
+
+The client keeps one connection per thread alive, sends requests
+concurrently with a bound on the number of requests in flight and retries
+failed requests with exponential backoff.
+"""
+
+# Core Library modules
+import concurrent.futures
+import http.client
+import json
+import logging
+import random
+import socket
+import threading
+import time
+import urllib.parse
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Status codes of responses which are worth retrying
+retry_status_codes = [408, 429, 500, 502, 503, 504]
+
+
+class ServiceError(Exception):
+    """A request to a web service failed."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+
+
+class RateLimiter:
+    """
+    Space out events so that at most `rate` happen per second.
+
+    Parameters
+    ----------
+    rate : float, optional (default: None)
+        Events per second; None means no limit
+    """
+
+    def __init__(self, rate: Optional[float] = None):
+        self.interval = 0.0 if not rate else 1.0 / rate
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Block until the next event may happen."""
+        if self.interval == 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_time)
+            self._next_time = start + self.interval
+        time.sleep(start - now)
+
+
+class HTTPServiceClient:
+    """
+    Client for a JSON web service.
+
+    Parameters
+    ----------
+    base_url : str
+        e.g. https://translation.googleapis.com/language/translate/v2
+    params : Dict[str, str], optional (default: None)
+        Query parameters which are sent with every request, e.g. an API key
+    headers : Dict[str, str], optional (default: None)
+        Headers which are sent with every request
+    timeout : float, optional (default: 30)
+        Seconds until a request times out
+    max_retries : int, optional (default: 5)
+    backoff : float, optional (default: 0.5)
+        Seconds to wait before the first retry; doubled for each retry
+    max_in_flight : int, optional (default: 8)
+        Maximum number of concurrent requests of `map`
+    requests_per_second : float, optional (default: None)
+        Rate limit for all requests including retries; None means no limit
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        params: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 30.0,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        max_in_flight: int = 8,
+        requests_per_second: Optional[float] = None,
+    ):
+        url = urllib.parse.urlsplit(base_url)
+        self.scheme = url.scheme
+        self.netloc = url.netloc
+        self.base_path = url.path.rstrip("/")
+        self.params = params or {}
+        self.headers = {"Content-Type": "application/json; charset=utf-8"}
+        self.headers.update(headers or {})
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_in_flight = max_in_flight
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self._local = threading.local()
+        self._executor = None  # type: Optional[concurrent.futures.Executor]
+
+    def reset_after_fork(self) -> None:
+        """Drop the thread pool and connections of the parent process."""
+        self._local = threading.local()
+        self._executor = None
+        self.rate_limiter._lock = threading.Lock()
+
+    def _get_connection(self) -> http.client.HTTPConnection:
+        """Get the connection of the current thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if self.scheme == "https":
+                connection = http.client.HTTPSConnection(
+                    self.netloc, timeout=self.timeout
+                )
+            else:
+                connection = http.client.HTTPConnection(
+                    self.netloc, timeout=self.timeout
+                )
+            self._local.connection = connection
+        return connection
+
+    def _close_connection(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        payload: Any = None,
+        params: Optional[Dict[str, str]] = None,
+    ) -> Any:
+        """
+        Send a request and return the decoded JSON response.
+
+        Parameters
+        ----------
+        method : str
+            e.g. GET or POST
+        path : str
+            Relative to the base URL
+        payload : Any, optional (default: None)
+            Is sent as JSON body
+        params : Dict[str, str], optional (default: None)
+            Query parameters in addition to the ones of the client
+
+        Returns
+        -------
+        response : Any
+
+        Raises
+        ------
+        ServiceError
+            If the request failed and retrying did not help
+        """
+        query = urllib.parse.urlencode({**self.params, **(params or {})})
+        url = f"{self.base_path}/{path.lstrip('/')}"
+        if query:
+            url += f"?{query}"
+        body = None if payload is None else json.dumps(payload).encode("utf8")
+        for attempt in range(self.max_retries + 1):
+            retry_after = None  # type: Optional[float]
+            self.rate_limiter.wait()
+            try:
+                connection = self._get_connection()
+                connection.request(method, url, body=body, headers=self.headers)
+                response = connection.getresponse()
+                data = response.read()
+                if response.status < 300:
+                    return json.loads(data.decode("utf8"))
+                error = ServiceError(response.status, data.decode("utf8", "replace"))
+                if response.status not in retry_status_codes:
+                    raise error
+                if response.getheader("Retry-After", "").isdigit():
+                    retry_after = float(response.getheader("Retry-After"))
+            except (http.client.HTTPException, OSError, socket.timeout) as e:
+                self._close_connection()
+                error = ServiceError(0, str(e))
+            if attempt == self.max_retries:
+                raise error
+            if retry_after is None:
+                retry_after = self.backoff * 2**attempt * (1 + random.random())
+            logger.warning(f"{error}; retry in {retry_after:0.2f}s")
+            time.sleep(retry_after)
+        raise AssertionError("unreachable")
+
+    def map(self, function: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+        """
+        Apply a function which sends requests to items concurrently.
+
+        At most `max_in_flight` calls run at the same time.
+
+        Parameters
+        ----------
+        function : Callable[[Any], Any]
+        items : Iterable[Any]
+
+        Returns
+        -------
+        results : List[Any]
+            In the order of items
+        """
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(self.max_in_flight)
+        return list(self._executor.map(function, items))
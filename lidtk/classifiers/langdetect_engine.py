@@ -0,0 +1,223 @@
+"""
+A vectorized implementation of langdetect.
+
+langdetect scores a text by multiplying, one n-gram at a time, the
+probabilities of randomly sampled n-grams of the text in pure Python. This
+module loads the profiles of a langdetect DetectorFactory once into a
+(n_ngrams, n_langs) matrix and scores all n-grams of a batch of texts with
+a few matrix operations.
+
+Text normalization and n-gram extraction are done by langdetect itself, so
+both see exactly the same n-grams.
+"""
+
+# Core Library modules
+from typing import List
+
+# Third party modules
+import numpy as np
+import scipy.sparse
+from langdetect.detector import Detector
+from langdetect.detector_factory import DetectorFactory
+from langdetect.language import Language
+
+modes = ["deterministic", "sampled"]
+
+
+class LangdetectEngine:
+    """
+    Score texts with the profiles of a langdetect DetectorFactory.
+
+    Parameters
+    ----------
+    factory : DetectorFactory
+        With loaded profiles
+    mode : str, optional (default: "deterministic")
+        "deterministic" multiplies the probabilities of all n-grams of a
+        text (Naive Bayes). "sampled" runs langdetect's randomized trials:
+        n-grams are sampled until the most likely language has a
+        probability above Detector.CONV_THRESHOLD.
+    alpha : float, optional (default: Detector.ALPHA_DEFAULT)
+        Smoothing of the n-gram probabilities
+    n_trial : int, optional (default: 7)
+        Number of trials in the sampled mode
+    seed : int, optional (default: 0)
+        Seed for the sampled mode. Each text is scored with a freshly seeded
+        random number generator, like langdetect does.
+    """
+
+    def __init__(
+        self,
+        factory: DetectorFactory,
+        mode: str = "deterministic",
+        alpha: float = Detector.ALPHA_DEFAULT,
+        n_trial: int = 7,
+        seed: int = 0,
+    ):
+        if mode not in modes:
+            raise ValueError(f"mode='{mode}' is not one of {modes}")
+        self.factory = factory
+        self.mode = mode
+        self.alpha = alpha
+        self.n_trial = n_trial
+        self.seed = seed
+        self.languages = list(factory.langlist)
+        self.vocabulary = {
+            ngram: index for index, ngram in enumerate(factory.word_lang_prob_map)
+        }
+        # probabilities[ngram_id, language_index]
+        self.probabilities = np.array(
+            list(factory.word_lang_prob_map.values()), dtype=np.float32
+        ).reshape(len(self.vocabulary), len(self.languages))
+        self.log_probabilities = np.log(
+            self.probabilities + np.float32(alpha / Detector.BASE_FREQ)
+        )
+
+    def get_ngram_ids(self, text: str) -> np.ndarray:
+        """
+        Get the n-grams of a text as langdetect extracts them.
+
+        Parameters
+        ----------
+        text : str
+
+        Returns
+        -------
+        ngram_ids : np.ndarray
+            Row indices of the n-grams, with repetitions
+        """
+        detector = self.factory.create()
+        detector.append(text)
+        detector.cleaning_text()
+        ngrams = detector._extract_ngrams()
+        return np.fromiter(
+            (self.vocabulary[ngram] for ngram in ngrams),
+            dtype=np.int64,
+            count=len(ngrams),
+        )
+
+    def get_probabilities_bulk(self, texts: List[str]) -> np.ndarray:
+        """
+        Get the probability of each language for each text.
+
+        Parameters
+        ----------
+        texts : List[str]
+
+        Returns
+        -------
+        probabilities : np.ndarray of shape (len(texts), n_langs)
+            Rows of texts without any known n-gram are 0
+        """
+        ngram_ids = [self.get_ngram_ids(text) for text in texts]
+        if self.mode == "sampled":
+            probabilities = np.zeros((len(texts), len(self.languages)))
+            for i, text_ngram_ids in enumerate(ngram_ids):
+                if len(text_ngram_ids) > 0:
+                    probabilities[i] = self._sample_probabilities(text_ngram_ids)
+            return probabilities
+        lengths = np.array([len(ids) for ids in ngram_ids], dtype=np.int64)
+        indptr = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.concatenate(ngram_ids) if len(texts) > 0 else np.zeros(0, int)
+        # counts[text_index, ngram_id]; duplicate entries are summed
+        counts = scipy.sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.float32), indices, indptr),
+            shape=(len(texts), len(self.vocabulary)),
+        )
+        scores = np.asarray(counts @ self.log_probabilities, dtype=np.float64)
+        probabilities = softmax(scores)
+        probabilities[lengths == 0] = 0.0
+        return probabilities
+
+    def _sample_probabilities(self, ngram_ids: np.ndarray) -> np.ndarray:
+        """
+        Run langdetect's randomized trials for one text.
+
+        All trials are computed at once, in blocks of n-gram samples, until
+        each trial converged or reached Detector.ITERATION_LIMIT.
+        """
+        rng = np.random.default_rng(self.seed)
+        weights = (
+            self.alpha + rng.standard_normal(self.n_trial) * Detector.ALPHA_WIDTH
+        ) / Detector.BASE_FREQ
+        n_langs = len(self.languages)
+        log_likelihood = np.zeros((self.n_trial, n_langs))
+        result = np.zeros((self.n_trial, n_langs))
+        running = np.ones(self.n_trial, dtype=bool)
+        block_size = 50  # multiple of 5, the check interval of langdetect
+        for start in range(0, Detector.ITERATION_LIMIT + 1, block_size):
+            n_steps = min(block_size, Detector.ITERATION_LIMIT + 1 - start)
+            samples = rng.choice(ngram_ids, size=(running.sum(), n_steps))
+            steps = np.log(self.probabilities[samples] + weights[running, None, None])
+            cumulative = log_likelihood[running, None, :] + np.cumsum(steps, axis=1)
+            # langdetect checks for convergence after the steps 0, 5, 10, ...
+            checked = cumulative[:, (-start) % 5 :: 5, :]
+            converged = softmax(checked).max(axis=2) > Detector.CONV_THRESHOLD
+            if start + n_steps > Detector.ITERATION_LIMIT:
+                converged[:, -1] = True
+            for row, trial in enumerate(np.flatnonzero(running)):
+                if converged[row].any():
+                    result[trial] = softmax(checked[row, np.argmax(converged[row])])
+                    running[trial] = False
+                else:
+                    log_likelihood[trial] = cumulative[row, -1]
+            if not running.any():
+                break
+        return result.mean(axis=0)
+
+    def predict_proba_bulk(self, texts: List[str]) -> List[List[Language]]:
+        """
+        Get the likely languages of each text like Detector.get_probabilities.
+
+        Parameters
+        ----------
+        texts : List[str]
+
+        Returns
+        -------
+        languages : List[List[Language]]
+            For each text the languages with a probability above
+            Detector.PROB_THRESHOLD, most likely first
+        """
+        results = []
+        for probabilities in self.get_probabilities_bulk(texts):
+            languages = [
+                Language(self.languages[index], float(probabilities[index]))
+                for index in np.flatnonzero(probabilities > Detector.PROB_THRESHOLD)
+            ]
+            results.append(sorted(languages, reverse=True))
+        return results
+
+    def detect_bulk(self, texts: List[str]) -> List[str]:
+        """
+        Get the most likely language of each text like Detector.detect.
+
+        Parameters
+        ----------
+        texts : List[str]
+
+        Returns
+        -------
+        languages : List[str]
+            langdetect codes; Detector.UNKNOWN_LANG for texts without known
+            n-grams
+        """
+        probabilities = self.get_probabilities_bulk(texts)
+        return [
+            self.languages[index] if row[index] > 0 else Detector.UNKNOWN_LANG
+            for row, index in zip(probabilities, probabilities.argmax(axis=1))
+        ]
+
+
+def softmax(scores: np.ndarray) -> np.ndarray:
+    """
+    Normalize log-likelihoods along the last axis to probabilities.
+
+    Examples
+    --------
+    >>> softmax(np.log(np.array([[1.0, 3.0]]))).tolist()
+    [[0.25, 0.75]]
+    """
+    exp = np.exp(scores - scores.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
@@ -8,21 +8,105 @@ Notes
 """
 
 # Core Library modules
-from typing import Any, Dict, List
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
 
 # Third party modules
 import click
+import numpy as np
 import pkg_resources
-from langdetect import DetectorFactory, detect, detect_langs
+from langdetect.detector import Detector
+from langdetect.detector_factory import PROFILES_DIRECTORY, DetectorFactory
 
 # First party modules
 import lidtk.classifiers
+from lidtk.classifiers.langdetect_engine import LangdetectEngine
+from lidtk.data import label_table, wili
+
+logger = logging.getLogger(__name__)
 
 DetectorFactory.seed = 0  # Make sure we get consistent results
 
 
 class LangdetectClassifier(lidtk.classifiers.LIDClassifier):
-    """LID with the Langdetect classifier."""
+    """
+    LID with the Langdetect classifier.
+
+    If the classifier is restricted to some languages, only their profiles
+    are loaded. With `engine: numpy` in the config, texts are scored by the
+    vectorized LangdetectEngine instead of the langdetect library.
+    """
+
+    def __init__(self, cfg_path: str, languages: Optional[List[str]] = None):
+        super().__init__(cfg_path, languages)
+        self._factory = None  # type: Optional[DetectorFactory]
+        self._engine = None  # type: Optional[LangdetectEngine]
+        self._profile_codes = None  # type: Optional[List[str]]
+
+    def get_profile_codes(self) -> List[str]:
+        """Get the langdetect codes of the profiles of the languages."""
+        if self._profile_codes is None:
+            self._profile_codes = [
+                code
+                for code in sorted(os.listdir(PROFILES_DIRECTORY))
+                if self.languages is None or self.map2wili(code) != "UNK"
+            ]
+        return self._profile_codes
+
+    def get_fixed_prediction(self) -> Optional[str]:
+        """
+        Get the prediction for all texts if there is nothing to choose from.
+
+        langdetect needs at least two profiles, so a classifier restricted
+        to a single langdetect language always predicts it (and UNK without
+        any).
+
+        Returns
+        -------
+        language : str, optional
+            None if there are at least two profiles
+        """
+        codes = self.get_profile_codes()
+        if len(codes) >= 2:
+            return None
+        return self.map2wili(codes[0]) if codes else "UNK"
+
+    @property
+    def factory(self) -> DetectorFactory:
+        """Get the DetectorFactory with the profiles of the languages."""
+        if self._factory is None:
+            profiles = []
+            for code in self.get_profile_codes():
+                profile_path = os.path.join(PROFILES_DIRECTORY, code)
+                with open(profile_path, encoding="utf-8") as f:
+                    profiles.append(f.read())
+            factory = DetectorFactory()
+            factory.load_json_profile(profiles)
+            factory.set_seed(0)
+            self._factory = factory
+        return self._factory
+
+    @property
+    def engine(self) -> LangdetectEngine:
+        """Get the vectorized engine with the profiles of the factory."""
+        if self._engine is None:
+            self._engine = LangdetectEngine(
+                self.factory, mode=self.cfg.get("engine_mode", "deterministic")
+            )
+        return self._engine
+
+    def uses_engine(self) -> bool:
+        """Check if texts are scored by the vectorized engine."""
+        return self.cfg.get("engine", "library") == "numpy"
+
+    def get_detector(self, text: str) -> Detector:
+        """Get a langdetect Detector for a text."""
+        detector = self.factory.create()
+        detector.append(text)
+        return detector
 
     def predict(self, text: str) -> str:
         """
@@ -32,7 +116,42 @@ class LangdetectClassifier(lidtk.classifiers.LIDClassifier):
         ----------
         text : str
         """
-        return self.map2wili(detect(text))
+        fixed = self.get_fixed_prediction()
+        if fixed is not None:
+            return fixed
+        if self.uses_engine():
+            return self.predict_bulk([text])[0]
+        return self.map2wili(self.get_detector(text).detect())
+
+    def predict_bulk(self, texts: List[str]) -> List[str]:
+        """Predict the language of a list of texts."""
+        fixed = self.get_fixed_prediction()
+        if fixed is not None:
+            return [fixed] * len(texts)
+        if self.uses_engine():
+            return [self.map2wili(code) for code in self.engine.detect_bulk(texts)]
+        return super().predict_bulk(texts)
+
+    def predict_bulk_ids(self, texts: List[str]) -> np.ndarray:
+        """Predict the language of a list of texts as label ids."""
+        if not self.uses_engine() or self.get_fixed_prediction() is not None:
+            return super().predict_bulk_ids(texts)
+        # Label id of each language of the engine; the last one is UNK
+        lookup = label_table.get_label_table().encode(
+            [self.map2wili(code) for code in self.engine.languages] + ["UNK"]
+        )
+        probabilities = self.engine.get_probabilities_bulk(texts)
+        best = probabilities.argmax(axis=1)
+        # Texts without known n-grams have no probability for any language
+        best[probabilities[np.arange(len(texts)), best] <= 0] = -1
+        return lookup[best]
+
+    def predict_restricted(self, text: str, languages: List[str]) -> str:
+        """Predict the language of a text among the given languages."""
+        for el in self.predict_proba(text):  # sorted by probability
+            if el["lang"] in languages:
+                return el["lang"]
+        return "UNK"
 
     def predict_proba(self, text: str) -> List[Dict[str, Any]]:
         """
@@ -42,7 +161,13 @@ class LangdetectClassifier(lidtk.classifiers.LIDClassifier):
         ----------
         text : str
         """
-        probabilities = detect_langs(text)
+        fixed = self.get_fixed_prediction()
+        if fixed is not None:
+            return [] if fixed == "UNK" else [{"lang": fixed, "prob": 1.0}]
+        if self.uses_engine():
+            probabilities = self.engine.predict_proba_bulk([text])[0]
+        else:
+            probabilities = self.get_detector(text).get_probabilities()
         converted = []
         for el in probabilities:
             converted.append({"lang": self.map2wili(el.lang), "prob": el.prob})
@@ -71,3 +196,76 @@ def predict_proba_cli(text: str) -> None:
     text : str
     """
     print(classifier.predict_proba(text))
+
+
+@entry_point.command(name="parity")
+@click.option(
+    "--mode",
+    type=click.Choice(["deterministic", "sampled"]),
+    default="deterministic",
+    show_default=True,
+    help="Mode of the vectorized engine",
+)
+@click.option("--n_texts", type=int, help="Only use the first n test texts")
+@click.option("--batch_size", default=1000, show_default=True)
+@click.option(
+    "--result_file",
+    default="langdetect_parity.json",
+    show_default=True,
+    help="Where to store the report",
+)
+def parity_cli(
+    mode: str, n_texts: Optional[int], batch_size: int, result_file: str
+) -> None:
+    """Compare the vectorized engine with the langdetect library on WiLI."""
+    data = wili.load_data()
+    xs, ys = data["x_test"][:n_texts], data["y_test"][:n_texts]
+    engine = LangdetectEngine(classifier.factory, mode=mode)
+
+    t0 = time.time()
+    library_predictions = []
+    for text in xs:
+        try:
+            library_predictions.append(classifier.get_detector(text).detect())
+        except Exception:  # langdetect raises for texts without features
+            library_predictions.append(Detector.UNKNOWN_LANG)
+    library_time = time.time() - t0
+
+    t0 = time.time()
+    engine_predictions = []  # type: List[str]
+    for start in range(0, len(xs), batch_size):
+        engine_predictions += engine.detect_bulk(xs[start : start + batch_size])
+    engine_time = time.time() - t0
+
+    library_labels = [classifier.map2wili(code) for code in library_predictions]
+    engine_labels = [classifier.map2wili(code) for code in engine_predictions]
+    report = {
+        "mode": mode,
+        "n_texts": len(xs),
+        "agreement": sum(
+            library == engine
+            for library, engine in zip(library_predictions, engine_predictions)
+        )
+        / max(len(xs), 1),
+        "library": {
+            "accuracy": sum(y == p for y, p in zip(ys, library_labels))
+            / max(len(xs), 1),
+            "seconds": library_time,
+        },
+        "engine": {
+            "accuracy": sum(y == p for y, p in zip(ys, engine_labels))
+            / max(len(xs), 1),
+            "seconds": engine_time,
+        },
+    }
+    print(f"Texts:      {report['n_texts']}")
+    print(f"Agreement:  {report['agreement'] * 100:0.2f}%")
+    for name in ["library", "engine"]:
+        print(
+            f"{name + ':':<11} accuracy {report[name]['accuracy'] * 100:0.2f}%, "
+            f"{report[name]['seconds']:0.2f}s"
+        )
+    result_filepath = os.path.abspath(result_file)
+    with open(result_filepath, "w") as f:
+        f.write(json.dumps(report, indent=4, sort_keys=True))
+    logger.info(f"Wrote report to {result_filepath}")
@@ -0,0 +1,169 @@
+"""
+Batched feature extraction and scoring for langid.py.
+
+langid.py runs its byte-level DFA and its Naive Bayes model on one text at
+a time. This module runs the DFA on a whole batch of texts in lockstep
+with numpy and scores the batch with a single sparse-dense matrix product.
+"""
+
+# Core Library modules
+from typing import List, Optional, Tuple
+
+# Third party modules
+import numpy as np
+import scipy.sparse
+from langid.langid import LanguageIdentifier
+
+
+class LangidEngine:
+    """
+    Score batches of texts with the model of a langid LanguageIdentifier.
+
+    Parameters
+    ----------
+    identifier : LanguageIdentifier
+    norm_probs : bool, optional (default: False)
+        Return probabilities instead of log-probabilities, like a
+        LanguageIdentifier with norm_probs=True
+    """
+
+    def __init__(self, identifier: LanguageIdentifier, norm_probs: bool = False):
+        self.identifier = identifier
+        self.norm_probs = norm_probs
+        self.nextmove = np.asarray(identifier.tk_nextmove, dtype=np.int64)
+        n_states = len(self.nextmove) >> 8
+        states, features = [], []
+        for state, state_features in identifier.tk_output.items():
+            states += [state] * len(state_features)
+            features += list(state_features)
+        # state_features[state, feature]: how often entering state emits feature
+        self.state_features = scipy.sparse.csr_matrix(
+            (np.ones(len(states), dtype=np.float32), (states, features)),
+            shape=(n_states, identifier.nb_numfeats),
+        )
+        self.load_weights()
+
+    def set_languages(self, languages: Optional[List[str]] = None) -> None:
+        """
+        Restrict the languages, see LanguageIdentifier.set_languages.
+
+        Parameters
+        ----------
+        languages : List[str], optional (default: all languages of the model)
+            langid codes
+        """
+        self.identifier.set_languages(languages)
+        self.load_weights()
+
+    def load_weights(self) -> None:
+        """Copy the (restricted) Naive Bayes weights of the identifier."""
+        self.languages = list(self.identifier.nb_classes)
+        self.nb_ptc = np.asarray(self.identifier.nb_ptc, dtype=np.float32)
+        self.nb_pc = np.asarray(self.identifier.nb_pc, dtype=np.float32)
+
+    def instance2fv_bulk(self, texts: List[str]) -> scipy.sparse.csr_matrix:
+        """
+        Get the feature vectors of texts like LanguageIdentifier.instance2fv.
+
+        Parameters
+        ----------
+        texts : List[str]
+
+        Returns
+        -------
+        feature_vectors : scipy.sparse.csr_matrix of shape (len(texts), n_feats)
+        """
+        encoded = [text.encode("utf8") for text in texts]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(texts))
+        # All texts as one flat buffer; text i starts at offsets[i]
+        letters = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        offsets = np.zeros(len(texts), dtype=np.int64)
+        np.cumsum(lengths[:-1], out=offsets[1:])
+        # Longest first, so the texts which are still running are a prefix
+        order = np.argsort(-lengths, kind="stable")
+        starts = offsets[order]
+        max_length = int(lengths.max()) if len(texts) > 0 else 0
+        # n_running[position]: number of texts longer than position
+        n_running = len(texts) - np.searchsorted(
+            lengths[order][::-1], np.arange(max_length), side="right"
+        )
+        # The state after each byte, at the position of the byte
+        visited = np.zeros(len(letters), dtype=np.int32)
+        state = np.zeros(len(texts), dtype=np.int64)
+        for position in range(max_length):
+            running = n_running[position]
+            indices = starts[:running] + position
+            state[:running] = self.nextmove[(state[:running] << 8) + letters[indices]]
+            visited[indices] = state[:running]
+        rows = np.repeat(np.arange(len(texts)), lengths)
+        state_counts = scipy.sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, visited)),
+            shape=(len(texts), self.state_features.shape[0]),
+        )
+        return state_counts @ self.state_features
+
+    def nb_classprobs_bulk(self, texts: List[str]) -> np.ndarray:
+        """
+        Get the score of each language for each text.
+
+        Parameters
+        ----------
+        texts : List[str]
+
+        Returns
+        -------
+        scores : np.ndarray of shape (len(texts), n_langs)
+            Log-probabilities, or probabilities if norm_probs is set
+        """
+        scores = self.instance2fv_bulk(texts) @ self.nb_ptc + self.nb_pc
+        scores = np.asarray(scores, dtype=np.float32)
+        if self.norm_probs:
+            exp = np.exp(scores - scores.max(axis=1, keepdims=True))
+            scores = exp / exp.sum(axis=1, keepdims=True)
+        return scores
+
+    def classify_bulk(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """
+        Get the most likely language and its score for each text.
+
+        Parameters
+        ----------
+        texts : List[str]
+
+        Returns
+        -------
+        results : List[Tuple[str, float]]
+            langid code and score, like LanguageIdentifier.classify
+        """
+        scores = self.nb_classprobs_bulk(texts)
+        best = scores.argmax(axis=1)
+        return [
+            (self.languages[index], float(score))
+            for index, score in zip(best, scores[np.arange(len(texts)), best])
+        ]
+
+    def rank_bulk(self, texts: List[str], k: int = 5) -> List[List[Tuple[str, float]]]:
+        """
+        Get the k most likely languages and their scores for each text.
+
+        Parameters
+        ----------
+        texts : List[str]
+        k : int, optional (default: 5)
+
+        Returns
+        -------
+        results : List[List[Tuple[str, float]]]
+            Most likely first
+        """
+        scores = self.nb_classprobs_bulk(texts)
+        k = min(k, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        return [
+            [(self.languages[index], float(score)) for index, score in zip(row, values)]
+            for row, values in zip(top, top_scores)
+        ]
@@ -6,16 +6,50 @@ Notes
 * https://github.com/saffsd/langid.py
 """
 
+# Core Library modules
+from typing import List, Optional, Tuple
+
 # Third party modules
-import langid
+import click
+import numpy as np
 import pkg_resources
+from langid.langid import LanguageIdentifier, model
 
 # First party modules
 import lidtk.classifiers
+from lidtk.classifiers.langid_engine import LangidEngine
+from lidtk.data import label_table
 
 
 class LangidClassifier(lidtk.classifiers.LIDClassifier):
-    """LID with the Langid classifier."""
+    """
+    LID with the Langid classifier.
+
+    If the classifier is restricted to some languages, langid only scores
+    those (see LanguageIdentifier.set_languages). Lists of texts are scored
+    in batches by the LangidEngine.
+    """
+
+    def __init__(self, cfg_path: str, languages: Optional[List[str]] = None):
+        super().__init__(cfg_path, languages)
+        self._identifier = None  # type: Optional[LanguageIdentifier]
+        self._engine = None  # type: Optional[LangidEngine]
+
+    @property
+    def identifier(self) -> LanguageIdentifier:
+        """Get the langid model, restricted to the languages."""
+        if self._identifier is None:
+            identifier = LanguageIdentifier.from_modelstring(model)
+            if self.languages is not None:
+                identifier.set_languages(
+                    [
+                        code
+                        for code in identifier.nb_classes
+                        if self.map2wili(code) != "UNK"
+                    ]
+                )
+            self._identifier = identifier
+        return self._identifier
 
     def predict(self, text):
         """
@@ -25,9 +59,62 @@ class LangidClassifier(lidtk.classifiers.LIDClassifier):
         ----------
         text : str
         """
-        language_code, score = langid.classify(text)
+        language_code, score = self.identifier.classify(text)
         return self.map2wili(language_code)
 
+    @property
+    def engine(self) -> LangidEngine:
+        """Get the batched engine of the langid model."""
+        if self._engine is None:
+            self._engine = LangidEngine(self.identifier)
+        return self._engine
+
+    def predict_bulk(self, texts: List[str]) -> List[str]:
+        """Predict the language of a list of texts in batches."""
+        languages = []  # type: List[str]
+        batch_size = self.cfg.get("batch_size", 1000)
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start : start + batch_size]
+            languages += [
+                self.map2wili(code) for code, _ in self.engine.classify_bulk(batch)
+            ]
+        return languages
+
+    def predict_bulk_ids(self, texts: List[str]) -> np.ndarray:
+        """Predict the language of a list of texts in batches as label ids."""
+        # Label id of each language of the engine
+        lookup = label_table.get_label_table().encode(
+            [self.map2wili(code) for code in self.engine.languages]
+        )
+        ids = np.zeros(len(texts), dtype=label_table.label_dtype)
+        batch_size = self.cfg.get("batch_size", 1000)
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start : start + batch_size]
+            scores = self.engine.nb_classprobs_bulk(batch)
+            ids[start : start + len(batch)] = lookup[scores.argmax(axis=1)]
+        return ids
+
+    def predict_topk_bulk(
+        self, texts: List[str], k: int = 5
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Get the k most likely languages and their scores of each text.
+
+        Parameters
+        ----------
+        texts : List[str]
+        k : int, optional (default: 5)
+
+        Returns
+        -------
+        results : List[List[Tuple[str, float]]]
+            ISO 369-3 codes and log-probabilities, most likely first
+        """
+        return [
+            [(self.map2wili(code), score) for code, score in ranking]
+            for ranking in self.engine.rank_bulk(texts, k)
+        ]
+
 
 path = "classifiers/config/langid.yaml"
 filepath = pkg_resources.resource_filename("lidtk", path)
@@ -38,3 +125,19 @@ classifier = LangidClassifier(filepath)
 # CLI                                                                         #
 ###############################################################################
 entry_point = lidtk.classifiers.classifier_cli_factor(classifier)
+
+
+@entry_point.command(name="topk")
+@click.option("--text")
+@click.option("--k", default=5, show_default=True)
+def topk_cli(text: str, k: int) -> None:
+    """
+    Print the k most likely languages of a text with their scores.
+
+    Parameters
+    ----------
+    text : str
+    k : int
+    """
+    for language, score in classifier.predict_topk_bulk([text], k)[0]:
+        print(f"{language}: {score:0.2f}")
@@ -49,6 +49,8 @@ def main_loaded(config: Dict[str, Any], data_module, feature_extractor_module) -
     Parameters
     ----------
     config : Dict[str, Any]
+        'target_type: one_hot' trains with one-hot targets; the default are
+        class indices
     data_module : Python module
     feature_extractor_module : Python module
     """
@@ -59,15 +61,17 @@ def main_loaded(config: Dict[str, Any], data_module, feature_extractor_module) -
     vectorizer = tfidf_features.load_feature_extractor(config)
     for set_name in ["x_train", "x_val", "x_test"]:
         data[set_name] = vectorizer.transform(data[set_name]).toarray()
+    # Class indices with a sparse loss unless one-hot targets are configured
+    one_hot = config.get("target_type", "index") == "one_hot"
+    encode = wili.lang_codes_to_one_hot if one_hot else wili.lang_codes_to_indices
     for set_name in ["y_train", "y_val", "y_test"]:
-        data[set_name] = wili.lang_codes_to_one_hot(data[set_name], wili.labels_s)
+        data[set_name] = encode(data[set_name], wili.labels_s)
     optimizer = get_optimizer(config)
     logger.debug(data["x_train"][0])
     model = load_model(config, data["x_train"][0].shape)
     assert model is not None, "for mypy"
-    model.compile(
-        loss="categorical_crossentropy", optimizer=optimizer, metrics=["accuracy"]
-    )
+    loss = "categorical_crossentropy" if one_hot else "sparse_categorical_crossentropy"
+    model.compile(loss=loss, optimizer=optimizer, metrics=["accuracy"])
     t0 = time.time()
     model.fit(
         data["x_train"],
@@ -82,7 +86,7 @@ def main_loaded(config: Dict[str, Any], data_module, feature_extractor_module) -
     logger.info(f"Save model to '{config['classification']['artifacts_path']}'")
     preds = model.predict(data["x_test"])
     y_pred = np.argmax(preds, axis=1)
-    y_true = np.argmax(data["y_test"], axis=1)
+    y_true = np.argmax(data["y_test"], axis=1) if one_hot else data["y_test"]
     print(
         "{clf_name:<30}: {acc:>4.2f}% in {train_time:0.2f}s train".format(
             clf_name="MLP",
@@ -99,15 +103,15 @@ def predict(text: str):
     return preds
 
 
-def create_model(nb_classes: int, input_shape) -> "Model":
-    """Create a MLP model."""
+def create_model(nb_classes: int, input_shape, hidden_size: int = 512) -> "Model":
+    """Create a MLP model with one hidden layer of hidden_size neurons."""
     # Third party modules
     from keras.layers import Dense, Input
     from keras.models import Model
 
     input_ = Input(shape=input_shape)
     x = input_
-    x = Dense(512, activation="relu")(x)
+    x = Dense(hidden_size, activation="relu")(x)
     x = Dense(nb_classes, activation="softmax")(x)
     model = Model(inputs=input_, outputs=x)
     return model
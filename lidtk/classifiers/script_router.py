@@ -0,0 +1,382 @@
+"""
+Route texts by the scripts they are written in.
+
+The dominant scripts of a text (e.g. Latin, Cyrillic, Thai) restrict the
+languages it can be written in. Texts in a script which is only used by a
+single language are answered directly, all other texts are passed to a
+downstream classifier which only considers the candidate languages.
+"""
+
+# Core Library modules
+import json
+import logging
+import os
+import re
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Third party modules
+import click
+import numpy as np
+import pkg_resources
+
+# First party modules
+import lidtk.classifiers
+from lidtk.data import unicode_data, wili
+
+logger = logging.getLogger(__name__)
+
+# Names in the 'Writing system' column of labels.csv which are not the name of
+# a Unicode script
+writing_system_aliases = {
+    "bangla": ["Bengali"],
+    "burmese": ["Myanmar"],
+    "chinese": ["Han"],
+    "devanagari script": ["Devanagari"],
+    "ge'ez": ["Ethiopic"],
+    "hanzi": ["Han"],
+    "japanese": ["Han", "Hiragana", "Katakana"],
+    "kana": ["Hiragana", "Katakana"],
+    "kanji": ["Han"],
+    "korean": ["Hangul"],
+    "odia": ["Oriya"],
+    "perso-arabic": ["Arabic"],
+    "simplified chinese": ["Han"],
+    "traditional chinese": ["Han"],
+}
+
+
+def parse_writing_system(writing_system: str) -> List[str]:
+    """
+    Get the Unicode scripts of a value of the 'Writing system' column.
+
+    Parameters
+    ----------
+    writing_system : str
+
+    Returns
+    -------
+    scripts : List[str]
+        Names of Unicode scripts
+
+    Examples
+    --------
+    >>> parse_writing_system("Latin, Cyrillic")
+    ['Latin', 'Cyrillic']
+    >>> parse_writing_system("Japanese")
+    ['Han', 'Hiragana', 'Katakana']
+    >>> parse_writing_system("")
+    []
+    """
+    normalized2script = {
+        name.lower(): name
+        for name in unicode_data.get_scripts()
+        if name not in unicode_data.NEUTRAL_SCRIPTS
+    }
+    scripts = []  # type: List[str]
+    for part in re.split(r",|;|/|\band\b", writing_system):
+        part = re.sub(r"\(.*\)|\balphabet\b|\bscript\b", "", part.lower()).strip()
+        if part in writing_system_aliases:
+            scripts += writing_system_aliases[part]
+        elif part in normalized2script:
+            scripts.append(normalized2script[part])
+    return scripts
+
+
+class ScriptRouter:
+    """
+    Find the candidate languages of texts by the scripts they are written in.
+
+    Parameters
+    ----------
+    script2languages : Dict[str, Set[str]]
+        Maps the name of a Unicode script to the languages written in it
+    min_script_share : float, optional (default: 0.1)
+        Scripts which make up less than this share of the (non-neutral)
+        characters of a text are ignored
+    """
+
+    def __init__(
+        self, script2languages: Dict[str, Set[str]], min_script_share: float = 0.1
+    ):
+        self.scripts = unicode_data.get_scripts()
+        self.min_script_share = min_script_share
+        self.languages = sorted(set.union(set(), *script2languages.values()))
+        lang2index = {lang: index for index, lang in enumerate(self.languages)}
+        # candidates[script_id, language_index]
+        self.candidates = np.zeros((len(self.scripts), len(self.languages)), bool)
+        for script, languages in script2languages.items():
+            script_id = self.scripts.index(script)
+            for lang in languages:
+                self.candidates[script_id, lang2index[lang]] = True
+        self.is_neutral = np.array(
+            [script in unicode_data.NEUTRAL_SCRIPTS for script in self.scripts]
+        )
+
+    @classmethod
+    def from_metadata(
+        cls, wili_labels: List[Dict[str, Any]], min_script_share: float = 0.1
+    ) -> "ScriptRouter":
+        """Create a router from the 'Writing system' column of labels.csv."""
+        script2languages = defaultdict(set)  # type: Dict[str, Set[str]]
+        for el in wili_labels:
+            for script in parse_writing_system(el.get("Writing system") or ""):
+                script2languages[script].add(el["Label"])
+        return cls(script2languages, min_script_share)
+
+    @classmethod
+    def from_data(
+        cls,
+        xs: List[str],
+        ys: List[str],
+        min_script_share: float = 0.1,
+        min_language_share: float = 0.05,
+        batch_size: int = 10000,
+    ) -> "ScriptRouter":
+        """
+        Create a router from the scripts which are used in a training set.
+
+        Parameters
+        ----------
+        xs : List[str]
+        ys : List[str]
+        min_script_share : float, optional (default: 0.1)
+        min_language_share : float, optional (default: 0.05)
+            A language is a candidate for a script if at least this share of
+            its (non-neutral) characters in xs are written in the script
+        batch_size : int, optional (default: 10000)
+
+        Returns
+        -------
+        router : ScriptRouter
+        """
+        script2languages = get_script_languages(
+            xs, ys, min_language_share, batch_size=batch_size
+        )
+        return cls(script2languages, min_script_share)
+
+    def get_dominant_scripts(self, texts: List[str]) -> np.ndarray:
+        """
+        Find the scripts each text is written in.
+
+        Parameters
+        ----------
+        texts : List[str]
+
+        Returns
+        -------
+        dominant : np.ndarray of dtype bool and shape (len(texts), n_scripts)
+        """
+        counts = unicode_data.get_script_counts(texts)
+        counts[:, self.is_neutral] = 0
+        totals = counts.sum(axis=1, keepdims=True)
+        shares = counts / np.maximum(totals, 1)
+        return (counts > 0) & (shares >= self.min_script_share)
+
+    def route_bulk(self, texts: List[str]) -> List[List[str]]:
+        """
+        Get the candidate languages of each text.
+
+        Parameters
+        ----------
+        texts : List[str]
+
+        Returns
+        -------
+        candidates : List[List[str]]
+            The union of the languages of the dominant scripts of each text.
+            The list is empty if no language is known for those scripts.
+        """
+        dominant = self.get_dominant_scripts(texts)
+        is_candidate = (dominant.astype(np.int64) @ self.candidates) > 0
+        return [
+            [self.languages[index] for index in np.flatnonzero(row)]
+            for row in is_candidate
+        ]
+
+    def route(self, text: str) -> List[str]:
+        """Get the candidate languages of a text."""
+        return self.route_bulk([text])[0]
+
+
+def get_script_languages(
+    xs: List[str],
+    ys: List[str],
+    min_language_share: float = 0.05,
+    batch_size: int = 10000,
+) -> Dict[str, Set[str]]:
+    """
+    Find which scripts each language uses in a dataset.
+
+    Parameters
+    ----------
+    xs : List[str]
+    ys : List[str]
+    min_language_share : float, optional (default: 0.05)
+    batch_size : int, optional (default: 10000)
+
+    Returns
+    -------
+    script2languages : Dict[str, Set[str]]
+    """
+    scripts = unicode_data.get_scripts()
+    languages = sorted(set(ys))
+    lang2index = {lang: index for index, lang in enumerate(languages)}
+    counts = np.zeros((len(languages), len(scripts)), dtype=np.int64)
+    for start in range(0, len(xs), batch_size):
+        text_counts = unicode_data.get_script_counts(xs[start : start + batch_size])
+        rows = [lang2index[y] for y in ys[start : start + batch_size]]
+        np.add.at(counts, rows, text_counts)
+    is_neutral = np.array(
+        [script in unicode_data.NEUTRAL_SCRIPTS for script in scripts]
+    )
+    counts[:, is_neutral] = 0
+    shares = counts / np.maximum(counts.sum(axis=1, keepdims=True), 1)
+    script2languages = defaultdict(set)  # type: Dict[str, Set[str]]
+    for lang_index, script_id in zip(*np.nonzero(shares >= min_language_share)):
+        script2languages[scripts[script_id]].add(languages[lang_index])
+    return script2languages
+
+
+class ScriptRouterClassifier(lidtk.classifiers.LIDClassifier):
+    """
+    LID by routing texts by their script to a downstream classifier.
+
+    The router and the downstream classifier are loaded on the first
+    prediction.
+    """
+
+    def __init__(self, cfg_path: str, languages: Optional[List[str]] = None):
+        super().__init__(cfg_path, languages)
+        self._router = None  # type: Optional[ScriptRouter]
+        self._downstream = None  # type: Optional[lidtk.classifiers.LIDClassifier]
+
+    @property
+    def router(self) -> ScriptRouter:
+        """Get the script router."""
+        if self._router is None:
+            self._router = load_router(self.cfg, self.languages)
+        return self._router
+
+    @property
+    def downstream(self) -> lidtk.classifiers.LIDClassifier:
+        """Get the classifier which decides between several candidates."""
+        if self._downstream is None:
+            self._downstream = lidtk.classifiers.get_classifier(
+                self.cfg["downstream"]["classifier"],
+                self.cfg["downstream"].get("config_path"),
+                self.languages,
+            )
+        return self._downstream
+
+    def reset_after_fork(self) -> None:
+        """Reset the downstream classifier if it is loaded already."""
+        if self._downstream is not None:
+            self._downstream.reset_after_fork()
+
+    def predict(self, text: str) -> str:
+        """Predicting the language of a text."""
+        return self.predict_bulk([text])[0]
+
+    def predict_bulk(self, texts: List[str]) -> List[str]:
+        """Predict the language of texts, routing all of them in one pass."""
+        return self.predict_features(self.extract_features(texts))
+
+    def extract_features(self, texts: List[str]) -> List[Tuple[str, List[str]]]:
+        """Get each text with the candidate languages of its script."""
+        return list(zip(texts, self.router.route_bulk(texts)))
+
+    def predict_features(self, features: List[Tuple[str, List[str]]]) -> List[str]:
+        """Predict the languages of routed texts with the downstream classifier."""
+        texts = [text for text, _ in features]
+        languages = [""] * len(features)
+        unrestricted = []
+        for i, (text, candidates) in enumerate(features):
+            if len(candidates) == 1:
+                languages[i] = candidates[0]
+            elif len(candidates) == 0:
+                unrestricted.append(i)
+            else:
+                languages[i] = self.downstream.predict_restricted(text, candidates)
+        if len(unrestricted) > 0:
+            predicted = self.downstream.predict_bulk([texts[i] for i in unrestricted])
+            for i, language in zip(unrestricted, predicted):
+                languages[i] = language
+        return languages
+
+    def get_mapping_languages(self) -> List[str]:
+        """Get the languages which can be predicted."""
+        return self.downstream.get_mapping_languages()
+
+
+def load_router(
+    cfg: Dict[str, Any], languages: Optional[List[str]] = None
+) -> ScriptRouter:
+    """
+    Create the ScriptRouter which is configured in cfg.
+
+    The languages found in the training data are cached in
+    `script_languages_path`.
+
+    Parameters
+    ----------
+    cfg : Dict[str, Any]
+    languages : List[str], optional (default: all languages)
+        Only those languages can be candidates
+
+    Returns
+    -------
+    router : ScriptRouter
+    """
+    script2languages = defaultdict(set)  # type: Dict[str, Set[str]]
+    if cfg["candidates_from"] in ["metadata", "both"]:
+        router = ScriptRouter.from_metadata(wili.labels)
+        for script_id, script in enumerate(router.scripts):
+            for lang_index in np.flatnonzero(router.candidates[script_id]):
+                script2languages[script].add(router.languages[lang_index])
+    if cfg["candidates_from"] in ["data", "both"]:
+        cache_path = cfg["script_languages_path"]
+        if os.path.isfile(cache_path):
+            with open(cache_path) as f:
+                from_data = {key: set(value) for key, value in json.load(f).items()}
+        else:
+            data = wili.load_data()
+            from_data = get_script_languages(
+                data["x_train"], data["y_train"], cfg["min_language_share"]
+            )
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, "w") as f:
+                json.dump({key: sorted(value) for key, value in from_data.items()}, f)
+        for script, data_languages in from_data.items():
+            script2languages[script] |= data_languages
+    if languages is not None:
+        for script in script2languages:
+            script2languages[script] &= set(languages)
+    return ScriptRouter(script2languages, cfg["min_script_share"])
+
+
+path = "classifiers/config/script_router.yaml"
+filepath = pkg_resources.resource_filename("lidtk", path)
+classifier = ScriptRouterClassifier(filepath)
+
+
+###############################################################################
+# CLI                                                                         #
+###############################################################################
+entry_point = lidtk.classifiers.classifier_cli_factor(classifier)
+
+
+@entry_point.command(name="route")
+@click.option("--text")
+def route_cli(text: str) -> None:
+    """
+    Show the dominant scripts and candidate languages of a text.
+
+    Parameters
+    ----------
+    text : str
+    """
+    router = classifier.router
+    dominant = router.get_dominant_scripts([text])[0]
+    print("Scripts: " + ", ".join(router.scripts[i] for i in np.flatnonzero(dominant)))
+    print("Candidates: " + ", ".join(router.route(text)))
@@ -7,6 +7,10 @@ Notes
 * https://pypi.python.org/pypi/cld2-cffi
 """
 
+# Core Library modules
+from sys import maxsize
+from typing import Dict, List, Optional
+
 # Third party modules
 import nltk.classify.textcat
 import pkg_resources
@@ -16,13 +20,54 @@ import lidtk.classifiers
 
 
 class TextCatClassifier(lidtk.classifiers.LIDClassifier):
-    """LID Classifier which uses TextCat."""
+    """
+    LID Classifier which uses TextCat.
+
+    The trigram ranks of the languages are computed once. If the classifier
+    is restricted to some languages, only those are compared to the text.
+    """
+
+    def __init__(self, cfg_path: str, languages: Optional[List[str]] = None):
+        super().__init__(cfg_path, languages)
+        self._textcat = None  # type: Optional[nltk.classify.textcat.TextCat]
+        self._lang_ranks = None  # type: Optional[Dict[str, Dict[str, int]]]
+
+    @property
+    def textcat(self) -> nltk.classify.textcat.TextCat:
+        """Get the TextCat object."""
+        if self._textcat is None:
+            self._textcat = nltk.classify.textcat.TextCat()
+        return self._textcat
+
+    @property
+    def lang_ranks(self) -> Dict[str, Dict[str, int]]:
+        """Get the rank of each trigram for each language."""
+        if self._lang_ranks is None:
+            corpus = self.textcat._corpus
+            self._lang_ranks = {
+                lang: {trigram: i for i, trigram in enumerate(corpus.lang_freq(lang))}
+                for lang in corpus.langs()
+                if self.restrict_language(lang) != "UNK"
+            }
+        return self._lang_ranks
 
     def predict(self, text: str) -> str:
         """Predicting the language of a text."""
-        o = nltk.classify.textcat.TextCat()
-        language_code = o.guess_language(text)
-        return language_code
+        # Same "out-of-place" measure as TextCat.lang_dists
+        profile = self.textcat.profile(text)
+        text_ranks = {trigram: i for i, trigram in enumerate(profile)}
+        distances = {}
+        for lang, lang_ranks in self.lang_ranks.items():
+            distances[lang] = sum(
+                abs(lang_ranks[trigram] - text_rank)
+                if trigram in lang_ranks
+                else maxsize
+                for trigram, text_rank in text_ranks.items()
+            )
+        if len(distances) == 0:
+            return "UNK"
+        language_code = min(distances, key=distances.get)  # type: ignore
+        return self.restrict_language(language_code)
 
 
 path = "classifiers/config/textcat.yaml"
@@ -3,13 +3,14 @@
 # Core Library modules
 import logging
 import pickle
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 # Third party modules
 import click
 from sklearn.feature_extraction.text import TfidfVectorizer
 
 # First party modules
+from lidtk.artifact_cache import ArtifactCache
 from lidtk.data import wili
 from lidtk.utils import load_cfg
 
@@ -51,24 +52,58 @@ def get_features(config: Dict[str, Any], data: Dict[Any, Any]) -> Dict[str, Any]
         config["feature-extraction"] = {}
     if "min_df" not in config["feature-extraction"]:
         config["feature-extraction"]["min_df"] = 50
-    make_lowercase = config["feature-extraction"]["lowercase"]
-    vectorizer = TfidfVectorizer(
-        analyzer="char",
-        min_df=config["feature-extraction"]["min_df"],
-        lowercase=make_lowercase,
-        norm=config["feature-extraction"]["norm"],
-    )
-    xs = {}
-    vectorizer.fit(data["x_train"])
+    feature_cfg = config["feature-extraction"]
+    # The vectorizer only depends on these, not on where it is serialized
+    params = {
+        "min_df": feature_cfg["min_df"],
+        "lowercase": feature_cfg["lowercase"],
+        "norm": feature_cfg["norm"],
+    }
+    ret = get_cached_features(params, data, ["x_train", "x_test", "x_val"])
     # Serialize trained vectorizer
-    logger.info(
-        "Serialize vectorizer to "
-        f"'{config['feature-extraction']['serialization_path']}'"
+    logger.info(f"Serialize vectorizer to '{feature_cfg['serialization_path']}'")
+    with open(feature_cfg["serialization_path"], "wb") as fin:
+        pickle.dump(ret["vectorizer"], fin)
+    return ret
+
+
+def get_cached_features(
+    params: Dict[str, Any], data: Dict[Any, Any], set_names: List[str]
+) -> Dict[str, Any]:
+    """
+    Fit a character tf-idf vectorizer once per parameters and transform sets.
+
+    Both the vectorizer and the feature matrices are kept in the artifact
+    cache.
+
+    Parameters
+    ----------
+    params : Dict[str, Any]
+        'min_df', 'lowercase' and 'norm'
+    data : Dict[Any, Any]
+        WiLI data, see wili.load_data
+    set_names : List[str]
+        The sets to transform, e.g. 'x_val'
+
+    Returns
+    -------
+    features : Dict[str, Any]
+        'vectorizer' and 'xs'
+    """
+    cache = ArtifactCache()
+    vectorizer = cache.get_or_create(
+        "tfidf_vectorizer",
+        params,
+        lambda: TfidfVectorizer(analyzer="char", **params).fit(data["x_train"]),
     )
-    with open(config["feature-extraction"]["serialization_path"], "wb") as fin:
-        pickle.dump(vectorizer, fin)
-    for set_name in ["x_train", "x_test", "x_val"]:
-        xs[set_name] = vectorizer.transform(data[set_name]).toarray()
+    xs = {}
+    for set_name in set_names:
+        xs[set_name] = cache.get_or_create(
+            "tfidf_xs",
+            dict(params, set_name=set_name),
+            lambda: vectorizer.transform(data[set_name]).toarray(),
+            fmt="npy",
+        )
     return {"vectorizer": vectorizer, "xs": xs}
 
 
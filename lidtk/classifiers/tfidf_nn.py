@@ -7,7 +7,7 @@ tfidf = text frequency, inverse document frequency
 # Core Library modules
 import os
 import pickle
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 # Third party modules
 import click
@@ -19,15 +19,24 @@ import lidtk.classifiers.mlp
 import lidtk.classifiers.tfidf_features
 from lidtk.data import wili
 
+if TYPE_CHECKING:
+    # Third party modules
+    from keras.models import Model
+
 classifier_name = "tfidf_nn"
 classifier: Optional[lidtk.classifiers.LIDClassifier] = None
 
 
 class TfidfNNClassifier(lidtk.classifiers.LIDClassifier):
-    """LID with the TfidfNNClassifier."""
+    """
+    LID with the TfidfNNClassifier.
+
+    If the classifier is restricted to some languages, the softmax output
+    layer only keeps the units of those languages.
+    """
 
-    def __init__(self, filepath: str):
-        super().__init__(filepath)
+    def __init__(self, filepath: str, languages: Optional[List[str]] = None):
+        super().__init__(filepath, languages)
         self.labels = wili.labels
 
     def load(self, vectorizer_filename: str, classifier_filename: str) -> None:
@@ -37,23 +46,102 @@ class TfidfNNClassifier(lidtk.classifiers.LIDClassifier):
         with open(vectorizer_filename, "rb") as handle:
             self.vectorizer = pickle.load(handle)
         self.model = load_model(classifier_filename)
+        n_outputs = self.model.layers[-1].get_weights()[1].shape[0]
+        # output_indices[unit] is the index of the unit in the trained model
+        self.output_indices = np.arange(n_outputs)
+        if self.languages is not None:
+            self.output_indices = np.array(
+                [index for index in range(n_outputs) if self.map2wili(index) != "UNK"],
+                dtype=int,
+            )
+            self.model = slice_output_layer(self.model, self.output_indices)
+
+    def output2wili(self, unit: int) -> str:
+        """Map a unit of the output layer to an ISO 369-3 code."""
+        return self.map2wili(int(self.output_indices[unit]))
 
     def predict(self, text: str) -> str:
         """Predicting the language of a text."""
+        return self.predict_bulk([text])[0]
+
+    def predict_with_confidence(self, text: str) -> Tuple[str, float]:
+        """Predict the language of a text and its softmax probability."""
+        languages, confidences = self.predict_bulk_with_confidence([text])
+        return languages[0], confidences[0]
+
+    def predict_restricted(self, text: str, languages: List[str]) -> str:
+        """Predict the language of a text among the given languages."""
         features = self.vectorizer.transform([text]).toarray()
-        prediction = self.model.predict(features)
+        prediction = self.model.predict(features)[0]
+        allowed = np.array(
+            [self.output2wili(unit) in languages for unit in range(len(prediction))]
+        )
+        if not allowed.any():
+            return "UNK"
+        return self.output2wili(int(np.argmax(np.where(allowed, prediction, -np.inf))))
+
+    def predict_bulk(self, texts: List[str]) -> List[str]:
+        """Predict the language of a list of texts in one batch."""
+        return self.predict_bulk_with_confidence(texts)[0]
+
+    def predict_bulk_with_confidence(
+        self, texts: List[str]
+    ) -> Tuple[List[str], np.ndarray]:
+        """Predict the languages of texts and their softmax probabilities."""
+        prediction = self.model.predict(self.extract_features(texts))
         most_likely = np.argmax(prediction, axis=1)
-        most_likely = [self.map2wili(index) for index in most_likely]
-        return most_likely[0]
+        languages = [self.output2wili(unit) for unit in most_likely]
+        return languages, prediction.max(axis=1)
+
+    def extract_features(self, texts: List[str]) -> np.ndarray:
+        """Get the tfidf features of texts."""
+        return self.vectorizer.transform(texts).toarray()
+
+    def predict_features(self, features: np.ndarray) -> List[str]:
+        """Predict the languages of tfidf features."""
+        most_likely = np.argmax(self.model.predict(features), axis=1)
+        return [self.output2wili(unit) for unit in most_likely]
+
+
+def slice_output_layer(model: "Model", indices: np.ndarray) -> "Model":
+    """
+    Keep only some units of the softmax output layer of a model.
+
+    As the softmax is computed over the kept units only, the probabilities
+    are renormalized to the remaining classes.
+
+    Parameters
+    ----------
+    model : keras.models.Model
+        The last layer has to be a Dense layer with softmax activation
+    indices : np.ndarray
+        Indices of the units to keep
+
+    Returns
+    -------
+    sliced_model : keras.models.Model
+    """
+    # Third party modules
+    from keras.layers import Dense
+    from keras.models import Model
+
+    weights, bias = model.layers[-1].get_weights()
+    outputs = Dense(len(indices), activation="softmax")(model.layers[-2].output)
+    sliced_model = Model(inputs=model.input, outputs=outputs)
+    sliced_model.layers[-1].set_weights([weights[:, indices], bias[indices]])
+    return sliced_model
 
 
-def load_classifier(filepath: str) -> TfidfNNClassifier:
+def load_classifier(
+    filepath: str, languages: Optional[List[str]] = None
+) -> TfidfNNClassifier:
     """
     Load a TfidfNNClassifier.
 
     Parameters
     ----------
     filepath : str
+    languages : List[str], optional (default: as configured)
 
     Returns
     -------
@@ -62,7 +150,7 @@ def load_classifier(filepath: str) -> TfidfNNClassifier:
     if filepath is None:
         filepath = "classifiers/config/tfidf_nn.yaml"
         filepath = pkg_resources.resource_filename("lidtk", filepath)
-    classifier = TfidfNNClassifier(filepath)
+    classifier = TfidfNNClassifier(filepath, languages)
     classifier.load(
         classifier.cfg["feature-extraction"]["serialization_path"],
         classifier.cfg["classification"]["artifacts_path"],
@@ -4,6 +4,7 @@
 
 # Core Library modules
 import logging.config
+from typing import Optional
 
 # Third party modules
 import click
@@ -12,17 +13,27 @@ import yaml
 
 # First party modules
 import lidtk
+import lidtk.analysis.early_exit
+import lidtk.analysis.results_store
 import lidtk.analysis.unicode_block
+import lidtk.artifact_cache
+import lidtk.classifiers.cascade
 import lidtk.classifiers.char_distribution.char_dist_metric_train_test as cdm
 import lidtk.classifiers.cld2_mod
+import lidtk.classifiers.detectlanguage_mod
 import lidtk.classifiers.google_mod
 import lidtk.classifiers.langdetect_mod
 import lidtk.classifiers.langid_mod
 import lidtk.classifiers.nn
+import lidtk.classifiers.script_router
 import lidtk.classifiers.text_cat
 import lidtk.classifiers.tfidf_nn
 import lidtk.data.create_ml_dataset
 import lidtk.data.download_documents
+import lidtk.resources
+import lidtk.runner
+import lidtk.sweep
+import lidtk.tune
 import lidtk.utils
 
 filepath = pkg_resources.resource_filename("lidtk", "config.yaml")
@@ -33,8 +44,19 @@ logging.config.dictConfig(config["LOGGING"])
 
 @click.group()
 @click.version_option(version=lidtk.__version__)
-def entry_point() -> None:
+@click.option(
+    "--cpus",
+    default=None,
+    help="CPU budget: a number of CPUs or a list like 0-3,8 (default: cpus)",
+)
+@click.option(
+    "--pin_cpus/--no_pin_cpus",
+    default=None,
+    help="Bind worker processes to their CPUs (default: pin_cpus)",
+)
+def entry_point(cpus: Optional[str], pin_cpus: Optional[bool]) -> None:
     """lidtk: The language identification toolkit."""
+    lidtk.resources.configure(cpus, pin_cpus)
 
 
 entry_point.add_command(lidtk.data.download_documents.main)
@@ -46,7 +68,16 @@ entry_point.add_command(lidtk.classifiers.nn.entry_point)
 entry_point.add_command(lidtk.classifiers.langdetect_mod.entry_point)
 entry_point.add_command(lidtk.classifiers.langid_mod.entry_point)
 entry_point.add_command(lidtk.analysis.unicode_block.main)
+entry_point.add_command(lidtk.analysis.results_store.entry_point)
+entry_point.add_command(lidtk.analysis.early_exit.main)
+entry_point.add_command(lidtk.artifact_cache.entry_point)
+entry_point.add_command(lidtk.sweep.main)
+entry_point.add_command(lidtk.runner.main)
+entry_point.add_command(lidtk.tune.main)
 entry_point.add_command(cdm.entry_point)
 entry_point.add_command(lidtk.utils.map_classification_result)
 entry_point.add_command(lidtk.classifiers.google_mod.entry_point)
+entry_point.add_command(lidtk.classifiers.detectlanguage_mod.entry_point)
 entry_point.add_command(lidtk.classifiers.tfidf_nn.entry_point)
+entry_point.add_command(lidtk.classifiers.cascade.entry_point)
+entry_point.add_command(lidtk.classifiers.script_router.entry_point)
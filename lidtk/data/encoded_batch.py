@@ -0,0 +1,201 @@
+"""
+A batch of texts as one flat buffer of Unicode code points.
+
+The texts are encoded once. Cutoff replacement, lowercasing, counting and
+Unicode lookups then work on the whole batch with numpy instead of
+iterating over the characters of each text in Python. Character features
+which are combined on the same texts share that single pass.
+"""
+
+# Core Library modules
+from typing import Callable, List, Optional
+
+# Third party modules
+import numpy as np
+
+# First party modules
+from lidtk.data import unicode_data
+
+
+class EncodedBatch:
+    """
+    Texts as code points with the offset of each text.
+
+    Parameters
+    ----------
+    code_points : np.ndarray of dtype uint32
+        The code points of all texts, one text after the other
+    offsets : np.ndarray of dtype int64 and shape (n_texts + 1,)
+        Text i is code_points[offsets[i]:offsets[i + 1]]
+
+    Examples
+    --------
+    >>> batch = EncodedBatch.from_texts(["Ab", "", "ไทย"])
+    >>> batch.lengths.tolist()
+    [2, 0, 3]
+    >>> batch.lower().to_texts()
+    ['ab', '', 'ไทย']
+    """
+
+    def __init__(self, code_points: np.ndarray, offsets: np.ndarray):
+        self.code_points = code_points
+        self.offsets = offsets
+        self._row_ids = None  # type: Optional[np.ndarray]
+
+    @classmethod
+    def from_texts(cls, texts: List[str]) -> "EncodedBatch":
+        """Encode texts with a single UTF-32 conversion."""
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(unicode_data.text_to_code_points("".join(texts)), offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Get the number of code points of each text."""
+        return np.diff(self.offsets)
+
+    @property
+    def row_ids(self) -> np.ndarray:
+        """Get the index of the text of each code point."""
+        if self._row_ids is None:
+            self._row_ids = np.repeat(np.arange(len(self)), self.lengths)
+        return self._row_ids
+
+    def to_texts(self) -> List[str]:
+        """Decode the batch."""
+        text = (
+            self.code_points.astype(np.uint32)
+            .tobytes()
+            .decode("utf-32-le", errors="surrogatepass")
+        )
+        return [text[start:end] for start, end in zip(self.offsets, self.offsets[1:])]
+
+    def _with_code_points(self, code_points: np.ndarray) -> "EncodedBatch":
+        batch = EncodedBatch(code_points, self.offsets)
+        batch._row_ids = self._row_ids
+        return batch
+
+    def replace_above(self, cutoff: Optional[int], replacement: str) -> "EncodedBatch":
+        """
+        Replace all code points above cutoff by one character.
+
+        Parameters
+        ----------
+        cutoff : int, optional
+            None keeps all code points
+        replacement : str
+            A single character
+
+        Returns
+        -------
+        batch : EncodedBatch
+
+        Examples
+        --------
+        >>> EncodedBatch.from_texts(["aä"]).replace_above(127, "?").to_texts()
+        ['a?']
+        """
+        if cutoff is None:
+            return self
+        return self._with_code_points(
+            np.where(
+                self.code_points > cutoff, np.uint32(ord(replacement)), self.code_points
+            ).astype(np.uint32)
+        )
+
+    def map_characters(self, function: Callable[[str], str]) -> "EncodedBatch":
+        """
+        Apply a function to each character.
+
+        The function is called once per distinct code point of the batch.
+        Results which are not a single character leave the code point as
+        it is, so the offsets stay valid.
+        """
+        distinct, inverse = np.unique(self.code_points, return_inverse=True)
+        mapped = np.array(
+            [
+                ord(result) if len(result) == 1 else code_point
+                for code_point, result in (
+                    (code_point, function(chr(code_point)))
+                    for code_point in distinct.tolist()
+                )
+            ],
+            dtype=np.uint32,
+        )
+        return self._with_code_points(mapped[inverse.reshape(-1)])
+
+    def lower(self) -> "EncodedBatch":
+        """Lowercase the texts; characters with a multi-character lowercase stay."""
+        return self.map_characters(str.lower)
+
+    def bincount(self, ids: np.ndarray, n_ids: int) -> np.ndarray:
+        """
+        Count ids per text.
+
+        Parameters
+        ----------
+        ids : np.ndarray of shape (n_code_points,)
+            An id in [0, n_ids) for each code point of the batch
+        n_ids : int
+
+        Returns
+        -------
+        counts : np.ndarray of shape (n_texts, n_ids)
+        """
+        counts = np.bincount(self.row_ids * n_ids + ids, minlength=len(self) * n_ids)
+        return counts.reshape(len(self), n_ids)
+
+    def get_char_ids(self, chars: List[str], other: str = "other") -> np.ndarray:
+        """
+        Get the index of each code point in chars.
+
+        Parameters
+        ----------
+        chars : List[str]
+            Single characters and the entry `other`
+        other : str, optional (default: 'other')
+            Code points which are not in chars get its index
+
+        Returns
+        -------
+        char_ids : np.ndarray of shape (n_code_points,)
+        """
+        vocabulary = sorted(
+            (ord(char), index) for index, char in enumerate(chars) if len(char) == 1
+        )
+        vocabulary_code_points = np.array([el[0] for el in vocabulary], dtype=np.int64)
+        vocabulary_ids = np.array([el[1] for el in vocabulary], dtype=np.int64)
+        other_index = chars.index(other)
+        if len(vocabulary) == 0:
+            return np.full(len(self.code_points), other_index, dtype=np.int64)
+        positions = np.searchsorted(vocabulary_code_points, self.code_points)
+        positions = np.minimum(positions, len(vocabulary) - 1)
+        found = vocabulary_code_points[positions] == self.code_points
+        return np.where(found, vocabulary_ids[positions], other_index)
+
+    def get_distributions(self, chars: List[str], other: str = "other") -> np.ndarray:
+        """
+        Get the relative frequency of chars in each text.
+
+        Empty texts get a distribution of zeros.
+
+        Examples
+        --------
+        >>> batch = EncodedBatch.from_texts(["aab", "c"])
+        >>> batch.get_distributions(["a", "other"]).tolist()
+        [[0.6666666666666666, 0.3333333333333333], [0.0, 1.0]]
+        """
+        counts = self.bincount(self.get_char_ids(chars, other), len(chars))
+        return counts / np.maximum(self.lengths, 1)[:, None]
+
+    def get_block_ids(self) -> np.ndarray:
+        """Get the Unicode block of each code point, see unicode_data."""
+        return unicode_data.get_block_ids(self.code_points)
+
+    def get_script_ids(self) -> np.ndarray:
+        """Get the script of each code point, see unicode_data.get_scripts."""
+        return unicode_data.get_script_table()[self.code_points]
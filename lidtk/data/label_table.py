@@ -0,0 +1,271 @@
+"""
+Integer ids for WiLI labels.
+
+Predictions, mappings and result files use int16 ids into one global table
+instead of strings, so that mapping, comparing and counting predictions is
+done with numpy on whole arrays.
+"""
+
+# Core Library modules
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+# Third party modules
+import numpy as np
+
+# First party modules
+from lidtk.data import wili
+
+logger = logging.getLogger(__name__)
+
+UNK = "UNK"
+label_dtype = np.int16
+
+
+class LabelTable:
+    """
+    Map labels to consecutive int16 ids and back.
+
+    Parameters
+    ----------
+    labels : List[str]
+        The id of a label is its index. UNK gets the id len(labels) and
+        every unknown label is mapped to it.
+
+    Examples
+    --------
+    >>> table = LabelTable(["deu", "eng"])
+    >>> table.encode(["eng", "deu", "xyz"])
+    array([1, 0, 2], dtype=int16)
+    >>> table.decode(table.encode(["eng", "xyz"])).tolist()
+    ['eng', 'UNK']
+    """
+
+    def __init__(self, labels: List[str]):
+        self.labels = np.array(list(labels) + [UNK])
+        self.unk_id = len(labels)
+        self.label2id = {label: i for i, label in enumerate(self.labels)}
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def get_id(self, label: str) -> int:
+        """Get the id of a single label."""
+        return self.label2id.get(label, self.unk_id)
+
+    def encode(self, labels: Iterable[str]) -> np.ndarray:
+        """
+        Get the ids of labels.
+
+        Each distinct label is looked up once, so this is fast for long
+        lists of predictions.
+
+        Parameters
+        ----------
+        labels : Iterable[str]
+
+        Returns
+        -------
+        ids : np.ndarray of dtype int16
+        """
+        labels = np.asarray(labels if isinstance(labels, np.ndarray) else list(labels))
+        if len(labels) == 0:
+            return np.zeros(0, dtype=label_dtype)
+        distinct, inverse = np.unique(labels, return_inverse=True)
+        distinct_ids = np.array([self.get_id(el) for el in distinct], dtype=label_dtype)
+        return distinct_ids[inverse.reshape(-1)]
+
+    def decode(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Get the labels of ids.
+
+        Parameters
+        ----------
+        ids : np.ndarray
+
+        Returns
+        -------
+        labels : np.ndarray of str
+        """
+        return self.labels[np.asarray(ids)]
+
+    def compile_mapping(self, codes: List[str], mapping: Dict[str, str]) -> np.ndarray:
+        """
+        Precompile a mapping from a classifier's codes to labels.
+
+        Parameters
+        ----------
+        codes : List[str]
+            The classifier's codes; the index of a code is its input id
+        mapping : Dict[str, str]
+            Maps a code to a label; missing codes are mapped to UNK
+
+        Returns
+        -------
+        lookup : np.ndarray of dtype int16
+            lookup[code_id] is the label id of the code. It has one more
+            entry (UNK) for code id -1, i.e. codes the classifier does not
+            know.
+        """
+        return self.encode([mapping.get(code, UNK) for code in codes] + [UNK])
+
+    def count(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Count how often each label occurs.
+
+        Parameters
+        ----------
+        ids : np.ndarray
+
+        Returns
+        -------
+        counts : np.ndarray of shape (len(self),)
+        """
+        return np.bincount(np.asarray(ids, dtype=np.int64), minlength=len(self))
+
+
+label_table: Optional[LabelTable] = None
+
+
+def get_label_table() -> LabelTable:
+    """Get the table of the labels in labels.csv (see `labels_path`)."""
+    global label_table
+    if label_table is None:
+        label_table = LabelTable([el["Label"] for el in wili.get_language_data()])
+    return label_table
+
+
+def write_results(
+    filepath: str, predictions: Union[np.ndarray, List[str]], fmt: str = None
+) -> None:
+    """
+    Write predictions to a result file.
+
+    Parameters
+    ----------
+    filepath : str
+    predictions : Union[np.ndarray, List[str]]
+        Label ids or labels
+    fmt : str, optional (default: by extension)
+        'npy' for an int16 array (labels which are not in the table become
+        UNK) or 'text' for one label per line
+    """
+    if fmt is None:
+        fmt = "npy" if filepath.endswith(".npy") else "text"
+    table = get_label_table()
+    if fmt == "npy":
+        if not isinstance(predictions, np.ndarray) or predictions.dtype.kind != "i":
+            predictions = table.encode(predictions)
+        with open(filepath, "wb") as fp:
+            np.save(fp, predictions.astype(label_dtype))
+    elif fmt == "text":
+        if isinstance(predictions, np.ndarray) and predictions.dtype.kind == "i":
+            predictions = table.decode(predictions)
+        with open(filepath, "w") as fp:
+            fp.write("".join(f"{el}\n" for el in predictions))
+    else:
+        raise ValueError(f"Unknown result format '{fmt}'. Use 'npy' or 'text'.")
+
+
+class ResultWriter:
+    """
+    Stream predictions to a result file while they are made.
+
+    Parameters
+    ----------
+    filepath : str
+    length : int
+        Number of predictions which will be written
+    fmt : str, optional (default: by extension)
+        See write_results
+    state : Dict[str, int], optional (default: start a new file)
+        Continue writing at a state returned by get_state; everything
+        written after it is overwritten
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        length: int,
+        fmt: str = None,
+        state: Optional[Dict[str, int]] = None,
+    ):
+        if fmt is None:
+            fmt = "npy" if filepath.endswith(".npy") else "text"
+        if fmt not in ["npy", "text"]:
+            raise ValueError(f"Unknown result format '{fmt}'. Use 'npy' or 'text'.")
+        self.fmt = fmt
+        self.table = get_label_table()
+        self.n_written = 0 if state is None else state["n_written"]
+        if fmt == "npy":
+            self.ids = np.lib.format.open_memmap(
+                filepath,
+                mode="w+" if state is None else "r+",
+                dtype=label_dtype,
+                shape=(length,),
+            )
+        elif state is None:
+            self.fp = open(filepath, "w")
+        else:
+            self.fp = open(filepath, "r+")
+            self.fp.seek(state["offset"])
+            self.fp.truncate()
+
+    def append(self, label: str) -> None:
+        """Write the next prediction."""
+        if self.fmt == "npy":
+            self.ids[self.n_written] = self.table.get_id(label)
+        else:
+            self.fp.write(f"{label}\n")
+        self.n_written += 1
+
+    def extend(self, labels: List[str]) -> None:
+        """Write the next predictions."""
+        if self.fmt == "npy":
+            end = self.n_written + len(labels)
+            self.ids[self.n_written : end] = self.table.encode(labels)
+        else:
+            self.fp.write("".join(f"{label}\n" for label in labels))
+        self.n_written += len(labels)
+
+    def get_state(self) -> Dict[str, int]:
+        """Flush everything to disk and get the state to resume from."""
+        if self.fmt == "npy":
+            self.ids.flush()
+            return {"n_written": self.n_written, "offset": 0}
+        self.fp.flush()
+        return {"n_written": self.n_written, "offset": self.fp.tell()}
+
+    def close(self) -> None:
+        """Flush everything to disk."""
+        if self.fmt == "npy":
+            self.ids.flush()
+        else:
+            self.fp.close()
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+
+def read_results(filepath: str) -> np.ndarray:
+    """
+    Read the predictions of a result file as label ids.
+
+    Parameters
+    ----------
+    filepath : str
+        An .npy file (memory-mapped) or a text file with a label per line
+
+    Returns
+    -------
+    ids : np.ndarray of dtype int16
+    """
+    filepath = os.path.abspath(filepath)
+    if filepath.endswith(".npy"):
+        return np.load(filepath, mmap_mode="r")
+    with open(filepath) as fp:
+        return get_label_table().encode(fp.read().splitlines())
@@ -6,7 +6,7 @@ import glob
 import os
 import pickle
 from collections import Counter
-from typing import Any, Dict, List, NewType, Optional, cast
+from typing import Any, Dict, List, NewType, Optional, Tuple, cast
 
 # Third party modules
 import click
@@ -14,10 +14,8 @@ import numpy as np
 
 # First party modules
 import lidtk.utils
-from lidtk.classifiers.char_distribution.char_dist_metric_train_test import (
-    get_common_characters,
-)
-from lidtk.data import char_distribution
+from lidtk import resources
+from lidtk.data import char_distribution, unicode_data
 
 iso2wiki = None  # type: Optional[Dict[str, str]]
 wiki2iso = None  # type: Optional[Dict[str, str]]
@@ -31,7 +29,14 @@ WikiType = NewType("WikiType", List[Dict[str, Any]])
 @click.command(name="analyze-data", help=__doc__)
 @click.option("--lang_dir", default=cfg["lang_dir_path"], show_default=True)
 @click.option("--theta", default=0.99, show_default=True)
-def main(lang_dir: str, theta: float = 0.99) -> None:
+@click.option("--n_jobs", type=int, help="Number of processes for counting")
+@click.option("--rebuild", is_flag=True, help="Count even if the stats are cached")
+def main(
+    lang_dir: str,
+    theta: float = 0.99,
+    n_jobs: Optional[int] = None,
+    rebuild: bool = False,
+) -> None:
     """
     Analyze the distribution of languages.
 
@@ -40,6 +45,9 @@ def main(lang_dir: str, theta: float = 0.99) -> None:
     lang_dir : str
     theta : float
         How much coverage of the language should be displayed.
+    n_jobs : int, optional (default: number of CPUs)
+    rebuild : bool, optional (default: False)
+        Count the characters even if the stats of a language are cached
     """
     files = sorted(glob.glob(lang_dir))
     lang_stats = {}
@@ -49,40 +57,38 @@ def main(lang_dir: str, theta: float = 0.99) -> None:
     print(f"theta={theta}")
     print("lang:                 characters             paragraphs      ")
     print("-------------------------------------------------------------")
-    for filepath in files:
-        wiki_code = os.path.splitext(os.path.split(filepath)[1])[0]
-        iso = get_iso(wiki_code)
-        lang_data = read_language_file(filepath)
-        chars = get_characters(lang_data["paragraphs"])
-        char_occurences = np.array([el[1] for el in chars.items()])
-        char_occurences = char_occurences / float(char_occurences.sum())
-        paraphgrah_lengths = np.array([len(el) for el in lang_data["paragraphs"]])
-        common_chars = get_common_characters(chars, theta)  # sorted()
-        lang_stats[iso] = {
-            "theta_100_len": len(chars),
-            "theta_99_len": len(get_common_characters(chars, 0.99)),
-            "theta_80_len": len(get_common_characters(chars, 0.99)),
-            "chars": chars,
-            "paraphgrah_len_min": paraphgrah_lengths.min(),
-            "paraphgrah_len_max": paraphgrah_lengths.max(),
-            "paraphgrah_len_mean": paraphgrah_lengths.mean(),
-        }
-        print(
-            "{:>9} || {:>5}: {:>5.2f} {:>5.2f} {:>5.2f} {:>5.2f} "  # noqa
-            "| [{:>5} {:6.1f} {:>6}] '{}' ({} chars)".format(
-                iso,
-                len(chars),
-                char_occurences.min() * 100,  # least common char
-                get_percentile_like(char_occurences, 0.99) * 100,
-                char_occurences.mean() * 100,  # mean common char
-                char_occurences.max() * 100,  # most common char
-                paraphgrah_lengths.min(),
-                paraphgrah_lengths.mean(),
-                paraphgrah_lengths.max(),
-                "".join(common_chars),
-                len(common_chars),
+    tasks = [(filepath, cfg["lang_stats_path"], rebuild) for filepath in files]
+    with resources.get_pool(n_jobs) as pool:
+        for filepath, stats in zip(files, pool.imap(load_language_stats, tasks)):
+            wiki_code = os.path.splitext(os.path.split(filepath)[1])[0]
+            iso = get_iso(wiki_code)
+            char_occurences = stats["counts"] / float(stats["counts"].sum())
+            common_chars = get_common_code_points(stats, theta)
+            lang_stats[iso] = {
+                "theta_100_len": len(stats["counts"]),
+                "theta_99_len": len(get_common_code_points(stats, 0.99)),
+                "theta_80_len": len(get_common_code_points(stats, 0.80)),
+                "chars": stats_to_counter(stats),
+                "paraphgrah_len_min": stats["paraphgrah_len_min"],
+                "paraphgrah_len_max": stats["paraphgrah_len_max"],
+                "paraphgrah_len_mean": stats["paraphgrah_len_mean"],
+            }
+            print(
+                "{:>9} || {:>5}: {:>5.2f} {:>5.2f} {:>5.2f} {:>5.2f} "  # noqa
+                "| [{:>5} {:6.1f} {:>6}] '{}' ({} chars)".format(
+                    iso,
+                    len(char_occurences),
+                    char_occurences[-1] * 100,  # least common char
+                    get_percentile_like(char_occurences, 0.99) * 100,
+                    char_occurences.mean() * 100,  # mean common char
+                    char_occurences[0] * 100,  # most common char
+                    stats["paraphgrah_len_min"],
+                    stats["paraphgrah_len_mean"],
+                    stats["paraphgrah_len_max"],
+                    "".join(map(chr, common_chars.tolist())),
+                    len(common_chars),
+                )
             )
-        )
     mean_paragraph_len = np.array(
         [el["paraphgrah_len_mean"] for el in lang_stats.values()]
     ).mean()
@@ -101,6 +107,115 @@ def main(lang_dir: str, theta: float = 0.99) -> None:
     char_distribution.main(lang_stats)
 
 
+def get_language_stats(paragraphs: List[str]) -> Dict[str, Any]:
+    """
+    Count the characters and measure the paragraphs of a language.
+
+    Parameters
+    ----------
+    paragraphs : List[str]
+
+    Returns
+    -------
+    stats : Dict[str, Any]
+        'code_points' and 'counts' are sorted by count (most common first),
+        'cumulative_counts' is the cumulative sum of 'counts'.
+
+    Examples
+    --------
+    >>> stats = get_language_stats(["abca", "ab"])
+    >>> "".join(map(chr, stats["code_points"])), stats["counts"].tolist()
+    ('abc', [3, 2, 1])
+    >>> stats["paraphgrah_len_max"]
+    4
+    """
+    code_points, counts = np.unique(
+        unicode_data.text_to_code_points("".join(paragraphs)), return_counts=True
+    )
+    # Most common first, ties like in get_common_characters
+    order = np.lexsort((code_points, counts))[::-1]
+    paragraph_lengths = np.array([len(paragraph) for paragraph in paragraphs])
+    return {
+        "code_points": code_points[order],
+        "counts": counts[order],
+        "cumulative_counts": np.cumsum(counts[order]),
+        "paraphgrah_len_min": int(paragraph_lengths.min()),
+        "paraphgrah_len_max": int(paragraph_lengths.max()),
+        "paraphgrah_len_mean": float(paragraph_lengths.mean()),
+    }
+
+
+def load_language_stats(args: Tuple[str, str, bool]) -> Dict[str, Any]:
+    """
+    Get the stats of a language file, either from the cache or by counting.
+
+    The cache is invalidated when the language file changes.
+
+    Parameters
+    ----------
+    args : Tuple[str, str, bool]
+        Path to the language .pickle file, the pattern of the cache path and
+        if the cache should be ignored
+
+    Returns
+    -------
+    stats : Dict[str, Any]
+        See get_language_stats
+    """
+    filepath, cache_pattern, rebuild = args
+    wiki_code = os.path.splitext(os.path.split(filepath)[1])[0]
+    cache_path = cache_pattern.format(wiki_code)
+    stat = os.stat(filepath)
+    fingerprint = f"{stat.st_size}-{stat.st_mtime_ns}"
+    if not rebuild and os.path.isfile(cache_path):
+        with open(cache_path, "rb") as handle:
+            cached = pickle.load(handle)
+        if cached["fingerprint"] == fingerprint:
+            return cached
+    stats = get_language_stats(read_language_file(filepath)["paragraphs"])
+    stats["fingerprint"] = fingerprint
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    with open(cache_path, "wb") as handle:
+        pickle.dump(stats, handle)
+    return stats
+
+
+def get_common_code_points(stats: Dict[str, Any], coverage: float) -> np.ndarray:
+    """
+    Get the most common code points which cover `coverage` of a language.
+
+    This is the same as get_common_characters, but on language stats.
+
+    Parameters
+    ----------
+    stats : Dict[str, Any]
+        See get_language_stats
+    coverage : float
+
+    Returns
+    -------
+    code_points : np.ndarray
+
+    Examples
+    --------
+    >>> stats = get_language_stats(["aaaaaaab", "c"])
+    >>> "".join(map(chr, get_common_code_points(stats, 0.7)))
+    'a'
+    >>> "".join(map(chr, get_common_code_points(stats, 0.8)))
+    'ac'
+    """
+    assert coverage > 0.0, f"coverage={coverage}, but > 0 expected"
+    cumulative_counts = stats["cumulative_counts"]
+    n = np.searchsorted(cumulative_counts, coverage * cumulative_counts[-1]) + 1
+    return stats["code_points"][:n]
+
+
+def stats_to_counter(stats: Dict[str, Any]) -> Counter:
+    """Get the character counts of language stats as a Counter."""
+    chars = map(chr, stats["code_points"].tolist())
+    return Counter(dict(zip(chars, stats["counts"].tolist())))
+
+
 def check_presence(lang_dir: str = "lang") -> Dict[Any, Any]:
     """
     Check how many files of the wiki2iso dict are present.
@@ -327,7 +442,7 @@ def get_characters(lang_data: List[str]) -> Counter:
     # maps the character to the count
     characters = Counter()  # type: Counter
     for paragraph in lang_data:
-        characters += Counter(paragraph)
+        characters.update(paragraph)
     return characters
 
 
@@ -343,14 +458,15 @@ def get_percentile_like(xs: List[float], min_amount: float) -> float:
     Returns
     -------
     float
+
+    Examples
+    --------
+    >>> get_percentile_like([0.1, 0.6, 0.3], 0.8)
+    0.3
     """
-    xs = sorted(xs, reverse=True)
-    sum_ = 0.0
-    i = 0
-    while sum_ < min_amount:
-        sum_ += xs[i]
-        i += 1
-    return xs[i - 1]
+    xs_sorted = np.sort(np.asarray(xs, dtype=np.float64))[::-1]
+    i = np.searchsorted(np.cumsum(xs_sorted), min_amount)
+    return float(xs_sorted[min(i, len(xs_sorted) - 1)])
 
 
 wiki = get_language_data()
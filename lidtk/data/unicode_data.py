@@ -0,0 +1,195 @@
+"""
+Lookup tables for properties of Unicode code points.
+
+The tables are derived from the Unicode Character Database (Scripts.txt,
+Blocks.txt) and stored as ranges in CSV files next to this module.
+"""
+
+# Core Library modules
+import csv
+from typing import List, Optional, Tuple
+
+# Third party modules
+import numpy as np
+import pkg_resources
+
+UNKNOWN_SCRIPT = "Unknown"
+NO_BLOCK = "No Block"
+
+# Scripts which are used by all languages (digits, punctuation, combining
+# marks) or which are not assigned at all
+NEUTRAL_SCRIPTS = ["Common", "Inherited", UNKNOWN_SCRIPT]
+
+n_code_points = 0x110000
+scripts: Optional[List[str]] = None
+script_table: Optional[np.ndarray] = None
+blocks: Optional[Tuple[np.ndarray, np.ndarray, List[str]]] = None
+
+
+def read_ranges(csv_filepath: str) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Read a CSV file with the columns start;end;<value> (start/end in hex).
+
+    Parameters
+    ----------
+    csv_filepath : str
+
+    Returns
+    -------
+    starts, ends, values : Tuple[np.ndarray, np.ndarray, List[str]]
+        starts and ends are inclusive code points
+    """
+    starts, ends, values = [], [], []
+    with open(csv_filepath) as fp:
+        reader = csv.reader(fp, delimiter=";")
+        next(reader)  # header
+        for start, end, value in reader:
+            starts.append(int(start, 16))
+            ends.append(int(end, 16))
+            values.append(value)
+    return np.array(starts, dtype=np.uint32), np.array(ends, dtype=np.uint32), values
+
+
+def get_scripts() -> List[str]:
+    """
+    Get the names of all scripts; the index is the script id.
+
+    Returns
+    -------
+    scripts : List[str]
+
+    Examples
+    --------
+    >>> get_scripts()[0]
+    'Unknown'
+    >>> "Thai" in get_scripts()
+    True
+    """
+    if scripts is None:
+        init_script_table()
+    assert scripts is not None, "for mypy"
+    return scripts
+
+
+def get_script_table() -> np.ndarray:
+    """
+    Get the script id of every code point.
+
+    Returns
+    -------
+    script_table : np.ndarray of dtype uint8 and shape (0x110000,)
+    """
+    if script_table is None:
+        init_script_table()
+    assert script_table is not None, "for mypy"
+    return script_table
+
+
+def init_script_table() -> None:
+    """Initialize the scripts and script_table global variables."""
+    csv_filepath = pkg_resources.resource_filename("lidtk", "data/unicode_scripts.csv")
+    starts, ends, values = read_ranges(csv_filepath)
+    names = [UNKNOWN_SCRIPT] + sorted(set(values))
+    name2id = {name: script_id for script_id, name in enumerate(names)}
+    table = np.zeros(n_code_points, dtype=np.uint8)
+    for start, end, value in zip(starts, ends, values):
+        table[start : end + 1] = name2id[value]
+    globals()["scripts"] = names
+    globals()["script_table"] = table
+
+
+def get_blocks() -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Get the Unicode blocks.
+
+    Returns
+    -------
+    starts, ends, names : Tuple[np.ndarray, np.ndarray, List[str]]
+        Sorted by start. Code points which are in no block have the block id
+        len(names), see get_block_ids.
+    """
+    if blocks is None:
+        csv_filepath = pkg_resources.resource_filename(
+            "lidtk", "data/unicode_blocks.csv"
+        )
+        globals()["blocks"] = read_ranges(csv_filepath)
+    assert blocks is not None, "for mypy"
+    return blocks
+
+
+def get_block_ids(code_points: np.ndarray) -> np.ndarray:
+    """
+    Get the Unicode block id of each code point.
+
+    Parameters
+    ----------
+    code_points : np.ndarray
+
+    Returns
+    -------
+    block_ids : np.ndarray
+        Index into the names of get_blocks(); len(names) for code points
+        which are in no block
+
+    Examples
+    --------
+    >>> starts, ends, names = get_blocks()
+    >>> [names[i] for i in get_block_ids(text_to_code_points("aไ"))]
+    ['Basic Latin', 'Thai']
+    """
+    starts, ends, names = get_blocks()
+    block_ids = np.searchsorted(starts, code_points, side="right") - 1
+    in_no_block = (block_ids < 0) | (code_points > ends[np.maximum(block_ids, 0)])
+    block_ids[in_no_block] = len(names)
+    return block_ids
+
+
+def text_to_code_points(text: str) -> np.ndarray:
+    """
+    Get the code points of a text.
+
+    Parameters
+    ----------
+    text : str
+
+    Returns
+    -------
+    code_points : np.ndarray of dtype uint32
+
+    Examples
+    --------
+    >>> text_to_code_points("aä").tolist()
+    [97, 228]
+    """
+    encoded = text.encode("utf-32-le", errors="surrogatepass")
+    return np.frombuffer(encoded, dtype=np.uint32)
+
+
+def get_script_counts(texts: List[str]) -> np.ndarray:
+    """
+    Count how many characters of each text belong to each script.
+
+    Parameters
+    ----------
+    texts : List[str]
+
+    Returns
+    -------
+    counts : np.ndarray of shape (len(texts), len(get_scripts()))
+
+    Examples
+    --------
+    >>> counts = get_script_counts(["ab1", "ไทย"])
+    >>> int(counts[0, get_scripts().index("Latin")])
+    2
+    >>> int(counts[1, get_scripts().index("Thai")])
+    3
+    """
+    n_scripts = len(get_scripts())
+    lengths = np.array([len(text) for text in texts], dtype=np.int64)
+    script_ids = get_script_table()[text_to_code_points("".join(texts))]
+    rows = np.repeat(np.arange(len(texts)), lengths)
+    counts = np.bincount(
+        rows * n_scripts + script_ids, minlength=len(texts) * n_scripts
+    )
+    return counts.reshape(len(texts), n_scripts)
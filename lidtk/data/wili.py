@@ -4,7 +4,8 @@
 import codecs
 import csv
 import logging
-from typing import Any, Dict, List
+import os
+from typing import Any, Dict, List, Optional
 
 # Third party modules
 import numpy as np
@@ -18,10 +19,42 @@ logger = logging.getLogger(__name__)
 isodict = None
 
 
+def lang_codes_to_indices(data: List[str], wili_codes: List[str]) -> np.ndarray:
+    """
+    Convert an iterable of ISO 369-3 codes to class indices.
+
+    These are the integer targets for a sparse categorical cross-entropy.
+    With wili_codes=labels_s they are the label ids of
+    lidtk.data.label_table.
+
+    Parameters
+    ----------
+    data : List[str]
+        Each str is a WiLI language code
+    wili_codes : List[str]
+        List of WiLi language codes codes which define the order.
+        This has to contain any code in data
+
+    Returns
+    -------
+    transformed : np.ndarray of dtype int16
+
+    Examples
+    --------
+    >>> lang_codes_to_indices(["eng", "deu", "eng"], ["deu", "eng"])
+    array([1, 0, 1], dtype=int16)
+    """
+    code2index = {code: index for index, code in enumerate(wili_codes)}
+    return np.array([code2index[el] for el in data], dtype=np.int16)
+
+
 def lang_codes_to_one_hot(data: List[str], wili_codes: List[str]) -> np.ndarray:
     """
     Convert an iterable of ISO 369-3 codes to a one-hot array.
 
+    Prefer lang_codes_to_indices: the one-hot array needs
+    len(data) * len(wili_codes) floats.
+
     Parameters
     ----------
     data : List[str]
@@ -34,7 +67,7 @@ def lang_codes_to_one_hot(data: List[str], wili_codes: List[str]) -> np.ndarray:
     -------
     transformed : np.ndarray
     """
-    transformed = [wili_codes.index(el) for el in data]
+    transformed = lang_codes_to_indices(data, wili_codes)
     return indices_to_one_hot(transformed, len(wili_codes))
 
 
@@ -61,8 +94,10 @@ def indices_to_one_hot(data: List[int], nb_classes: int) -> np.ndarray:
            [1., 0., 0.],
            [0., 1., 0.]])
     """
-    targets = np.array(data).reshape(-1)
-    return np.eye(nb_classes)[targets]
+    targets = np.array(data, dtype=np.int64).reshape(-1)
+    transformed = np.zeros((len(targets), nb_classes))
+    transformed[np.arange(len(targets)), targets] = 1
+    return transformed
 
 
 def get_language_data(csv_filepath: str = None) -> List[Dict[Any, Any]]:
@@ -99,6 +134,104 @@ def get_language_data(csv_filepath: str = None) -> List[Dict[Any, Any]]:
     return wiki
 
 
+def get_fingerprint() -> str:
+    """
+    Get an identifier of the current version of the dataset files.
+
+    It changes if any of the x/y train/test files is modified.
+
+    Returns
+    -------
+    fingerprint : str
+    """
+    cfg = lidtk.utils.load_cfg()
+    parts = []
+    for key in ["x_train_path", "y_train_path", "x_test_path", "y_test_path"]:
+        stat = os.stat(cfg[key])
+        parts.append(f"{stat.st_size}-{stat.st_mtime_ns}")
+    return "_".join(parts)
+
+
+def stratified_order(ys: List[str], seed: int = 0) -> np.ndarray:
+    """
+    Order samples so that the labels take turns.
+
+    The first len(set(ys)) samples have distinct labels, as do the next
+    ones until a label runs out of samples. Within a label, the samples are
+    shuffled.
+
+    Parameters
+    ----------
+    ys : List[str]
+    seed : int, optional (default: 0)
+
+    Returns
+    -------
+    order : np.ndarray
+        A permutation of range(len(ys))
+
+    Examples
+    --------
+    >>> ys = ["a", "a", "a", "b", "c", "c"]
+    >>> [ys[i] for i in stratified_order(ys)]
+    ['a', 'b', 'c', 'a', 'c', 'a']
+    """
+    _, label_ids = np.unique(np.asarray(ys), return_inverse=True)
+    permutation = np.random.RandomState(seed).permutation(len(ys))
+    shuffled_ids = label_ids.reshape(-1)[permutation]
+    # Rank of each sample among the (shuffled) samples of its label
+    by_label = np.argsort(shuffled_ids, kind="stable")
+    counts = np.bincount(shuffled_ids)
+    ranks = np.empty(len(ys), dtype=np.int64)
+    ranks[by_label] = np.arange(len(ys)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return permutation[np.lexsort((shuffled_ids, ranks))]
+
+
+class LazyLines:
+    """
+    Read single lines of a text file by index without loading the file.
+
+    The offsets of the lines are found with one scan over a memory map of
+    the file.
+
+    Parameters
+    ----------
+    filepath : str
+        A UTF-8 encoded text file, e.g. x_test.txt
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = make_path_absolute(filepath)
+        self._starts: Optional[np.ndarray] = None
+        self._ends: Optional[np.ndarray] = None
+
+    def _find_lines(self) -> None:
+        if os.path.getsize(self.filepath) == 0:
+            self._starts = self._ends = np.zeros(0, dtype=np.int64)
+            return
+        content = np.memmap(self.filepath, dtype=np.uint8, mode="r")
+        ends = np.flatnonzero(content == ord("\n"))
+        if len(ends) == 0 or ends[-1] != len(content) - 1:
+            ends = np.append(ends, len(content))
+        self._starts = np.concatenate([[0], ends[:-1] + 1])
+        self._ends = ends
+
+    def __len__(self) -> int:
+        if self._starts is None:
+            self._find_lines()
+        assert self._starts is not None, "for mypy"
+        return len(self._starts)
+
+    def __getitem__(self, index: int) -> str:
+        if self._starts is None:
+            self._find_lines()
+        assert self._starts is not None and self._ends is not None, "for mypy"
+        start, end = int(self._starts[index]), int(self._ends[index])
+        with open(self.filepath, "rb") as fp:
+            fp.seek(start)
+            return fp.read(end - start).decode("utf8")
+
+
 def load_data(config=None):
     """
     Load the WID dataset.
@@ -106,6 +239,9 @@ def load_data(config=None):
     Parameters
     ----------
     config : dict
+        'target_type' is 'index' for int16 class indices (see
+        lang_codes_to_indices), 'one_hot' for one-hot arrays or missing
+        for the ISO 369-3 codes
 
     Returns
     -------
@@ -123,6 +259,8 @@ def load_data(config=None):
     117500
     >>> data['y_train'].shape
     (94000, 235)
+    >>> load_data({'target_type': 'index'})['y_train'].shape
+    (94000,)
     >>> len(data['labels'])
     235
     >>> data['labels'][0]['ISO 369-3']
@@ -152,10 +290,12 @@ def load_data(config=None):
         y_test = f.read().strip().split("\n")
     ys = {"y_train": y_train, "y_val": y_val, "y_test": y_test}
     label_list = [el["Label"] for el in globals()["labels"]]
+    target_type = config.get("target_type")
     for set_name in ["y_train", "y_val", "y_test"]:
-        if "target_type" in config and config["target_type"] == "one_hot":
-            ys[set_name] = np.array([label_list.index(y) for y in ys[set_name]])
-            ys[set_name] = indices_to_one_hot(ys[set_name], globals()["n_classes"])
+        if target_type == "index":
+            ys[set_name] = lang_codes_to_indices(ys[set_name], label_list)
+        elif target_type == "one_hot":
+            ys[set_name] = lang_codes_to_one_hot(ys[set_name], label_list)
     data = {
         "x_train": x_train,
         "y_train": ys["y_train"],
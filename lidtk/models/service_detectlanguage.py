@@ -3,8 +3,12 @@ Script for the usage of the detectlanguage.com service.
 
 Prerequesites
 -------------
-* API key from https://github.com/detectlanguage/detectlanguage-python
+* API key from https://github.com/detectlanguage/detectlanguage-python,
+  exported as DETECTLANGUAGE_API_KEY
 * pip install detectlanguage
+
+For bulk classification and benchmarks use
+lidtk.classifiers.detectlanguage_mod, which batches and pools requests.
 """
 
 # Core Library modules
@@ -15,132 +19,11 @@ from typing import Any, List
 import detectlanguage
 
 # First party modules
+from lidtk.classifiers import detectlanguage_mod
 from lidtk.data import language_utils
 
-detectlanguage2label = {
-    "gv": "glv",
-    "gu": "guj",
-    "sco": "sco",
-    "zh-Hant": "lzh",
-    "gd": "gla",
-    "ga": "gle",
-    "gn": "grn",
-    "gl": "glg",
-    "lb": "ltz",
-    "la": "lat",
-    "ln": "lin",
-    "lo": "lao",
-    "tt": "tat",
-    "tr": "tur",
-    "lv": "lav",
-    "lt": "lit",
-    "tk": "tuk",
-    "th": "tha",
-    "tg": "tgk",
-    "te": "tel",
-    "ta": "tam",
-    "yi": "yid",
-    "ceb": "ceb",
-    "yo": "yor",
-    "de": "deu",
-    "da": "dan",
-    "dv": "div",
-    "qu": "que",
-    "el": "ell",
-    "eo": "epo",
-    "en": "eng",
-    "zh": "zho",
-    "bo": "bod",
-    "uk": "ukr",
-    "eu": "eus",
-    "et": "est",
-    "es": "spa",
-    "ru": "rus",
-    "rm": "roh",
-    "ro": "ron",
-    "be": "bel",
-    "bg": "bul",
-    "ba": "bak",
-    "bn": "ben",
-    "jw": "jav",
-    "bh": "bho",
-    "br": "bre",
-    "bs": "bos",
-    "ja": "jpn",
-    "oc": "oci",
-    "or": "ori",
-    "co": "cos",
-    "nso": "nso",
-    "ca": "cat",
-    "cy": "cym",
-    "cs": "ces",
-    "ps": "pus",
-    "pt": "por",
-    "tl": "tgl",
-    "pa": "pan",
-    "vi": "vie",
-    "war": "war",
-    "pl": "pol",
-    "hy": "hye",
-    "hr": "hrv",
-    "ht": "hat",
-    "hu": "hun",
-    "hi": "hin",
-    "vo": "vol",
-    "mg": "mlg",
-    "uz": "uzb",
-    "ml": "mal",
-    "mn": "mon",
-    "mi": "mri",
-    "mk": "mkd",
-    "ur": "urd",
-    "mt": "mlt",
-    "ms": "msa",
-    "mr": "mar",
-    "ug": "uig",
-    "my": "mya",
-    "af": "afr",
-    "sw": "swa",
-    "is": "isl",
-    "am": "amh",
-    "it": "ita",
-    "iw": "heb",
-    "sv": "swe",
-    "ia": "ina",
-    "as": "asm",
-    "ar": "ara",
-    "su": "sun",
-    "ay": "aym",
-    "az": "aze",
-    "ie": "ile",
-    "id": "ind",
-    "nl": "nld",
-    "no": "nob",
-    "ne": "nep",
-    "fr": "fra",
-    "fy": "fry",
-    "fa": "fas",
-    "fi": "fin",
-    "sa": "san",
-    "fo": "fao",
-    "ka": "kat",
-    "kk": "kaz",
-    "sr": "srp",
-    "sq": "sqi",
-    "ko": "kor",
-    "kn": "kan",
-    "km": "khm",
-    "sk": "slk",
-    "si": "sin",
-    "so": "som",
-    "sn": "sna",
-    "ku": "kur",
-    "sl": "slv",
-    "ky": "kir",
-    "sd": "snd",
-    "fj": "hif",
-    "egy": "arz",
-}
+# Maps detectlanguage's codes to WiLI labels
+detectlanguage2label = dict(detectlanguage_mod.classifier.cfg["mapping"])
 
 
 class ServiceClassifier:
@@ -169,7 +52,9 @@ class ServiceClassifier:
 
 def create_model(nb_classes: int, input_shape: Any) -> ServiceClassifier:
     """Create a model for LID."""
-    model = ServiceClassifier("c5b442a13bdc4522f2a0463581c5bcb0")
+    model = ServiceClassifier(
+        os.environ[detectlanguage_mod.classifier.cfg["api_key_env"]]
+    )
     return model
 
 
@@ -0,0 +1,165 @@
+"""
+Run the stages of a batch job at the same time.
+
+Each stage runs in its own thread and hands its results to the next stage
+through a bounded queue, so reading, feature extraction, inference and
+writing overlap. This pays off because numpy, scipy, scikit-learn and Keras
+release the GIL in their heavy calls. The bounded queues keep a fast stage
+from running far ahead of a slow one and buffering the whole dataset.
+"""
+
+# Core Library modules
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the items in a queue
+_done = object()
+
+
+class _Failure:
+    """Carries an exception of a stage to the consumer."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class Pipeline:
+    """
+    Apply stages to a stream of items in background threads.
+
+    Exceptions of a stage, including KeyboardInterrupt, are raised in the
+    consumer after the results of all earlier items.
+
+    Parameters
+    ----------
+    stages : List[Tuple[str, Callable[[Any], Any]]]
+        Names and functions; each function gets the result of the previous
+        one
+    queue_size : int, optional (default: 4)
+        Items which may wait between two stages
+
+    Examples
+    --------
+    >>> pipeline = Pipeline([("double", lambda x: 2 * x), ("inc", lambda x: x + 1)])
+    >>> list(pipeline.run(range(4)))
+    [1, 3, 5, 7]
+    """
+
+    def __init__(
+        self, stages: List[Tuple[str, Callable[[Any], Any]]], queue_size: int = 4
+    ):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.busy = {name: 0.0 for name, _ in stages}
+        self.elapsed = 0.0
+
+    def run(self, items: Iterable[Any]) -> Iterator[Any]:
+        """
+        Yield the results of the last stage in the order of the items.
+
+        An exception in a stage stops the pipeline and is raised here.
+        """
+        self.busy = {name: 0.0 for name, _ in self.stages}
+        stop = threading.Event()
+        queues = [
+            queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)
+        ]  # type: List[queue.Queue]
+        threads = [
+            threading.Thread(
+                target=self._read, args=(items, queues[0], stop), daemon=True
+            )
+        ]
+        for (name, function), in_queue, out_queue in zip(
+            self.stages, queues, queues[1:]
+        ):
+            threads.append(
+                threading.Thread(
+                    target=self._work,
+                    args=(name, function, in_queue, out_queue, stop),
+                    daemon=True,
+                )
+            )
+        t0 = time.time()
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                item = queues[-1].get()
+                if item is _done:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            self.elapsed = time.time() - t0
+
+    def get_utilization(self) -> Dict[str, float]:
+        """Get the fraction of the last run's wall time each stage was busy."""
+        return {
+            name: busy / max(self.elapsed, 1e-9) for name, busy in self.busy.items()
+        }
+
+    @staticmethod
+    def _put(out_queue: queue.Queue, item: Any, stop: threading.Event) -> bool:
+        """Put an item unless the pipeline was stopped; True if it was put."""
+        while not stop.is_set():
+            try:
+                out_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    @staticmethod
+    def _get(in_queue: queue.Queue, stop: threading.Event) -> Any:
+        """Get the next item, or _done if the pipeline was stopped."""
+        while not stop.is_set():
+            try:
+                return in_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _done
+
+    def _read(
+        self, items: Iterable[Any], out_queue: queue.Queue, stop: threading.Event
+    ) -> None:
+        try:
+            for item in items:
+                if not self._put(out_queue, item, stop):
+                    return
+        except BaseException as e:
+            self._put(out_queue, _Failure(e), stop)
+            return
+        self._put(out_queue, _done, stop)
+
+    def _work(
+        self,
+        name: str,
+        function: Callable[[Any], Any],
+        in_queue: queue.Queue,
+        out_queue: queue.Queue,
+        stop: threading.Event,
+    ) -> None:
+        while True:
+            item = self._get(in_queue, stop)
+            if item is _done or isinstance(item, _Failure):
+                self._put(out_queue, item, stop)
+                return
+            t0 = time.time()
+            try:
+                result = function(item)
+            except BaseException as e:
+                logger.debug(f"Stage {name} failed: {e}")
+                self._put(out_queue, _Failure(e), stop)
+                return
+            self.busy[name] += time.time() - t0
+            if not self._put(out_queue, result, stop):
+                return
@@ -0,0 +1,265 @@
+"""
+Share a CPU budget between worker processes and thread pools.
+
+Without a budget, every process starts BLAS, OpenMP and TensorFlow pools
+with one thread per core, so several processes oversubscribe the CPUs.
+
+The budget is `cpus` of the config or the LIDTK_CPUS environment variable
+(which `lidtk --cpus` sets): either a number of CPUs or a list like
+'0-3,8'. Worker pools created with get_pool split the budget evenly among
+their workers and limit the threads of each worker to its share. With
+`pin_cpus` (LIDTK_PIN_CPUS=1, `lidtk --pin_cpus`) the processes are
+additionally bound to their CPUs.
+"""
+
+# Core Library modules
+import logging
+import multiprocessing
+import multiprocessing.pool
+import os
+import sys
+from typing import Any, Callable, List, Optional, Tuple
+
+# First party modules
+import lidtk.utils
+
+logger = logging.getLogger(__name__)
+
+# Read by the native thread pools when the library is loaded
+thread_env_vars = [
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "TF_NUM_INTRAOP_THREADS",
+]
+
+
+def parse_cpus(spec: str) -> List[int]:
+    """
+    Parse a CPU list.
+
+    Parameters
+    ----------
+    spec : str
+        Comma-separated CPUs and ranges of CPUs
+
+    Returns
+    -------
+    cpus : List[int]
+
+    Examples
+    --------
+    >>> parse_cpus("0-3,8")
+    [0, 1, 2, 3, 8]
+    """
+    cpus = []  # type: List[int]
+    for part in spec.split(","):
+        if "-" in part:
+            start, end = part.split("-")
+            cpus += range(int(start), int(end) + 1)
+        else:
+            cpus.append(int(part))
+    return sorted(set(cpus))
+
+
+def get_available_cpus() -> List[int]:
+    """Get the CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def get_cpus() -> List[int]:
+    """
+    Get the CPUs of the budget.
+
+    Returns
+    -------
+    cpus : List[int]
+        A number of CPUs takes the first available ones; without a budget,
+        all available CPUs
+    """
+    spec = os.environ.get("LIDTK_CPUS")
+    if spec is None:
+        spec = lidtk.utils.load_cfg().get("cpus")
+    available = get_available_cpus()
+    if spec is None:
+        return available
+    spec = str(spec)
+    if spec.isdigit():
+        return available[: max(1, int(spec))]
+    return parse_cpus(spec)
+
+
+def get_cpu_budget() -> int:
+    """Get the number of CPUs lidtk may use."""
+    return len(get_cpus())
+
+
+def is_pinning() -> bool:
+    """Check whether processes are bound to the CPUs of their share."""
+    pin = os.environ.get("LIDTK_PIN_CPUS")
+    if pin is None:
+        return bool(lidtk.utils.load_cfg().get("pin_cpus", False))
+    return pin.lower() in ["1", "true", "yes"]
+
+
+def split_cpus(cpus: List[int], n_workers: int) -> List[List[int]]:
+    """
+    Split CPUs into consecutive shares of (almost) the same size.
+
+    If there are more workers than CPUs, the CPUs are shared round-robin.
+
+    Examples
+    --------
+    >>> split_cpus([0, 1, 2, 3, 4], 2)
+    [[0, 1, 2], [3, 4]]
+    >>> split_cpus([0, 1], 3)
+    [[0], [1], [0]]
+    """
+    if n_workers >= len(cpus):
+        return [[cpus[i % len(cpus)]] for i in range(n_workers)]
+    size, rest = divmod(len(cpus), n_workers)
+    shares = []
+    start = 0
+    for i in range(n_workers):
+        end = start + size + (1 if i < rest else 0)
+        shares.append(cpus[start:end])
+        start = end
+    return shares
+
+
+def configure_threads(n_threads: int) -> None:
+    """
+    Limit the threads of BLAS, OpenMP and TensorFlow in this process.
+
+    Libraries which are loaded later read the environment variables;
+    loaded ones are limited through threadpoolctl and the TensorFlow API.
+
+    Parameters
+    ----------
+    n_threads : int
+    """
+    for var in thread_env_vars:
+        os.environ[var] = str(n_threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = str(min(2, n_threads))
+    # Third party modules
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(limits=n_threads)
+    if "tensorflow" in sys.modules:
+        tf = sys.modules["tensorflow"]
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(n_threads)
+            tf.config.threading.set_inter_op_parallelism_threads(min(2, n_threads))
+        except (AttributeError, RuntimeError) as e:
+            # TensorFlow 1 or the pools exist already
+            logger.debug(f"Could not limit the TensorFlow threads: {e}")
+
+
+def configure(cpus: Optional[str] = None, pin: Optional[bool] = None) -> None:
+    """
+    Apply the CPU budget to this process and its future children.
+
+    Parameters
+    ----------
+    cpus : str, optional (default: LIDTK_CPUS or `cpus` of the config)
+        A number of CPUs or a CPU list, see parse_cpus
+    pin : bool, optional (default: LIDTK_PIN_CPUS or `pin_cpus`)
+        Bind this process to the CPUs of the budget
+    """
+    if cpus is not None:
+        os.environ["LIDTK_CPUS"] = str(cpus)
+    if pin is not None:
+        os.environ["LIDTK_PIN_CPUS"] = "1" if pin else "0"
+    budget = get_cpus()
+    configure_threads(len(budget))
+    if is_pinning() and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, budget)
+    logger.info(f"CPU budget: {len(budget)} CPUs {budget}")
+
+
+def _init_pool_worker(
+    counter: Any,
+    n_workers: int,
+    n_threads: Optional[int],
+    initializer: Optional[Callable[..., None]],
+    initargs: Tuple[Any, ...],
+) -> None:
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    share = split_cpus(get_cpus(), n_workers)[index % n_workers]
+    configure_threads(len(share) if n_threads is None else n_threads)
+    if is_pinning() and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, share)
+    # The workers' own children stay within this share
+    os.environ["LIDTK_CPUS"] = ",".join(str(cpu) for cpu in share)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def get_worker_initializer(
+    n_workers: int,
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: Tuple[Any, ...] = (),
+    n_threads: Optional[int] = None,
+    context: Any = multiprocessing,
+) -> Tuple[Callable[..., None], Tuple[Any, ...]]:
+    """
+    Get an initializer which gives each worker its share of the budget.
+
+    Use it for pools which are not created with get_pool, e.g.
+    concurrent.futures.ProcessPoolExecutor.
+
+    Parameters
+    ----------
+    n_workers : int
+    initializer : Callable, optional (default: None)
+        Called with initargs after the share is applied
+    initargs : Tuple[Any, ...]
+    n_threads : int, optional (default: the CPUs of the share)
+        Threads per worker
+    context : multiprocessing context, optional
+
+    Returns
+    -------
+    initializer, initargs : Tuple[Callable, Tuple[Any, ...]]
+    """
+    counter = context.Value("i", 0)
+    return _init_pool_worker, (counter, n_workers, n_threads, initializer, initargs)
+
+
+def get_pool(
+    n_workers: Optional[int] = None,
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: Tuple[Any, ...] = (),
+    n_threads: Optional[int] = None,
+    context: Any = None,
+) -> multiprocessing.pool.Pool:
+    """
+    Create a process pool within the CPU budget.
+
+    Parameters
+    ----------
+    n_workers : int, optional (default: the CPU budget)
+    initializer : Callable, optional (default: None)
+    initargs : Tuple[Any, ...]
+    n_threads : int, optional (default: the CPUs of the worker's share)
+        Threads per worker for BLAS, OpenMP and TensorFlow
+    context : multiprocessing context, optional (default: the default one)
+
+    Returns
+    -------
+    pool : multiprocessing.pool.Pool
+    """
+    if context is None:
+        context = multiprocessing.get_context()
+    if n_workers is None:
+        n_workers = get_cpu_budget()
+    worker_initializer, worker_initargs = get_worker_initializer(
+        n_workers, initializer, initargs, n_threads, context
+    )
+    return context.Pool(n_workers, worker_initializer, worker_initargs)
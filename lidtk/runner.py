@@ -0,0 +1,268 @@
+"""
+Evaluate several classifiers on the WiLI test set with one data load.
+
+Each experiment file is either the config of a classifier (e.g.
+lidtk/classifiers/config/langid.yaml) or a file like
+
+    classifier: langid
+    config: my_langid.yaml  # optional, relative to this file
+    languages: [deu, eng]  # optional
+    batch_size: 1000  # optional, overrides the tuned profile
+
+The test set is loaded once. With several jobs, the worker processes are
+forked after that, so they share it instead of loading it again. Each
+classifier is warmed up on the first texts and then timed on the full test
+set with its tuned profile (see `lidtk tune`). The predictions are written
+to `<output_dir>/<experiment>.npy`, added to the results store and
+summarized in `<output_dir>/report.json`.
+"""
+
+# Core Library modules
+import codecs
+import datetime
+import json
+import logging
+import multiprocessing
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+# Third party modules
+import click
+import numpy as np
+import yaml
+
+# First party modules
+import lidtk.classifiers
+import lidtk.utils
+from lidtk import resources
+from lidtk.analysis import evaluation
+from lidtk.data import label_table
+
+logger = logging.getLogger(__name__)
+
+# The test set; it is loaded before the worker processes are forked
+_data = {}  # type: Dict[str, Any]
+
+
+def load_experiment(filepath: str) -> Dict[str, Any]:
+    """
+    Read an experiment file.
+
+    Parameters
+    ----------
+    filepath : str
+
+    Returns
+    -------
+    experiment : Dict[str, Any]
+        'name' (the file name without extension), 'classifier', 'config'
+        (None for the default), 'languages' and 'batch_size' (None for
+        the classifier's profile)
+    """
+    filepath = os.path.abspath(filepath)
+    with open(filepath) as stream:
+        cfg = yaml.safe_load(stream)
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    if "classifier" in cfg:
+        config = cfg.get("config")
+        if config is not None:
+            config = os.path.join(os.path.dirname(filepath), config)
+        experiment = {"name": name, "classifier": cfg["classifier"], "config": config}
+    elif cfg.get("name") in lidtk.classifiers.classifier_modules:
+        experiment = {"name": name, "classifier": cfg["name"], "config": filepath}
+    else:
+        raise ValueError(
+            f"{filepath} neither names a classifier nor is a classifier config"
+        )
+    experiment["languages"] = cfg.get("languages")
+    experiment["batch_size"] = cfg.get("batch_size")
+    return experiment
+
+
+def load_test_set() -> Dict[str, Any]:
+    """
+    Load the WiLI test set.
+
+    Returns
+    -------
+    data : Dict[str, Any]
+        'x_test', 'y_test' and 'y_test_ids' (see lidtk.data.label_table)
+    """
+    cfg = lidtk.utils.load_cfg()
+    with codecs.open(cfg["x_test_path"], "r", "utf-8") as f:
+        x_test = f.read().strip().split("\n")
+    with codecs.open(cfg["y_test_path"], "r", "utf-8") as f:
+        y_test = f.read().strip().split("\n")
+    y_test_ids = label_table.get_label_table().encode(y_test)
+    return {"x_test": x_test, "y_test": y_test, "y_test_ids": y_test_ids}
+
+
+def run_experiment(
+    experiment: Dict[str, Any], output_dir: str, n_warmup: int = 100
+) -> Dict[str, Any]:
+    """
+    Evaluate one classifier on the loaded test set.
+
+    Parameters
+    ----------
+    experiment : Dict[str, Any]
+        See load_experiment
+    output_dir : str
+    n_warmup : int, optional (default: 100)
+        Number of texts which are predicted before timing starts, e.g. to
+        load the model
+
+    Returns
+    -------
+    result : Dict[str, Any]
+        The experiment with 'config_hash', 'profile', 'n_samples',
+        'accuracy', 'macro_f1', 'warmup_time', 'predict_time',
+        'time_per_sample' and 'throughput' or, if it failed, 'error'
+    """
+    xs, true_ids = _data["x_test"], _data["y_test_ids"]
+    result = dict(experiment)
+    try:
+        classifier = lidtk.classifiers.get_classifier(
+            experiment["classifier"], experiment["config"], experiment["languages"]
+        )
+        t0 = time.time()
+        classifier.predict_bulk_ids(xs[:n_warmup])
+        result["warmup_time"] = time.time() - t0
+
+        profile = dict(classifier.profile)
+        if experiment["batch_size"] is not None:
+            profile["batch_size"] = experiment["batch_size"]
+        result["profile"] = profile
+        t0 = time.time()
+        predicted_ids = classifier.predict_bulk_ids_profiled(xs, profile)
+        predict_time = time.time() - t0
+    except Exception as e:
+        logger.exception(f"Experiment {experiment['name']} failed")
+        result["error"] = repr(e)
+        return result
+
+    table = label_table.get_label_table()
+    report = evaluation.EvaluationReport(table)
+    report.add_bulk(np.arange(len(xs)), true_ids, predicted_ids)
+    summary = report.to_dict()
+    f1 = [metrics["f1"] for metrics in summary["per_label"].values()]
+    result_filepath = os.path.join(output_dir, f"{experiment['name']}.npy")
+    label_table.write_results(result_filepath, predicted_ids)
+    classifier.store_results(result_filepath, list(enumerate(_data["y_test"])), "test")
+    result.update(
+        config_hash=classifier.get_config_hash(),
+        n_samples=len(xs),
+        accuracy=summary["accuracy"],
+        macro_f1=float(np.mean(f1)) if f1 else 0.0,
+        predict_time=predict_time,
+        time_per_sample=predict_time / len(xs),
+        throughput=len(xs) / max(predict_time, 1e-9),
+    )
+    logger.info(f"Finished {experiment['name']}: {summary['accuracy'] * 100:.2f}%")
+    return result
+
+
+def _run_worker(args: Any) -> Dict[str, Any]:
+    return run_experiment(*args)
+
+
+def run_experiments(
+    experiments: List[Dict[str, Any]],
+    output_dir: str,
+    n_jobs: int = 1,
+    n_warmup: int = 100,
+) -> List[Dict[str, Any]]:
+    """
+    Evaluate several classifiers with one load of the test set.
+
+    Parameters
+    ----------
+    experiments : List[Dict[str, Any]]
+        See load_experiment
+    output_dir : str
+    n_jobs : int, optional (default: 1)
+        Number of experiments which run at the same time in forked worker
+        processes. Use 1 for timings which do not compete for the CPU.
+    n_warmup : int, optional (default: 100)
+
+    Returns
+    -------
+    results : List[Dict[str, Any]]
+        See run_experiment
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if not _data:
+        t0 = time.time()
+        _data.update(load_test_set())
+        logger.info(f"Loaded the test set in {time.time() - t0:0.2f}s")
+    tasks = [(experiment, output_dir, n_warmup) for experiment in experiments]
+    if n_jobs > 1:
+        context = multiprocessing.get_context("fork")
+        with resources.get_pool(n_jobs, context=context) as pool:
+            return pool.map(_run_worker, tasks, chunksize=1)
+    return [_run_worker(task) for task in tasks]
+
+
+def write_report(
+    filepath: str, results: List[Dict[str, Any]], n_jobs: Optional[int] = None
+) -> None:
+    """
+    Write the combined report of run_experiments as JSON.
+
+    Parameters
+    ----------
+    filepath : str
+    results : List[Dict[str, Any]]
+    n_jobs : int, optional (default: None)
+        How many experiments ran at the same time
+    """
+    report = {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(),
+            "n_jobs": n_jobs,
+            "hardware": lidtk.utils.get_hardware_info(),
+            "software": lidtk.utils.get_software_info(),
+        },
+        "results": results,
+    }
+    with open(filepath, "w", encoding="utf8") as f:
+        f.write(json.dumps(report, indent=4, sort_keys=True, ensure_ascii=False))
+
+
+###############################################################################
+# CLI                                                                         #
+###############################################################################
+@click.command(name="run")
+@click.argument(
+    "experiment_files", nargs=-1, required=True, type=click.Path(exists=True)
+)
+@click.option(
+    "--output_dir", default="runs", show_default=True, help="Where results go"
+)
+@click.option(
+    "--n_jobs",
+    default=1,
+    show_default=True,
+    help="Experiments which run at the same time (skews timings)",
+)
+@click.option("--n_warmup", default=100, show_default=True, help="Untimed texts")
+def main(
+    experiment_files: List[str], output_dir: str, n_jobs: int, n_warmup: int
+) -> None:
+    """Evaluate classifiers on WiLI with one load of the test set."""
+    experiments = [load_experiment(filepath) for filepath in experiment_files]
+    results = run_experiments(experiments, output_dir, n_jobs, n_warmup)
+    report_filepath = os.path.join(output_dir, "report.json")
+    write_report(report_filepath, results, n_jobs)
+    for result in results:
+        if "error" in result:
+            print(f"{result['name']:<24} failed: {result['error']}")
+            continue
+        print(
+            f"{result['name']:<24} {result['accuracy'] * 100:6.2f}%  "
+            f"F1 {result['macro_f1'] * 100:6.2f}%  "
+            f"{result['time_per_sample'] * 1000:8.3f}ms/text  "
+            f"{result['throughput']:10.1f} texts/s"
+        )
+    print(f"Wrote {report_filepath}")
@@ -0,0 +1,415 @@
+"""
+Run a grid of training configurations and compare them.
+
+A sweep file names a model family and a grid of parameters, e.g.
+
+    model: char_dist
+    grid:
+      unicode_cutoff: [1000000]
+      coverage: [0.8, 0.9]
+      metric: [ido, cosine]
+
+The dataset is loaded once. The trials are grouped by their feature
+parameters: the features of each group (tf-idf vectorizer and matrices or
+character counts) are built once and shared through the artifact cache
+(see lidtk.artifact_cache). Then the trials run on a process pool and the
+results are written to a CSV file.
+"""
+
+# Core Library modules
+import csv
+import itertools
+import logging
+import pickle
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Third party modules
+import click
+import numpy as np
+import yaml
+
+# First party modules
+import lidtk.classifiers.char_distribution.char_dist_metric_train_test as cdm
+from lidtk import resources
+from lidtk.data import wili
+from lidtk.data.encoded_batch import EncodedBatch
+
+logger = logging.getLogger(__name__)
+
+result_columns = [
+    "accuracy",
+    "feature_time",
+    "train_time",
+    "throughput",
+    "model_size",
+]
+
+
+class SweepModel:
+    """
+    A model family which can be trained in a sweep.
+
+    Parameters
+    ----------
+    sweep_cfg : Dict[str, Any]
+        The sweep file; besides the grid it can hold fixed settings
+    """
+
+    # The grid parameters which determine the shared features
+    feature_keys = []  # type: List[str]
+
+    def __init__(self, sweep_cfg: Dict[str, Any]):
+        self.sweep_cfg = sweep_cfg
+
+    def prepare(self, feature_params: Dict[str, Any], data: Dict[Any, Any]) -> None:
+        """Build the shared features of a group of trials."""
+        raise NotImplementedError
+
+    def run(self, trial: Dict[str, Any], data: Dict[Any, Any]) -> Dict[str, Any]:
+        """
+        Train one configuration and evaluate it on x_eval.
+
+        Parameters
+        ----------
+        trial : Dict[str, Any]
+            One point of the grid
+        data : Dict[Any, Any]
+            See wili.load_data, plus 'x_eval' and 'y_eval' (see run_sweep)
+
+        Returns
+        -------
+        result : Dict[str, Any]
+            'accuracy', 'train_time' (s), 'throughput' (predictions per
+            second) and 'model_size' (bytes)
+        """
+        raise NotImplementedError
+
+
+class CharDistModel(SweepModel):
+    """Character distribution models; the counts are shared per cutoff."""
+
+    feature_keys = ["unicode_cutoff"]
+
+    def prepare(self, feature_params: Dict[str, Any], data: Dict[Any, Any]) -> None:
+        """Count the characters once per unicode_cutoff."""
+        cdm.get_character_counts(data, feature_params["unicode_cutoff"])
+
+    def run(self, trial: Dict[str, Any], data: Dict[Any, Any]) -> Dict[str, Any]:
+        """Train and evaluate a character distribution model."""
+        metric = cdm.get_metric(trial["metric"])
+        t0 = time.time()
+        trained = cdm.train(data, trial["unicode_cutoff"], trial["coverage"], metric)
+        language_models, chars = cdm.get_counts_by_lang(
+            trained["common_chars"], trained["char_counter_by_lang"]
+        )
+        train_time = time.time() - t0
+        t0 = time.time()
+        batch = EncodedBatch.from_texts(data["x_eval"]).replace_above(
+            trial["unicode_cutoff"], cdm.cut_off_char
+        )
+        predictions = [
+            cdm.predict_param(language_models, metric, x_distribution)
+            for x_distribution in batch.get_distributions(chars).astype(np.float32)
+        ]
+        predict_time = time.time() - t0
+        model_info = {"language_models": language_models, "chars": chars}
+        return {
+            "accuracy": get_accuracy(data["y_eval"], predictions),
+            "train_time": train_time,
+            "throughput": len(predictions) / max(predict_time, 1e-9),
+            "model_size": len(pickle.dumps(model_info)),
+        }
+
+
+class TfidfMLPModel(SweepModel):
+    """
+    MLPs on character tf-idf features; the features are shared per
+    (min_df, lowercase, norm).
+
+    The optimizer settings are taken from `classification` of the sweep
+    file, like in the tfidf_nn configs.
+    """
+
+    feature_keys = ["min_df", "lowercase", "norm"]
+
+    def prepare(self, feature_params: Dict[str, Any], data: Dict[Any, Any]) -> None:
+        """Fit the vectorizer and transform x_train and x_val once."""
+        # First party modules
+        from lidtk.classifiers import tfidf_features
+
+        tfidf_features.get_cached_features(feature_params, data, ["x_train", "x_val"])
+
+    def run(self, trial: Dict[str, Any], data: Dict[Any, Any]) -> Dict[str, Any]:
+        """Train and evaluate a MLP; throughput includes the vectorizer."""
+        # First party modules
+        from lidtk.classifiers import mlp, tfidf_features
+
+        feature_params = {key: trial[key] for key in self.feature_keys}
+        features = tfidf_features.get_cached_features(
+            feature_params, data, ["x_train", "x_val"]
+        )
+        xs = features["xs"]
+        ys = {
+            name: wili.lang_codes_to_indices(data[name], wili.labels_s)
+            for name in ["y_train", "y_val", "y_eval"]
+        }
+        cfg = self.sweep_cfg["classification"]
+        model = mlp.create_model(
+            wili.n_classes, xs["x_train"][0].shape, trial["hidden_size"]
+        )
+        model.compile(
+            loss="sparse_categorical_crossentropy",
+            optimizer=mlp.get_optimizer(self.sweep_cfg),
+            metrics=["accuracy"],
+        )
+        t0 = time.time()
+        model.fit(
+            xs["x_train"],
+            ys["y_train"],
+            batch_size=cfg["optimizer"]["batch_size"],
+            epochs=cfg["optimizer"]["epochs"],
+            validation_data=(xs["x_val"], ys["y_val"]),
+            shuffle=True,
+            verbose=0,
+        )
+        train_time = time.time() - t0
+        t0 = time.time()
+        x_eval = features["vectorizer"].transform(data["x_eval"]).toarray()
+        predicted = np.argmax(model.predict(x_eval), axis=1)
+        predict_time = time.time() - t0
+        weights_size = sum(weights.nbytes for weights in model.get_weights())
+        return {
+            "accuracy": float(np.mean(predicted == ys["y_eval"])),
+            "train_time": train_time,
+            "throughput": len(predicted) / max(predict_time, 1e-9),
+            "model_size": weights_size + len(pickle.dumps(features["vectorizer"])),
+        }
+
+
+models = {"char_dist": CharDistModel, "tfidf_mlp": TfidfMLPModel}
+
+
+def get_accuracy(y_true: List[str], y_pred: List[str]) -> float:
+    """
+    Get the share of correct predictions.
+
+    Examples
+    --------
+    >>> get_accuracy(["eng", "deu"], ["eng", "fra"])
+    0.5
+    """
+    return float(np.mean(np.array(y_true) == np.array(y_pred)))
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Get all combinations of the grid values.
+
+    Parameters
+    ----------
+    grid : Dict[str, List[Any]]
+        Maps a parameter to its values; a single value is used as it is
+
+    Returns
+    -------
+    trials : List[Dict[str, Any]]
+
+    Examples
+    --------
+    >>> expand_grid({"min_df": [10, 50], "norm": "l2"})
+    [{'min_df': 10, 'norm': 'l2'}, {'min_df': 50, 'norm': 'l2'}]
+    """
+    keys = sorted(grid)
+    values = [grid[key] if isinstance(grid[key], list) else [grid[key]] for key in keys]
+    return [dict(zip(keys, combination)) for combination in itertools.product(*values)]
+
+
+def get_eval_set(
+    data: Dict[Any, Any], set_name: str, max_samples: Optional[int] = None
+) -> Tuple[List[str], List[str]]:
+    """
+    Get the samples to evaluate on.
+
+    Parameters
+    ----------
+    data : Dict[Any, Any]
+    set_name : str
+        'x_val' or 'x_test'
+    max_samples : int, optional (default: all)
+        Take a subset of this size in which all languages take turns
+
+    Returns
+    -------
+    x_eval, y_eval : Tuple[List[str], List[str]]
+    """
+    xs, ys = data[set_name], data["y" + set_name[1:]]
+    if max_samples is None:
+        return list(xs), list(ys)
+    indices = wili.stratified_order(ys)[:max_samples]
+    return [xs[i] for i in indices], [ys[i] for i in indices]
+
+
+# The state of a sweep worker process, see _init_worker
+_worker = {}  # type: Dict[str, Any]
+
+
+def _init_worker(model: SweepModel, data: Dict[Any, Any]) -> None:
+    _worker.update(model=model, data=data)
+
+
+def _prepare_worker(feature_params: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+    t0 = time.time()
+    _worker["model"].prepare(feature_params, _worker["data"])
+    return feature_params, time.time() - t0
+
+
+def _run_worker(trial: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        result = _worker["model"].run(trial, _worker["data"])
+    except Exception as e:
+        logger.exception(f"Trial {trial} failed")
+        result = {"error": repr(e)}
+    return dict(trial, **result)
+
+
+def run_sweep(
+    sweep_cfg: Dict[str, Any],
+    n_jobs: int = 1,
+    set_name: str = "x_val",
+    max_samples: Optional[int] = None,
+    data: Optional[Dict[Any, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run all trials of a sweep.
+
+    Parameters
+    ----------
+    sweep_cfg : Dict[str, Any]
+        'model' (a key of `models`) and 'grid'
+    n_jobs : int, optional (default: 1)
+        Number of worker processes
+    set_name : str, optional (default: x_val)
+        The set to evaluate on
+    max_samples : int, optional (default: all)
+        Evaluate on a stratified subset of this size
+    data : Dict[Any, Any], optional (default: wili.load_data())
+
+    Returns
+    -------
+    results : List[Dict[str, Any]]
+        The parameters of each trial and its results (see result_columns),
+        in the order of the grid
+    """
+    if sweep_cfg["model"] not in models:
+        raise ValueError(
+            f"Unknown model '{sweep_cfg['model']}'. Choose one of {sorted(models)}"
+        )
+    model = models[sweep_cfg["model"]](sweep_cfg)
+    trials = expand_grid(sweep_cfg["grid"])
+    if data is None:
+        data = wili.load_data()
+        logger.info("Finished loading data")
+    data = dict(data)
+    data["x_eval"], data["y_eval"] = get_eval_set(data, set_name, max_samples)
+    feature_groups = []  # type: List[Dict[str, Any]]
+    for trial in trials:
+        feature_params = {key: trial[key] for key in model.feature_keys}
+        if feature_params not in feature_groups:
+            feature_groups.append(feature_params)
+    logger.info(f"{len(trials)} trials in {len(feature_groups)} feature groups")
+
+    pool = None
+    map_function: Callable = map
+    _init_worker(model, data)
+    if n_jobs > 1:
+        pool = resources.get_pool(n_jobs, _init_worker, (model, data))
+        map_function = pool.imap
+    try:
+        feature_times = [
+            (feature_params, seconds)
+            for feature_params, seconds in map_function(_prepare_worker, feature_groups)
+        ]
+        results = []
+        for result in map_function(_run_worker, trials):
+            feature_params = {key: result[key] for key in model.feature_keys}
+            result["feature_time"] = next(
+                seconds for params, seconds in feature_times if params == feature_params
+            )
+            logger.info(f"Finished trial {result}")
+            results.append(result)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return results
+
+
+def write_results(filepath: str, results: List[Dict[str, Any]]) -> None:
+    """
+    Write the results of a sweep as CSV file with delimiter ;.
+
+    Parameters
+    ----------
+    filepath : str
+    results : List[Dict[str, Any]]
+        See run_sweep
+    """
+    param_keys = sorted(
+        {key for result in results for key in result} - set(result_columns) - {"error"}
+    )
+    fieldnames = param_keys + result_columns + ["error"]
+    with open(filepath, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=";")
+        writer.writeheader()
+        for result in results:
+            writer.writerow(result)
+
+
+###############################################################################
+# CLI                                                                         #
+###############################################################################
+@click.command(name="sweep")
+@click.argument("sweep_file", type=click.Path(exists=True))
+@click.option("--n_jobs", default=1, show_default=True, help="Processes")
+@click.option(
+    "--set_name",
+    type=click.Choice(["x_val", "x_test"]),
+    default="x_val",
+    show_default=True,
+    help="Evaluate on this set",
+)
+@click.option(
+    "--max_samples", type=int, default=None, help="Evaluate on a stratified subset"
+)
+@click.option(
+    "--output", default="sweep_results.csv", show_default=True, help="CSV file"
+)
+def main(
+    sweep_file: str,
+    n_jobs: int,
+    set_name: str,
+    max_samples: Optional[int],
+    output: str,
+) -> None:
+    """Train and evaluate every configuration of a sweep file."""
+    with open(sweep_file) as stream:
+        sweep_cfg = yaml.safe_load(stream)
+    results = run_sweep(sweep_cfg, n_jobs, set_name, max_samples)
+    write_results(output, results)
+    for result in sorted(results, key=lambda el: el.get("accuracy", -1), reverse=True):
+        if "error" in result:
+            print(f"failed: {result['error']}")
+            continue
+        print(
+            f"{result['accuracy'] * 100:6.2f}%  "
+            f"train {result['train_time']:8.2f}s  "
+            f"{result['throughput']:10.1f} samples/s  "
+            f"{result['model_size'] / 1024 ** 2:8.2f} MiB  "
+            + ", ".join(
+                f"{key}={result[key]}"
+                for key in sorted(result)
+                if key not in result_columns
+            )
+        )
+    print(f"Wrote {len(results)} results to {output}")
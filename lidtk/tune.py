@@ -0,0 +1,237 @@
+"""
+Find the batch size, worker count and BLAS thread count with the best
+throughput for a classifier.
+
+Short calibration passes over a stratified WiLI sample are timed with
+LIDClassifier.predict_bulk_ids_profiled. The winner is stored as profile of
+the classifier configuration (see `profiles_path`), which bulk predictions,
+`lidtk run` and `get_languages` use automatically.
+"""
+
+# Core Library modules
+import datetime
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Third party modules
+import click
+
+# First party modules
+import lidtk.classifiers
+import lidtk.utils
+from lidtk import resources, runner
+from lidtk.data import wili
+
+logger = logging.getLogger(__name__)
+
+
+def get_candidates(
+    batch_sizes: List[int], max_jobs: int, n_cpus: int
+) -> List[Dict[str, Any]]:
+    """
+    Get the settings to try.
+
+    The worker counts are powers of two up to max_jobs. Each worker count is
+    tried with single-threaded BLAS and with the CPUs split evenly among
+    the workers.
+
+    Parameters
+    ----------
+    batch_sizes : List[int]
+    max_jobs : int
+    n_cpus : int
+
+    Returns
+    -------
+    candidates : List[Dict[str, Any]]
+        'batch_size', 'n_jobs' and 'blas_threads'
+
+    Examples
+    --------
+    >>> [(c["n_jobs"], c["blas_threads"]) for c in get_candidates([100], 3, 4)]
+    [(1, 1), (1, 4), (2, 1), (2, 2), (3, 1)]
+    """
+    max_jobs = max(1, min(max_jobs, n_cpus))
+    job_counts = sorted(
+        {2**i for i in range(max_jobs.bit_length()) if 2**i <= max_jobs} | {max_jobs}
+    )
+    return [
+        {"batch_size": batch_size, "n_jobs": n_jobs, "blas_threads": blas_threads}
+        for n_jobs in job_counts
+        for blas_threads in sorted({1, max(1, n_cpus // n_jobs)})
+        for batch_size in batch_sizes
+    ]
+
+
+def measure(
+    classifier: lidtk.classifiers.LIDClassifier,
+    texts: List[str],
+    profile: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Time one calibration pass.
+
+    Parameters
+    ----------
+    classifier : LIDClassifier
+    texts : List[str]
+    profile : Dict[str, Any]
+        See LIDClassifier.profile
+
+    Returns
+    -------
+    measurement : Dict[str, Any]
+        The profile with 'throughput' (texts per second of the whole pass)
+        and 'latency' (seconds for a single batch)
+    """
+    with lidtk.utils.limit_blas_threads(profile["blas_threads"]):
+        t0 = time.time()
+        classifier.predict_bulk_ids(texts[: profile["batch_size"]])
+        latency = time.time() - t0
+    t0 = time.time()
+    classifier.predict_bulk_ids_profiled(texts, profile)
+    elapsed = time.time() - t0
+    return dict(profile, throughput=len(texts) / max(elapsed, 1e-9), latency=latency)
+
+
+def tune(
+    classifier: lidtk.classifiers.LIDClassifier,
+    texts: List[str],
+    candidates: List[Dict[str, Any]],
+    max_latency: Optional[float] = None,
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Find the settings with the best throughput.
+
+    Parameters
+    ----------
+    classifier : LIDClassifier
+    texts : List[str]
+        The calibration sample
+    candidates : List[Dict[str, Any]]
+        See get_candidates
+    max_latency : float, optional (default: no limit)
+        Maximum seconds for predicting a single batch
+
+    Returns
+    -------
+    best, measurements : Tuple[Dict[str, Any], List[Dict[str, Any]]]
+        If no candidate meets max_latency, the one with the lowest latency
+        is the best
+    """
+    # Load the model before the workers are forked
+    classifier.predict_bulk_ids(texts[:10])
+    measurements = []
+    for candidate in candidates:
+        measurement = measure(classifier, texts, candidate)
+        logger.info(f"Measured {measurement}")
+        measurements.append(measurement)
+    allowed = [
+        el for el in measurements if max_latency is None or el["latency"] <= max_latency
+    ]
+    if allowed:
+        best = max(allowed, key=lambda el: el["throughput"])
+    else:
+        logger.warning(f"No setting has a latency below {max_latency}s")
+        best = min(measurements, key=lambda el: el["latency"])
+    return best, measurements
+
+
+def save_profile(
+    classifier: lidtk.classifiers.LIDClassifier,
+    best: Dict[str, Any],
+    measurements: List[Dict[str, Any]],
+    max_latency: Optional[float] = None,
+) -> str:
+    """
+    Store the tuned settings as profile of the classifier.
+
+    Parameters
+    ----------
+    classifier : LIDClassifier
+    best : Dict[str, Any]
+    measurements : List[Dict[str, Any]]
+    max_latency : float, optional (default: None)
+
+    Returns
+    -------
+    profile_path : str
+    """
+    profile_path = classifier.get_profile_path()
+    os.makedirs(os.path.dirname(profile_path), exist_ok=True)
+    profile = {
+        "classifier": classifier.cfg["name"],
+        "config_hash": classifier.get_config_hash(),
+        "created": datetime.datetime.now().isoformat(),
+        "n_cpus": resources.get_cpu_budget(),
+        "max_latency": max_latency,
+        "settings": {
+            key: best[key] for key in lidtk.classifiers.default_profile.keys()
+        },
+        "measurements": measurements,
+    }
+    with open(profile_path, "w") as f:
+        json.dump(profile, f, indent=4)
+    # Pick up the new profile
+    classifier._profile = None
+    return profile_path
+
+
+def get_sample(n_samples: int) -> List[str]:
+    """Get WiLI test texts in which all languages take turns."""
+    data = runner.load_test_set()
+    indices = wili.stratified_order(data["y_test"])[:n_samples]
+    return [data["x_test"][i] for i in indices]
+
+
+###############################################################################
+# CLI                                                                         #
+###############################################################################
+@click.command(name="tune")
+@click.argument(
+    "classifier_name", type=click.Choice(lidtk.classifiers.classifier_modules)
+)
+@click.option("--config", "config_filepath", default=None, help="Classifier config")
+@click.option("--n_samples", default=2000, show_default=True, help="Sample size")
+@click.option("--batch_sizes", default="1,10,100,1000", show_default=True)
+@click.option(
+    "--max_jobs", type=int, default=None, help="Most worker processes (default: CPUs)"
+)
+@click.option(
+    "--max_latency_ms", type=float, default=None, help="Latency ceiling per batch"
+)
+@click.option("--dry_run", is_flag=True, help="Do not store the profile")
+def main(
+    classifier_name: str,
+    config_filepath: Optional[str],
+    n_samples: int,
+    batch_sizes: str,
+    max_jobs: Optional[int],
+    max_latency_ms: Optional[float],
+    dry_run: bool,
+) -> None:
+    """Tune batch size, worker processes and BLAS threads of a classifier."""
+    classifier = lidtk.classifiers.get_classifier(classifier_name, config_filepath)
+    n_cpus = resources.get_cpu_budget()
+    candidates = get_candidates(
+        [int(el) for el in batch_sizes.split(",")],
+        n_cpus if max_jobs is None else max_jobs,
+        n_cpus,
+    )
+    max_latency = None if max_latency_ms is None else max_latency_ms / 1000
+    best, measurements = tune(
+        classifier, get_sample(n_samples), candidates, max_latency
+    )
+    for el in sorted(measurements, key=lambda el: el["throughput"], reverse=True):
+        print(
+            f"batch_size={el['batch_size']:<6} n_jobs={el['n_jobs']:<3} "
+            f"blas_threads={el['blas_threads']:<3} "
+            f"{el['throughput']:10.1f} texts/s  {el['latency'] * 1000:9.2f}ms/batch"
+        )
+    print(f"Best: {best}")
+    if not dry_run:
+        profile_path = save_profile(classifier, best, measurements, max_latency)
+        print(f"Stored the profile at {profile_path}")
@@ -1,14 +1,26 @@
 """Utility functions for lidtk."""
 
 # Core Library modules
+import contextlib
+import hashlib
+import json
 import logging
 import os
 import platform
 import subprocess
-from typing import Any, Dict
+from typing import (
+    Any,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+)
 
 # Third party modules
 import click
+import numpy as np
 import pkg_resources
 import yaml
 
@@ -32,6 +44,29 @@ def make_path_absolute(path: str) -> str:
     return path
 
 
+def chunks(sequence: Sequence[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Split a sequence into consecutive chunks.
+
+    Parameters
+    ----------
+    sequence : Sequence[Any]
+    size : int
+        Number of elements per chunk; the last chunk may be smaller
+
+    Returns
+    -------
+    chunks : Iterator[List[Any]]
+
+    Examples
+    --------
+    >>> list(chunks([1, 2, 3, 4, 5], 2))
+    [[1, 2], [3, 4], [5]]
+    """
+    for start in range(0, len(sequence), size):
+        yield list(sequence[start : start + size])
+
+
 def get_software_info() -> Dict[str, Any]:
     """
     Get information about the used software.
@@ -111,10 +146,56 @@ def load_cfg(yaml_filepath: str = None) -> Dict[str, Any]:
     return cfg
 
 
+def limit_blas_threads(n_threads: Optional[int]) -> ContextManager[Any]:
+    """
+    Limit the number of threads of the BLAS libraries numpy and scipy use.
+
+    Parameters
+    ----------
+    n_threads : int, optional
+        None keeps the current limit
+
+    Returns
+    -------
+    context : ContextManager
+        The limit is reset when the context is left
+    """
+    if n_threads is None:
+        return contextlib.nullcontext()
+    # Third party modules
+    from threadpoolctl import threadpool_limits
+
+    return threadpool_limits(limits=n_threads, user_api="blas")
+
+
+def get_config_hash(cfg: Any) -> str:
+    """
+    Get a short hash which changes whenever the configuration changes.
+
+    Parameters
+    ----------
+    cfg : Any
+        JSON-serializable, e.g. the configuration of a classifier
+
+    Returns
+    -------
+    config_hash : str
+
+    Examples
+    --------
+    >>> get_config_hash({"a": 1, "b": [2]}) == get_config_hash({"b": [2], "a": 1})
+    True
+    """
+    serialized = json.dumps(cfg, sort_keys=True, default=str).encode("utf8")
+    return hashlib.sha256(serialized).hexdigest()[:16]
+
+
 def make_paths_absolute(dir_: str, cfg: Dict[str, Any]) -> Dict[str, Any]:
     """
     Make all values for keys ending with `_path` absolute to dir_.
 
+    Nested dictionaries, also within lists, are handled recursively.
+
     Parameters
     ----------
     dir_ : str
@@ -133,6 +214,11 @@ def make_paths_absolute(dir_: str, cfg: Dict[str, Any]) -> Dict[str, Any]:
             cfg[key] = os.path.abspath(cfg[key])
         if type(cfg[key]) is dict:
             cfg[key] = make_paths_absolute(dir_, cfg[key])
+        elif type(cfg[key]) is list:
+            cfg[key] = [
+                make_paths_absolute(dir_, el) if type(el) is dict else el
+                for el in cfg[key]
+            ]
     return cfg
 
 
@@ -141,7 +227,11 @@ def make_paths_absolute(dir_: str, cfg: Dict[str, Any]) -> Dict[str, Any]:
     "--config", type=click.Path(exists=True), help="Path to a YAML configuration file"
 )
 @click.option("--source", type=click.Path(exists=True), help="Path to a txt file")
-@click.option("--dest", type=click.Path(exists=False), help="Path to a txt file")
+@click.option(
+    "--dest",
+    type=click.Path(exists=False),
+    help="Path to a txt file or an .npy file for label ids",
+)
 def map_classification_result(config: str, source: str, dest: str) -> None:
     """
     Map the classification to something known by WiLI.
@@ -151,23 +241,28 @@ def map_classification_result(config: str, source: str, dest: str) -> None:
     config : str
     source : str
     dest : str
+        Files ending with .npy get an int16 array of label ids, see
+        lidtk.data.label_table
     """
+    # Imported here, as lidtk.data imports this module
+    # First party modules
+    from lidtk.data import label_table
+
     cfg = load_cfg(config)
 
-    # Read data
+    # Read data; every distinct code is mapped only once
     with open(source) as fp:
-        read_lines = fp.readlines()
-        read_lines = [line.rstrip("\n") for line in read_lines]
-
-    # Create new data
-    new_lines = []
-    for line in read_lines:
-        if line in cfg["mapping"]:
-            new_lines.append(cfg["mapping"][line])
-        else:
-            new_lines.append("unk")
-            logger.warning(f"Map '{line}' to 'unk'")
-
-    # Write text file
-    with open(dest, "w") as fp:
-        fp.write("\n".join(new_lines))
+        codes, inverse = np.unique(fp.read().splitlines(), return_inverse=True)
+    inverse = inverse.reshape(-1)
+    for code in codes:
+        if code not in cfg["mapping"]:
+            logger.warning(f"Map '{code}' to 'unk'")
+
+    if dest.endswith(".npy"):
+        table = label_table.get_label_table()
+        lookup = table.compile_mapping(list(codes), cfg["mapping"])
+        label_table.write_results(dest, lookup[inverse])
+    else:
+        mapped = np.array([cfg["mapping"].get(code, "unk") for code in codes])
+        with open(dest, "w") as fp:
+            fp.write("\n".join(mapped[inverse]))
@@ -23,6 +23,7 @@ setup(
         "scipy",
         "seaborn",
         "tensorflow",
+        "threadpoolctl",
         "wikipedia",
     ],
 )
@@ -0,0 +1,70 @@
+# Core Library modules
+import multiprocessing
+
+# Third party modules
+import numpy as np
+from click.testing import CliRunner
+
+# First party modules
+from lidtk import artifact_cache
+
+
+def test_artifact_cache(tmpdir):
+    cache = artifact_cache.ArtifactCache(str(tmpdir), max_bytes=10**9)
+    calls = []
+
+    def create():
+        calls.append(1)
+        return np.arange(1000)
+
+    for _ in range(2):
+        xs = cache.get_or_create("xs", {"min_df": 50}, create, fmt="npy")
+        np.testing.assert_array_equal(xs, np.arange(1000))
+    assert len(calls) == 1
+    # Other parameters give another entry
+    cache.get_or_create("xs", {"min_df": 10}, create, fmt="npy")
+    cache.get_or_create("model", {}, lambda: {"a": 1}, use_dataset=False)
+    assert len(calls) == 2
+    assert sorted(entry["kind"] for entry in cache.get_entries()) == [
+        "model",
+        "xs",
+        "xs",
+    ]
+
+    # Using the first entry makes the second one the least recently used
+    cache.get_or_create("xs", {"min_df": 50}, create, fmt="npy")
+    removed = cache.prune(max_bytes=9000)
+    assert [entry["params"] for entry in removed] == [{"min_df": 10}]
+    assert len(calls) == 2
+
+    runner = CliRunner()
+    result = runner.invoke(artifact_cache.entry_point, ["--root", str(tmpdir), "list"])
+    assert result.exit_code == 0, result.output
+    assert "2 entries" in result.output
+    result = runner.invoke(
+        artifact_cache.entry_point, ["--root", str(tmpdir), "prune", "--all"]
+    )
+    assert result.exit_code == 0, result.output
+    assert cache.get_entries() == []
+
+
+def _use_cache(args):
+    root, worker = args
+    cache = artifact_cache.ArtifactCache(root, max_bytes=10**9)
+    for _ in range(30):
+        # Some workers keep replacing the entry the others read
+        xs = cache.get_or_create(
+            "xs", {}, lambda: np.arange(1000), fmt="npy", rebuild=worker % 2 == 1
+        )
+        assert xs.tolist() == list(range(1000))
+        cache.get_entries()
+    return worker
+
+
+def test_artifact_cache_processes(tmpdir):
+    with multiprocessing.get_context("fork").Pool(4) as pool:
+        workers = pool.map(_use_cache, [(str(tmpdir), i) for i in range(4)])
+    assert workers == [0, 1, 2, 3]
+    cache = artifact_cache.ArtifactCache(str(tmpdir))
+    assert [entry["kind"] for entry in cache.get_entries()] == ["xs"]
+    assert tmpdir.join("xs").listdir() == [tmpdir.join("xs", cache.get_key("xs", {}))]
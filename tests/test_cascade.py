@@ -0,0 +1,52 @@
+# Third party modules
+import pkg_resources
+
+# First party modules
+import lidtk.classifiers
+from lidtk.classifiers.cascade import CascadeClassifier
+
+
+class ConstantClassifier(lidtk.classifiers.LIDClassifier):
+    def __init__(self, cfg_path, language, confidence):
+        super().__init__(cfg_path)
+        self.language = language
+        self.confidence = confidence
+        self.n_predicted = 0
+
+    def predict(self, text):
+        return self.predict_with_confidence(text)[0]
+
+    def predict_with_confidence(self, text):
+        self.n_predicted += 1
+        confidence = self.confidence if "easy" in text else 0.0
+        return self.language, confidence
+
+
+def get_cascade():
+    cfg_path = pkg_resources.resource_filename(
+        "lidtk", "classifiers/config/cascade.yaml"
+    )
+    cascade = CascadeClassifier(cfg_path)
+    fast = ConstantClassifier(cfg_path, "eng", 1.0)
+    slow = ConstantClassifier(cfg_path, "deu", 1.0)
+    cascade._stages = [(fast, 0.5), (slow, 0.0)]
+    return cascade, fast, slow
+
+
+def test_cascade_escalates_uncertain():
+    cascade, fast, slow = get_cascade()
+    assert cascade.predict_with_stage("easy") == ("eng", 0)
+    assert cascade.predict_with_stage("hard") == ("deu", 1)
+    assert slow.n_predicted == 1
+
+
+def test_cascade_eval_stages():
+    cascade, fast, slow = get_cascade()
+    cascade.cfg["stages"] = [{"classifier": "fast"}, {"classifier": "slow"}]
+    xs = ["easy", "hard", "easy", "hard"]
+    report = cascade.eval_stages(xs, ["eng", "deu", "deu", "deu"], batch_size=3)
+    assert report["accuracy"] == 0.75
+    assert [stage["seen"] for stage in report["stages"]] == [4, 2]
+    assert report["stages"][0]["escalation_rate"] == 0.5
+    assert report["stages"][0]["accuracy"] == 0.5
+    assert slow.n_predicted == 2
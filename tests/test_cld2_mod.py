@@ -0,0 +1,28 @@
+# Third party modules
+import pytest
+
+pytest.importorskip("cld2")
+
+# First party modules
+from lidtk.classifiers import cld2_mod  # noqa: E402
+from lidtk.data import label_table  # noqa: E402
+
+texts = [
+    "This is an English sentence.",
+    "Das ist ein deutscher Satz über Häuser und Bäume.",
+    "Ceci est une phrase française.",
+    "",
+] * 5
+
+
+def test_detect_bulk():
+    classifier = cld2_mod.CLD2Classifier(cld2_mod.filepath)
+    classifier.cfg = dict(classifier.cfg, n_jobs=3)
+    results = classifier.detect_bulk(texts)
+    assert results["languages"] == [classifier.predict(text) for text in texts]
+    assert results["ids"].tolist() == (
+        label_table.get_label_table().encode(results["languages"]).tolist()
+    )
+    assert len(results["is_reliable"]) == len(texts)
+    assert len(results["percent"]) == len(texts)
+    assert classifier.detect_bulk([])["languages"] == []
@@ -0,0 +1,35 @@
+# Core Library modules
+import time
+
+# First party modules
+from lidtk.classifiers import detectlanguage_mod
+from lidtk.classifiers.http_mock import MockService
+
+
+def test_predict_bulk(service_classifier):
+    texts = ["This is a test.", "Это тест.", "Բարեւ", "123"] * 25
+    routes = detectlanguage_mod.get_mock_routes(batch_size=8, max_batch_bytes=100)
+    with MockService(routes) as service:
+        classifier = service_classifier(
+            detectlanguage_mod,
+            service,
+            batch_size=8,
+            max_batch_bytes=100,
+            max_in_flight=3,
+            requests_per_second=None,
+        )
+        languages, confidences = classifier.predict_bulk_with_confidence(texts)
+        assert languages == ["eng", "rus", "hye", "UNK"] * 25
+        assert confidences.tolist() == [10.0, 10.0, 10.0, 0.0] * 25
+        assert service.n_requests == 13
+        assert service.max_in_flight <= 3
+
+
+def test_rate_limit(service_classifier):
+    with MockService(detectlanguage_mod.get_mock_routes()) as service:
+        classifier = service_classifier(
+            detectlanguage_mod, service, batch_size=1, requests_per_second=20
+        )
+        t0 = time.monotonic()
+        classifier.predict_bulk(["Hello"] * 6)
+        assert time.monotonic() - t0 >= 0.25
@@ -0,0 +1,63 @@
+# Third party modules
+import numpy as np
+import pkg_resources
+
+# First party modules
+import lidtk.classifiers
+from lidtk.analysis import early_exit
+
+
+def test_char_dist_prefix_predictions_match_predict(char_dist_classifier):
+    text = "aaaab" * 10 + "bbbbbbbbbx" * 20
+    for metric in ["ido", "cosine", "entropy"]:
+        classifier = char_dist_classifier(metric)
+        for language, confidence, n_read in classifier.iter_prefix_predictions(
+            text, 30
+        ):
+            expected, expected_confidence = classifier.predict_with_confidence(
+                text[:n_read]
+            )
+            assert language == expected
+            assert np.isfinite(confidence)
+            assert np.isclose(confidence, expected_confidence)
+
+
+def test_predict_incremental(char_dist_classifier):
+    classifier = char_dist_classifier()
+    text = "a" * 1000
+    assert classifier.predict_incremental(text, 10, 0.1, 500) == ("aaa", 10)
+    assert classifier.predict_incremental(text, 10, 10.0, 500) == ("aaa", 500)
+    assert classifier.predict_incremental("", 10, 0.1, 500) == ("aaa", 0)
+
+
+class PrefixLengthClassifier(lidtk.classifiers.LIDClassifier):
+    """Confident once it has read 20 characters."""
+
+    def predict(self, text):
+        return "eng"
+
+    def predict_with_confidence(self, text):
+        return "eng", len(text) / 20
+
+
+def test_predict_incremental_default():
+    cfg_path = pkg_resources.resource_filename(
+        "lidtk", "classifiers/config/langid.yaml"
+    )
+    classifier = PrefixLengthClassifier(cfg_path)
+    assert classifier.predict_incremental("x" * 100, 7, 1.0, 50) == ("eng", 21)
+    assert classifier.predict_incremental("x" * 100, 7, 10.0, 50) == ("eng", 50)
+
+
+def test_accuracy_curve(char_dist_classifier):
+    classifier = char_dist_classifier()
+    texts = ["ab" * 20 + "a" * 60, "b" * 30, "ab" * 50]
+    labels = ["aaa", "bbb", "ccc"]
+    predictions = early_exit.get_prefix_predictions(classifier, texts, 20, 80)
+    curve = early_exit.get_accuracy_curve(predictions, labels, 20)
+    assert [el["n_chars"] for el in curve] == [20, 40, 60, 80]
+    assert [el["n_complete"] for el in curve] == [0, 1, 1, 3]
+    points = early_exit.get_operating_points(predictions, labels, [0.0, 10.0])
+    assert points[0]["mean_chars"] == 20
+    assert points[1]["max_chars"] == 80
+    assert points[1]["accuracy"] == curve[-1]["accuracy"]
@@ -0,0 +1,62 @@
+# Third party modules
+import numpy as np
+
+# First party modules
+from lidtk.classifiers.char_distribution import (
+    char_dist_metric_train_test as cdm,
+)
+from lidtk.data.encoded_batch import EncodedBatch
+
+texts = ["Ein Test.", "", "Ünïcödé ΑΒΓ", "ไทย 😀 İ", "aaa"]
+
+
+def test_round_trip():
+    batch = EncodedBatch.from_texts(texts)
+    assert batch.to_texts() == texts
+    assert batch.lengths.tolist() == [len(text) for text in texts]
+    assert batch.row_ids.tolist() == [
+        i for i, text in enumerate(texts) for _ in range(len(text))
+    ]
+
+
+def test_lower():
+    batch = EncodedBatch.from_texts(["Ünïcödé ΑΒΓ", "İ"])
+    # "İ".lower() has two characters, so it is kept
+    assert batch.lower().to_texts() == ["ünïcödé αβγ", "İ"]
+
+
+def test_replace_above():
+    expected = ["".join("?" if ord(c) > 255 else c for c in text) for text in texts]
+    batch = EncodedBatch.from_texts(texts)
+    assert batch.replace_above(255, "?").to_texts() == expected
+    assert cdm.preprocess(texts[3], 255, "?") == expected[3]
+
+
+def test_get_distributions():
+    chars = ["a", "T", "other", "😀", " "]
+    expected = np.zeros((len(texts), len(chars)))
+    for i, text in enumerate(texts):
+        for char in text:
+            expected[i, chars.index(char) if char in chars else 2] += 1
+        expected[i] /= max(len(text), 1)
+    batch = EncodedBatch.from_texts(texts)
+    np.testing.assert_allclose(batch.get_distributions(chars), expected)
+    np.testing.assert_allclose(cdm.get_distribution(texts[0], chars), expected[0])
+
+
+def test_block_and_script_ids():
+    batch = EncodedBatch.from_texts(["aไ"])
+    counts = batch.bincount(
+        batch.get_script_ids(), 1 + int(batch.get_script_ids().max())
+    )
+    assert counts.sum() == 2
+    assert len(set(batch.get_block_ids().tolist())) == 2
+
+
+def test_count_characters():
+    data = {"x_train": texts, "y_train": ["deu", "deu", "ell", "tha", "eng"]}
+    counts = cdm.count_characters(data, 255)
+    assert counts["deu"] == cdm.Counter(
+        cdm.preprocess(texts[0], 255) + cdm.preprocess(texts[1], 255)
+    )
+    assert counts["tha"] == cdm.Counter(cdm.preprocess(texts[3], 255))
@@ -0,0 +1,136 @@
+# Core Library modules
+import contextlib
+import io
+import json
+import os
+
+# Third party modules
+import numpy as np
+import pkg_resources
+from sklearn.metrics import precision_recall_fscore_support
+
+# First party modules
+import lidtk.classifiers
+import lidtk.pipeline
+from lidtk.analysis import evaluation, manual_error_analysis, results_store
+from lidtk.data import label_table, wili
+
+
+class EnglishClassifier(lidtk.classifiers.LIDClassifier):
+    def predict(self, text):
+        return "eng"
+
+
+def test_metrics():
+    table = label_table.get_label_table()
+    rng = np.random.RandomState(0)
+    true_ids = rng.randint(0, 5, size=200)
+    predicted_ids = np.where(rng.rand(200) < 0.7, true_ids, rng.randint(0, 5, 200))
+    report = evaluation.EvaluationReport(table)
+    report.add_bulk(np.arange(200), true_ids, predicted_ids)
+    metrics = report.get_metrics()
+    expected = precision_recall_fscore_support(
+        true_ids, predicted_ids, labels=list(range(5)), zero_division=0
+    )
+    for name, values in zip(["precision", "recall", "f1", "support"], expected):
+        np.testing.assert_allclose(metrics[name][:5], values)
+
+
+def test_eval_wili(tmpdir, artifacts_dir):
+    cfg_path = pkg_resources.resource_filename(
+        "lidtk", "classifiers/config/google-cloud.yaml"
+    )
+    result_file = os.path.join(str(tmpdir), "results.npy")
+    EnglishClassifier(cfg_path).eval_wili(result_file)
+    y_test = wili.load_data()["y_test"]
+    predictions = label_table.read_results(result_file)
+    assert len(predictions) == len(y_test)
+    with open(result_file + ".json") as fp:
+        summary = json.load(fp)
+    assert summary["accuracy"] == y_test.count("eng") / len(y_test)
+
+    errors = evaluation.load_errors(result_file + ".errors.csv")
+    n_errors = sum(len(el["eng"]) for el in errors.values())
+    assert n_errors == len(y_test) - y_test.count("eng")
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        manual_error_analysis(errors, ["eng"])
+    index = next(iter(errors.values()))["eng"][0]
+    assert wili.load_data()["x_test"][index] in output.getvalue()
+
+    store_path = os.path.join(artifacts_dir, "results.sqlite")
+    with results_store.ResultsStore(store_path) as store:
+        assert [run["classifier"] for run in store.get_runs()] == ["google-cloud"]
+
+
+class InterruptedClassifier(EnglishClassifier):
+    def __init__(self, cfg_path, interrupt_at):
+        super().__init__(cfg_path)
+        self.n_calls = 0
+        self.interrupt_at = interrupt_at
+
+    def predict(self, text):
+        self.n_calls += 1
+        if self.n_calls > self.interrupt_at:
+            raise KeyboardInterrupt
+        return "eng" if len(text) % 2 else "deu"
+
+
+def test_eval_wili_resume(tmpdir, artifacts_dir):
+    cfg_path = pkg_resources.resource_filename(
+        "lidtk", "classifiers/config/google-cloud.yaml"
+    )
+    for name in ["results.npy", "results.txt"]:
+        complete = os.path.join(str(tmpdir), f"complete_{name}")
+        InterruptedClassifier(cfg_path, 10**9).eval_wili(complete)
+        resumed = os.path.join(str(tmpdir), f"resumed_{name}")
+        try:
+            InterruptedClassifier(cfg_path, 123).eval_wili(
+                resumed, checkpoint_every=50
+            )
+        except KeyboardInterrupt:
+            pass
+        assert os.path.isfile(resumed + ".checkpoint.npz")
+        classifier = InterruptedClassifier(cfg_path, 10**9)
+        classifier.eval_wili(resumed, resume=True, checkpoint_every=50)
+        assert classifier.n_calls == len(wili.load_data()["y_test"]) - 100
+        assert not os.path.isfile(resumed + ".checkpoint.npz")
+        for suffix in ["", ".errors.csv", ".confusion.npy"]:
+            with open(complete + suffix, "rb") as a, open(resumed + suffix, "rb") as b:
+                assert a.read() == b.read(), suffix
+
+
+def test_eval_wili_pipelined(tmpdir, artifacts_dir):
+    cfg_path = pkg_resources.resource_filename(
+        "lidtk", "classifiers/config/google-cloud.yaml"
+    )
+    for name in ["results.npy", "results.txt"]:
+        complete = os.path.join(str(tmpdir), f"complete_{name}")
+        InterruptedClassifier(cfg_path, 10**9).eval_wili(complete)
+        pipelined = os.path.join(str(tmpdir), f"pipelined_{name}")
+        try:
+            InterruptedClassifier(cfg_path, 123).eval_wili(
+                pipelined, checkpoint_every=50, pipelined=True, batch_size=10
+            )
+        except KeyboardInterrupt:
+            pass
+        assert os.path.isfile(pipelined + ".checkpoint.npz")
+        classifier = InterruptedClassifier(cfg_path, 10**9)
+        classifier.eval_wili(pipelined, resume=True, pipelined=True, batch_size=7)
+        assert classifier.n_calls == len(wili.load_data()["y_test"]) - 100
+        for suffix in ["", ".errors.csv", ".confusion.npy"]:
+            with open(complete + suffix, "rb") as a:
+                with open(pipelined + suffix, "rb") as b:
+                    assert a.read() == b.read(), suffix
+        with open(pipelined + ".json") as fp:
+            assert "inference" in json.load(fp)["meta"]["pipeline"]["utilization"]
+
+
+def test_prediction_stages():
+    classifier = lidtk.classifiers.get_classifier("script-router")
+    texts = wili.load_data()["x_test"][:50]
+    pipeline = lidtk.pipeline.Pipeline(classifier.get_prediction_stages())
+    batches = [texts[start : start + 8] for start in range(0, len(texts), 8)]
+    labels = [label for batch, _ in pipeline.run(batches) for label in batch]
+    assert labels == classifier.predict_bulk(texts)
+    assert set(pipeline.get_utilization()) == {"features", "inference"}
@@ -0,0 +1,53 @@
+# Core Library modules
+import json
+import os
+
+# Third party modules
+import pkg_resources
+
+# First party modules
+import lidtk.classifiers
+from lidtk.data import wili
+
+
+class LengthClassifier(lidtk.classifiers.LIDClassifier):
+    def __init__(self, cfg_path):
+        super().__init__(cfg_path)
+        self.cfg = dict(self.cfg, name="test-length")
+        self.n_calls = 0
+
+    def predict(self, text):
+        self.n_calls += 1
+        return ["deu", "eng", "fra"][len(text) % 3]
+
+
+def test_get_languages(artifacts_dir):
+    cfg_path = pkg_resources.resource_filename(
+        "lidtk", "classifiers/config/google-cloud.yaml"
+    )
+    classifier = LengthClassifier(cfg_path)
+    assert classifier.get_languages(use_cache=False) == ["deu", "eng", "fra"]
+    data = wili.load_data()
+    n_samples = len(data["x_train"]) + len(data["x_val"]) + len(data["x_test"])
+    assert classifier.n_calls == n_samples
+
+    sampling = LengthClassifier(cfg_path)
+    languages = sampling.get_languages(
+        mode="sample", batch_size=10, patience=2, use_cache=False
+    )
+    assert languages == ["deu", "eng", "fra"]
+    assert sampling.n_calls < n_samples
+
+    parallel = LengthClassifier(cfg_path)
+    languages = parallel.get_languages(batch_size=100, n_jobs=2, use_cache=False)
+    assert languages == ["deu", "eng", "fra"]
+
+    # The exhaustive label set is cached and also answers sampling requests
+    cache_filepath = os.path.join(
+        artifacts_dir, "label_sets", f"test-length_{classifier.get_config_hash()}.json"
+    )
+    with open(cache_filepath) as f:
+        assert json.load(f)["mode"] == "all"
+    cached = LengthClassifier(cfg_path)
+    assert cached.get_languages(mode="sample") == ["deu", "eng", "fra"]
+    assert cached.n_calls == 0
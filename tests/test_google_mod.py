@@ -0,0 +1,46 @@
+# Core Library modules
+import threading
+
+# First party modules
+from lidtk.classifiers import google_mod
+from lidtk.classifiers.http_mock import MockService
+
+
+def test_predict_bulk(service_classifier):
+    texts = ["This is a test.", "Это тест.", "นี่คือการทดสอบ", "123"] * 10
+    with MockService(google_mod.get_mock_routes()) as service:
+        classifier = service_classifier(
+            google_mod, service, batch_size=4, max_in_flight=3
+        )
+        languages = classifier.predict_bulk(texts)
+        assert languages == ["eng", "rus", "tha", "UNK"] * 10
+        assert service.n_requests == 10
+        assert service.max_in_flight <= 3
+
+
+def test_retry(service_classifier):
+    with MockService(google_mod.get_mock_routes(), fail_first=2) as service:
+        classifier = service_classifier(google_mod, service)
+        assert classifier.predict("Hello World") == "eng"
+        assert service.n_requests == 3
+
+
+def test_predict_bulk_ids_profiled_after_warmup(service_classifier):
+    texts = ["This is a test.", "Это тест.", "นี่คือการทดสอบ", "123"] * 4
+    with MockService(google_mod.get_mock_routes()) as service:
+        classifier = service_classifier(google_mod, service, batch_size=2)
+        # The parent starts the threads of the client before the fork
+        classifier.predict_bulk(texts)
+        profile = {"batch_size": 4, "n_jobs": 2, "blas_threads": 1}
+        result = []
+        thread = threading.Thread(
+            target=lambda: result.append(
+                classifier.predict_bulk_ids_profiled(texts, profile)
+            ),
+            daemon=True,
+        )
+        thread.start()
+        thread.join(timeout=60)
+        assert not thread.is_alive(), "the forked workers hang"
+        expected = classifier.predict_bulk_ids(texts)
+        assert result[0].tolist() == expected.tolist()
@@ -0,0 +1,56 @@
+# Core Library modules
+import os
+
+# Third party modules
+import numpy as np
+import pkg_resources
+from click.testing import CliRunner
+
+# First party modules
+import lidtk.utils
+from lidtk.data import label_table
+
+
+def test_encode_decode():
+    table = label_table.get_label_table()
+    labels = ["eng", "deu", "not-a-label", "eng"]
+    ids = table.encode(labels)
+    assert ids.dtype == np.int16
+    assert table.decode(ids).tolist() == ["eng", "deu", "UNK", "eng"]
+    assert table.count(ids)[table.get_id("eng")] == 2
+
+
+def test_result_files(tmpdir):
+    table = label_table.get_label_table()
+    labels = ["eng", "rus", "UNK", "eng"]
+    for name in ["results.npy", "results.txt"]:
+        filepath = os.path.join(str(tmpdir), name)
+        label_table.write_results(filepath, labels)
+        ids = label_table.read_results(filepath)
+        assert table.decode(ids).tolist() == labels
+
+
+def test_map_classification_result(tmpdir):
+    config = pkg_resources.resource_filename(
+        "lidtk", "classifiers/config/google-cloud.yaml"
+    )
+    source = os.path.join(str(tmpdir), "source.txt")
+    with open(source, "w") as fp:
+        fp.write("en\nde\nxx\nen")
+    runner = CliRunner()
+    for dest in ["dest.txt", "dest.npy"]:
+        dest = os.path.join(str(tmpdir), dest)
+        result = runner.invoke(
+            lidtk.utils.map_classification_result,
+            ["--config", config, "--source", source, "--dest", dest],
+        )
+        assert result.exit_code == 0, result.output
+    with open(os.path.join(str(tmpdir), "dest.txt")) as fp:
+        assert fp.read() == "eng\ndeu\nunk\neng"
+    ids = label_table.read_results(os.path.join(str(tmpdir), "dest.npy"))
+    assert label_table.get_label_table().decode(ids).tolist() == [
+        "eng",
+        "deu",
+        "UNK",
+        "eng",
+    ]
@@ -0,0 +1,82 @@
+# Core Library modules
+import os
+
+# Third party modules
+import numpy as np
+import pytest
+
+pytest.importorskip("langdetect")
+
+# Third party modules
+from langdetect.detector import Detector  # noqa: E402
+from langdetect.detector_factory import (  # noqa: E402
+    PROFILES_DIRECTORY,
+    DetectorFactory,
+)
+
+# First party modules
+from lidtk.classifiers.langdetect_engine import LangdetectEngine  # noqa: E402
+
+texts = [
+    "This is a rather long English sentence about the weather and the sea.",
+    "Das ist ein deutscher Satz über das Wetter, die Häuser und die Bäume.",
+    "Ceci est une phrase française sur le temps qu'il fait à la mer.",
+    "Это предложение на русском языке о погоде и о море.",
+    "Questa è una frase italiana sul tempo che fa al mare.",
+]
+
+
+@pytest.fixture(scope="module")
+def factory():
+    profiles = []
+    for code in sorted(os.listdir(PROFILES_DIRECTORY)):
+        with open(os.path.join(PROFILES_DIRECTORY, code), encoding="utf-8") as f:
+            profiles.append(f.read())
+    factory = DetectorFactory()
+    factory.load_json_profile(profiles)
+    factory.set_seed(0)
+    return factory
+
+
+def detect(factory, text):
+    detector = factory.create()
+    detector.append(text)
+    return detector.detect()
+
+
+def test_ngram_ids(factory):
+    engine = LangdetectEngine(factory)
+    for text in texts:
+        detector = factory.create()
+        detector.append(text)
+        detector.cleaning_text()
+        ngrams = detector._extract_ngrams()
+        ngram_ids = engine.get_ngram_ids(text)
+        assert len(ngram_ids) == len(ngrams)
+        assert [list(engine.vocabulary)[i] for i in ngram_ids] == ngrams
+
+
+@pytest.mark.parametrize("mode", ["deterministic", "sampled"])
+def test_detect_bulk(factory, mode):
+    engine = LangdetectEngine(factory, mode=mode, seed=0)
+    assert engine.detect_bulk(texts) == [detect(factory, text) for text in texts]
+    assert engine.detect_bulk(["", "1234"]) == [Detector.UNKNOWN_LANG] * 2
+
+
+@pytest.mark.parametrize("mode", ["deterministic", "sampled"])
+def test_predict_proba_bulk(factory, mode):
+    engine = LangdetectEngine(factory, mode=mode, seed=0)
+    for text, languages in zip(texts, engine.predict_proba_bulk(texts)):
+        detector = factory.create()
+        detector.append(text)
+        expected = detector.get_probabilities()
+        assert languages[0].lang == expected[0].lang
+        assert sum(language.prob for language in languages) <= 1 + 1e-6
+
+
+def test_sampled_is_reproducible(factory):
+    first = LangdetectEngine(factory, mode="sampled", seed=0)
+    second = LangdetectEngine(factory, mode="sampled", seed=0)
+    assert np.array_equal(
+        first.get_probabilities_bulk(texts), second.get_probabilities_bulk(texts)
+    )
@@ -0,0 +1,20 @@
+# Third party modules
+import pytest
+
+pytest.importorskip("langdetect")
+
+# First party modules
+from lidtk.classifiers import langdetect_mod  # noqa: E402
+
+
+def test_single_language():
+    classifier = langdetect_mod.LangdetectClassifier(langdetect_mod.filepath, ["deu"])
+    assert classifier.predict("This is an English sentence.") == "deu"
+    assert classifier.predict_bulk(["This is English.", ""]) == ["deu", "deu"]
+    assert classifier.predict_proba("Hello") == [{"lang": "deu", "prob": 1.0}]
+
+
+def test_no_language():
+    classifier = langdetect_mod.LangdetectClassifier(langdetect_mod.filepath, ["tlh"])
+    assert classifier.predict("This is an English sentence.") == "UNK"
+    assert classifier.predict_proba("Hello") == []
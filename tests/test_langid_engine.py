@@ -0,0 +1,67 @@
+# Third party modules
+import numpy as np
+import pytest
+
+langid = pytest.importorskip("langid.langid")
+
+# First party modules
+from lidtk.classifiers.langid_engine import LangidEngine  # noqa: E402
+
+texts = [
+    "",
+    "x",
+    "This is an English sentence.",
+    "Das ist ein deutscher Satz über Häuser und Bäume.",
+    "Ceci est une phrase française, n'est-ce pas ?",
+    "これは日本語の文章です。",
+    "Это предложение на русском языке. " * 20,
+]
+
+
+@pytest.mark.parametrize("norm_probs", [False, True])
+def test_instance2fv_bulk(norm_probs):
+    identifier = langid.LanguageIdentifier.from_modelstring(
+        langid.model, norm_probs=norm_probs
+    )
+    engine = LangidEngine(identifier, norm_probs=norm_probs)
+    feature_vectors = engine.instance2fv_bulk(texts).toarray()
+    for text, feature_vector in zip(texts, feature_vectors):
+        assert np.array_equal(feature_vector, identifier.instance2fv(text))
+
+
+@pytest.mark.parametrize("norm_probs", [False, True])
+def test_classify_bulk(norm_probs):
+    identifier = langid.LanguageIdentifier.from_modelstring(
+        langid.model, norm_probs=norm_probs
+    )
+    engine = LangidEngine(identifier, norm_probs=norm_probs)
+    for text, (language, score) in zip(texts, engine.classify_bulk(texts)):
+        expected_language, expected_score = identifier.classify(text)
+        assert language == expected_language
+        assert np.isclose(score, expected_score, rtol=1e-4, atol=1e-4)
+
+
+@pytest.mark.parametrize("norm_probs", [False, True])
+def test_rank_bulk(norm_probs):
+    identifier = langid.LanguageIdentifier.from_modelstring(
+        langid.model, norm_probs=norm_probs
+    )
+    engine = LangidEngine(identifier, norm_probs=norm_probs)
+    for text, ranking in zip(texts[2:], engine.rank_bulk(texts[2:], k=3)):
+        expected = identifier.rank(text)[:3]
+        assert [code for code, _ in ranking] == [code for code, _ in expected]
+        assert np.allclose(
+            [score for _, score in ranking],
+            [score for _, score in expected],
+            rtol=1e-4,
+            atol=1e-4,
+        )
+
+
+def test_set_languages():
+    identifier = langid.LanguageIdentifier.from_modelstring(langid.model)
+    engine = LangidEngine(identifier)
+    engine.set_languages(["de", "fr"])
+    for text, (language, _) in zip(texts, engine.classify_bulk(texts)):
+        assert language == identifier.classify(text)[0]
+        assert language in ["de", "fr"]
@@ -1,4 +1,9 @@
+# Core Library modules
+import os
+import pickle
+
 # Third party modules
+import numpy as np
 from click.testing import CliRunner
 
 # First party modules
@@ -9,3 +14,34 @@ def test_main():
     runner = CliRunner()
     result = runner.invoke(language_utils.main, ["--theta", 0.5])
     print(result)
+
+
+def write_language_file(filepath, paragraphs):
+    with open(filepath, "wb") as handle:
+        pickle.dump({"paragraphs": paragraphs, "used_pages": []}, handle)
+
+
+def test_load_language_stats(tmpdir, monkeypatch):
+    filepath = str(tmpdir.join("de.pickle"))
+    cache_pattern = os.path.join(str(tmpdir), "cache", "{}.pickle")
+    write_language_file(filepath, ["Bäume", "Bäder"])
+    stats = language_utils.load_language_stats((filepath, cache_pattern, False))
+    assert os.path.isfile(cache_pattern.format("de"))
+    assert stats["counts"][:3].tolist() == [2, 2, 2]
+    assert set(map(chr, stats["code_points"][:3])) == {"B", "ä", "e"}
+    assert stats["counts"].sum() == 10
+    assert stats["paraphgrah_len_max"] == 5
+
+    def fail(paragraphs):
+        raise AssertionError("The stats should come from the cache")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(language_utils, "get_language_stats", fail)
+        cached = language_utils.load_language_stats((filepath, cache_pattern, False))
+    assert np.array_equal(cached["code_points"], stats["code_points"])
+    assert np.array_equal(cached["counts"], stats["counts"])
+
+    # A changed language file invalidates the cache
+    write_language_file(filepath, ["Bäume", "Bäder", "Tür"])
+    stats = language_utils.load_language_stats((filepath, cache_pattern, False))
+    assert stats["counts"].sum() == 13
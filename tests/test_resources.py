@@ -0,0 +1,28 @@
+# Core Library modules
+import os
+
+# First party modules
+from lidtk import resources
+
+
+def _get_thread_settings(_: int) -> tuple:
+    return os.environ["OMP_NUM_THREADS"], os.environ["LIDTK_CPUS"]
+
+
+def test_get_cpus(monkeypatch):
+    available = resources.get_available_cpus()
+    monkeypatch.setenv("LIDTK_CPUS", "1")
+    assert resources.get_cpus() == available[:1]
+    monkeypatch.setenv("LIDTK_CPUS", "0-2,5")
+    assert resources.get_cpu_budget() == 4
+    monkeypatch.delenv("LIDTK_CPUS")
+    assert resources.get_cpus() == available
+
+
+def test_get_pool(monkeypatch):
+    cpu = resources.get_available_cpus()[0]
+    monkeypatch.setenv("LIDTK_CPUS", f"{cpu}-{cpu}")
+    monkeypatch.setenv("LIDTK_PIN_CPUS", "1")
+    with resources.get_pool(2) as pool:
+        settings = pool.map(_get_thread_settings, range(4), chunksize=1)
+    assert set(settings) == {("1", str(cpu))}
@@ -0,0 +1,31 @@
+# Third party modules
+import pkg_resources
+
+# First party modules
+import lidtk.classifiers
+
+
+class MappingClassifier(lidtk.classifiers.LIDClassifier):
+    def predict(self, text):
+        return self.map2wili(text)
+
+
+def get_classifier(languages=None):
+    cfg_path = pkg_resources.resource_filename(
+        "lidtk", "classifiers/config/langid.yaml"
+    )
+    return MappingClassifier(cfg_path, languages)
+
+
+def test_unrestricted():
+    classifier = get_classifier()
+    assert classifier.predict("de") == "deu"
+    assert classifier.predict("fr") == "fra"
+
+
+def test_restricted():
+    classifier = get_classifier(["fra", "eng"])
+    assert classifier.predict("de") == "UNK"
+    assert classifier.predict("fr") == "fra"
+    assert classifier.predict_restricted("en", ["fra"]) == "UNK"
+    assert classifier.get_mapping_languages() == ["eng", "fra"]
@@ -0,0 +1,38 @@
+# Core Library modules
+import os
+
+# Third party modules
+import numpy as np
+from click.testing import CliRunner
+
+# First party modules
+from lidtk.analysis import results_store
+
+
+def test_results_store(tmpdir):
+    filepath = os.path.join(str(tmpdir), "results.sqlite")
+    sample_indices = np.arange(10, 20)
+    true_ids = np.array([0, 1, 2, 0, 1, 2, 0, 1, 2, 0])
+    with results_store.ResultsStore(filepath) as store:
+        store.set_labels(sample_indices, true_ids)
+        a = store.add_run("a", "hash1", sample_indices, true_ids)
+        wrong = true_ids.copy()
+        wrong[:4] = 3
+        b = store.add_run("b", "hash1", sample_indices, wrong, scores=np.ones(10))
+        # A second run with the same key replaces the first one
+        b = store.add_run("b", "hash1", sample_indices, wrong, scores=np.ones(10))
+        np.testing.assert_allclose(store.get_accuracies([a, b]), [1.0, 0.6])
+        assert store.get_oracle_accuracy([a, b]) == 1.0
+        assert store.get_disagreements([a, b]).tolist() == [10, 11, 12, 13]
+        assert [run["classifier"] for run in store.get_runs()] == ["a", "b"]
+        assert store.find_run("b") == b
+        assert store.find_run("b", "other hash") is None
+        predictions = store.get_predictions(b)
+        assert predictions["scores"].tolist() == [1.0] * 10
+        assert np.isnan(predictions["latencies"]).all()
+
+    result = CliRunner().invoke(
+        results_store.entry_point, ["--store", filepath, "diff", "a", "b"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "4 of 10 samples differ" in result.output
@@ -0,0 +1,40 @@
+# Core Library modules
+import json
+import os
+
+# Third party modules
+import numpy as np
+
+# First party modules
+from lidtk import runner
+from lidtk.analysis import results_store
+from lidtk.classifiers import get_classifier
+from lidtk.data import label_table
+
+
+def test_run_experiments(tmpdir, artifacts_dir):
+    experiment_path = os.path.join(str(tmpdir), "router.yaml")
+    with open(experiment_path, "w") as f:
+        f.write("classifier: script-router\nbatch_size: 64\n")
+    experiments = [runner.load_experiment(experiment_path)]
+    experiments.append(dict(experiments[0], name="router_copy", batch_size=1000))
+    output_dir = os.path.join(str(tmpdir), "runs")
+    results = runner.run_experiments(experiments, output_dir, n_jobs=2)
+    runner.write_report(os.path.join(output_dir, "report.json"), results, 2)
+
+    x_test = runner._data["x_test"]
+    expected = get_classifier("script-router").predict_bulk_ids(x_test)
+    for result in results:
+        assert "error" not in result
+        predicted = label_table.read_results(
+            os.path.join(output_dir, f"{result['name']}.npy")
+        )
+        np.testing.assert_array_equal(predicted, expected)
+        accuracy = np.mean(expected == runner._data["y_test_ids"])
+        assert result["accuracy"] == accuracy
+    with open(os.path.join(output_dir, "report.json")) as f:
+        report = json.load(f)
+    assert [el["name"] for el in report["results"]] == ["router", "router_copy"]
+    store_path = os.path.join(artifacts_dir, "results.sqlite")
+    with results_store.ResultsStore(store_path) as store:
+        assert [run["classifier"] for run in store.get_runs()] == ["script-router"]
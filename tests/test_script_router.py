@@ -0,0 +1,18 @@
+# First party modules
+from lidtk.classifiers.script_router import ScriptRouter
+
+
+def test_route():
+    router = ScriptRouter(
+        {"Latin": {"eng", "deu"}, "Cyrillic": {"rus", "srp"}, "Thai": {"tha"}},
+        min_script_share=0.2,
+    )
+    assert router.route("Hello world!") == ["deu", "eng"]
+    assert router.route("ภาษาไทย 123") == ["tha"]
+    assert router.route("Привет, world") == ["deu", "eng", "rus", "srp"]
+    assert router.route("1, 2, 3") == []
+
+
+def test_route_ignores_rare_scripts():
+    router = ScriptRouter({"Latin": {"eng"}, "Greek": {"ell"}}, min_script_share=0.2)
+    assert router.route("The letter α is greek") == ["eng"]
@@ -0,0 +1,42 @@
+# Third party modules
+import numpy as np
+
+# First party modules
+from lidtk.classifiers.char_distribution import segmentation
+
+
+def test_window_distributions_across_chunks():
+    char_ids = np.random.RandomState(0).randint(0, 4, size=1003)
+    step, half_width = 7, 3
+    distributions = np.concatenate(
+        list(
+            segmentation.get_window_distributions(
+                char_ids, 4, step, half_width, chunk_size=10
+            )
+        )
+    )
+    n_blocks = -(-len(char_ids) // step)
+    assert distributions.shape == (n_blocks, 4)
+    for block in [0, 5, 77, n_blocks - 1]:
+        window = char_ids[
+            max(block - half_width, 0) * step : (block + half_width + 1) * step
+        ]
+        expected = np.bincount(window, minlength=4) / len(window)
+        assert np.allclose(distributions[block], expected)
+
+
+def test_segment(char_dist_classifier):
+    classifier = char_dist_classifier()
+    text = "a" * 400 + "b" * 300 + "a" * 5 + "b" * 95
+    spans = classifier.segment(text, window_size=100, step=20, switch_penalty=0.2)
+    assert spans == [(0, 400, "aaa"), (400, 800, "bbb")]
+    assert classifier.segment("") == []
+
+
+def test_segment_large_document(char_dist_classifier):
+    classifier = char_dist_classifier()
+    text = ("a" * 5000 + "b" * 5000) * 100
+    spans = classifier.segment(text)
+    assert len(spans) == 200
+    assert spans[0] == (0, 5000, "aaa")
+    assert spans[-1] == (len(text) - 5000, len(text), "bbb")
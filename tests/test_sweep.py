@@ -0,0 +1,28 @@
+# Core Library modules
+import csv
+import os
+
+# First party modules
+from lidtk import sweep
+
+
+def test_run_sweep(tmpdir):
+    sweep_cfg = {
+        "model": "char_dist",
+        "grid": {"unicode_cutoff": 10**6, "coverage": [0.8, 0.9], "metric": "ido"},
+    }
+    results = sweep.run_sweep(sweep_cfg, max_samples=50)
+    assert [result["coverage"] for result in results] == [0.8, 0.9]
+    for result in results:
+        assert 0.0 <= result["accuracy"] <= 1.0
+        assert result["throughput"] > 0
+        assert result["model_size"] > 0
+    # Both trials share the character counts
+    assert results[0]["feature_time"] == results[1]["feature_time"]
+
+    filepath = os.path.join(str(tmpdir), "results.csv")
+    sweep.write_results(filepath, results)
+    with open(filepath) as f:
+        rows = list(csv.DictReader(f, delimiter=";"))
+    assert rows[0]["metric"] == "ido"
+    assert float(rows[1]["accuracy"]) == results[1]["accuracy"]
@@ -0,0 +1,30 @@
+# Third party modules
+import numpy as np
+import pkg_resources
+
+# First party modules
+from lidtk import tune
+from lidtk.classifiers import script_router
+
+
+def test_tune(artifacts_dir):
+    cfg_path = pkg_resources.resource_filename(
+        "lidtk", "classifiers/config/script_router.yaml"
+    )
+    classifier = script_router.ScriptRouterClassifier(cfg_path)
+    texts = tune.get_sample(200)
+    candidates = [
+        {"batch_size": 10, "n_jobs": 1, "blas_threads": 1},
+        {"batch_size": 50, "n_jobs": 2, "blas_threads": None},
+    ]
+    best, measurements = tune.tune(classifier, texts, candidates, max_latency=60)
+    assert len(measurements) == 2
+    assert best["throughput"] == max(el["throughput"] for el in measurements)
+
+    profile_path = tune.save_profile(classifier, candidates[1], measurements)
+    assert profile_path.startswith(artifacts_dir)
+    assert classifier.profile == candidates[1]
+    np.testing.assert_array_equal(
+        classifier.predict_bulk_ids_profiled(texts),
+        classifier.predict_bulk_ids(texts),
+    )
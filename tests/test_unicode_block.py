@@ -0,0 +1,18 @@
+#!/usr/bin/env python
+
+# Third party modules
+import numpy as np
+
+# First party modules
+from lidtk.analysis import unicode_block
+
+
+def test_compute_histograms():
+    xs = ["ab", "aไ", "ไทย", ""]
+    ys = ["eng", "eng", "tha", "tha"]
+    histograms = unicode_block.compute_histograms(xs, ys, n_jobs=1, shard_size=2)
+    assert histograms.languages == ["eng", "tha"]
+    assert histograms.n_paragraphs.tolist() == [2, 1]
+    np.testing.assert_allclose(histograms.range_shares(0, 127), [0.75, 0.0])
+    np.testing.assert_allclose(histograms.block_shares("Thai"), [0.25, 1.0])
+    np.testing.assert_allclose(histograms.block_matrix.sum(axis=1), [1.0, 1.0])
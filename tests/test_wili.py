@@ -0,0 +1,15 @@
+# Third party modules
+import numpy as np
+
+# First party modules
+from lidtk.data import wili
+
+
+def test_index_targets_match_one_hot():
+    indices = wili.load_data({"target_type": "index"})
+    one_hot = wili.load_data({"target_type": "one_hot"})
+    for set_name in ["y_train", "y_val", "y_test"]:
+        assert indices[set_name].dtype == np.int16
+        np.testing.assert_array_equal(
+            one_hot[set_name].argmax(axis=1), indices[set_name]
+        )